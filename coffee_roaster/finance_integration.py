@@ -125,39 +125,22 @@ def apply_vat_on_invoice(doc, method):
 def execute_sku_profit(filters=None):
     """
     Script Report: returns cost, revenue, profit, margin per Roasted Item.
+    Filters: from_date, to_date, company, item_code, by_month (one row per item and month).
     """
+    from coffee_roaster.roaster.sku_pnl import compute
+
+    filters = frappe._dict(filters or {})
+    by_month = bool(int(filters.get("by_month") or 0))
     columns = [
         {"label": "Item",        "fieldname": "item",        "fieldtype": "Link",     "options": "Item",   "width": 200},
+        {"label": "Qty Sold",    "fieldname": "sold_qty",    "fieldtype": "Float"},
         {"label": "Total Cost",  "fieldname": "total_cost",  "fieldtype": "Currency"},
         {"label": "Total Sales", "fieldname": "total_sales", "fieldtype": "Currency"},
         {"label": "Profit",      "fieldname": "profit",      "fieldtype": "Currency"},
         {"label": "Margin %",    "fieldname": "margin_pct",  "fieldtype": "Percent"}
     ]
+    if by_month:
+        columns.insert(1, {"label": "Month", "fieldname": "month", "fieldtype": "Date", "width": 110})
 
-    data = []
-    items = frappe.get_all("Item", filters={"item_group": "Roasted Coffee"}, pluck="name")
-
-    for item in items:
-        cost = flt(frappe.db.get_value("Batch Cost",
-                    {"item_code": item, "docstatus": 1}, "sum(total_cost)"))
-        sales = flt(frappe.db.sql(
-            """
-            SELECT SUM(`tabSales Invoice Item`.amount)
-            FROM `tabSales Invoice Item`
-            JOIN `tabSales Invoice`
-              ON `tabSales Invoice`.name = `tabSales Invoice Item`.parent
-            WHERE `tabSales Invoice Item`.item_code=%s
-              AND `tabSales Invoice`.docstatus=1
-            """, (item,))[0][0]
-        )
-        profit = sales - cost
-        margin = (profit / sales * 100) if sales else 0
-
-    data.append({
-        "item":        item,
-        "total_cost":  cost,
-        "total_sales": sales,
-        "profit":      profit,
-        "margin_pct":  margin
-    })
+    data = compute(filters, by_month=by_month)
     return columns, data
\ No newline at end of file
@@ -10,6 +10,18 @@ app_license = "mit"
 # ... other details ...
 
 scheduler_events = {
+    "all": [
+        "coffee_roaster.roaster.events.flush_pending_machine_events"
+    ],
+    "daily": [
+        "coffee_roaster.roaster.machines.spool.purge",
+        "coffee_roaster.roaster.profitability.reconcile",
+        "coffee_roaster.roaster.cylinder_rollup.reconcile",
+        "coffee_roaster.roaster.sku_pnl.reconcile"
+    ],
+    "weekly": [
+        "coffee_roaster.roaster.machines.similarity.rebuild"
+    ],
     "cron": {
         "0 2 1 * *": [  # 02:00 on day 1 of every month
             "coffee_roaster.peachtree_export.export_previous_month_for_sage"
@@ -20,22 +32,110 @@ scheduler_events = {
 doc_events = {
     "Roast Batch": {
         # The ONLY event needed for the inventory transaction
-         "on_submit": "coffee_roaster.roaster.events.create_roasting_stock_entry" 
+         "on_submit": [
+            "coffee_roaster.roaster.events.create_roasting_stock_entry",
+            "coffee_roaster.roaster.profitability.on_roast_batch_change",
+            "coffee_roaster.roaster.cylinder_rollup.on_roast_batch_submit",
+        ],
+        "on_update": "coffee_roaster.roaster.profitability.on_roast_batch_change",
+        "on_update_after_submit": [
+            "coffee_roaster.roaster.profitability.on_roast_batch_change",
+            "coffee_roaster.roaster.cylinder_rollup.on_roast_batch_update_after_submit",
+        ],
+        "on_cancel": [
+            "coffee_roaster.roaster.profitability.on_roast_batch_change",
+            "coffee_roaster.roaster.cylinder_rollup.on_roast_batch_cancel",
+        ],
+        "on_trash": "coffee_roaster.roaster.profitability.on_roast_batch_trash",
     },
      "Sales Invoice": {
-        "validate": "coffee_roaster.finance_integration.apply_vat_on_invoice"
+        "validate": "coffee_roaster.finance_integration.apply_vat_on_invoice",
+        "on_submit": "coffee_roaster.roaster.sku_pnl.on_sales_invoice_submit",
+        "on_cancel": "coffee_roaster.roaster.sku_pnl.on_sales_invoice_cancel",
+    },
+    # keep the Latest Assessment Index pointers current
+    "Physical Assessment": {
+        "on_update": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_submit": [
+            "coffee_roaster.roaster.doctype.physical_assessment.physical_assessment.PhysicalAssessment.on_submit",
+            "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        ],
+        "on_update_after_submit": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_cancel": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_trash": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+    },
+    "Descriptive Assessment": {
+        "on_update": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_submit": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_update_after_submit": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_cancel": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_trash": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+    },
+    "Extrinsic Assessment": {
+        "on_update": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_submit": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_update_after_submit": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_cancel": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_trash": "coffee_roaster.roaster.assessment_index.on_assessment_change",
     },
-      "Physical Assessment": {
-        "on_submit": "coffee_roaster.roaster.doctype.physical_assessment.physical_assessment.PhysicalAssessment.on_submit"
+    "Affective Assessment": {
+        "on_update": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_submit": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_update_after_submit": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_cancel": "coffee_roaster.roaster.assessment_index.on_assessment_change",
+        "on_trash": "coffee_roaster.roaster.assessment_index.on_assessment_change",
     },
       "Batch Cost": {
-        "on_submit": "coffee_roaster.finance_integration.post_batch_cost_gl_entry"
+        "on_submit": [
+            "coffee_roaster.finance_integration.post_batch_cost_gl_entry",
+            "coffee_roaster.roaster.profitability.on_batch_cost_change",
+            "coffee_roaster.roaster.sku_pnl.on_batch_cost_submit",
+        ],
+        "on_update": "coffee_roaster.roaster.profitability.on_batch_cost_change",
+        "on_update_after_submit": "coffee_roaster.roaster.profitability.on_batch_cost_change",
+        "on_cancel": [
+            "coffee_roaster.roaster.profitability.on_batch_cost_change",
+            "coffee_roaster.roaster.sku_pnl.on_batch_cost_cancel",
+        ],
+        "on_trash": "coffee_roaster.roaster.profitability.on_batch_cost_change",
+    },
+    "Item Price": {
+        "on_update": "coffee_roaster.roaster.profitability.on_item_price_change",
+        "on_trash": "coffee_roaster.roaster.profitability.on_item_price_change",
     },
      "Coffee Roasting Log": {
-    "on_update_after_submit": "coffee_roaster.roaster.doctype.coffee_roasting_log.coffee_roasting_log_api.sync_phases_to_roast_batch"
+    "on_cancel": "coffee_roaster.roaster.machines.similarity.on_log_removed",
+    "on_trash": "coffee_roaster.roaster.machines.similarity.on_log_removed",
+    "on_update_after_submit": [
+        "coffee_roaster.roaster.machines.metrics.on_update_after_submit",
+        "coffee_roaster.roaster.doctype.coffee_roasting_log.coffee_roasting_log_api.sync_phases_to_roast_batch",
+    ]
   }
 }
 
+# drop cached report results that read the changed doctype; only the doctypes the
+# @cached_report decorators are tagged with, so other saves never touch the cache
+_report_cache_doctypes = (
+    "Affective Assessment",
+    "Batch Cost",
+    "Customer",
+    "Descriptive Assessment",
+    "Extrinsic Assessment",
+    "Latest Assessment Index",
+    "Physical Assessment",
+    "Roast Batch",
+    "Roast Cylinder Daily",
+    "Route Plan",
+    "Sales Invoice",
+)
+for _doctype in _report_cache_doctypes:
+    _events = doc_events.setdefault(_doctype, {})
+    for _event in ("on_update", "on_submit", "on_update_after_submit", "on_cancel", "on_trash"):
+        _handlers = _events.get(_event) or []
+        _events[_event] = ([_handlers] if isinstance(_handlers, str) else _handlers) + [
+            "coffee_roaster.roaster.report_cache.on_doc_change"
+        ]
+
 doctype_js = {
     # We only need JS for the Roast Batch form itself
      "Roast Batch": "roaster/js/roast_batch.js"
@@ -214,65 +214,172 @@ def build_route_from_rtm(sub_cities=None, date=None, marketer=None):
 import re
 import json
 import frappe
+from bisect import bisect_left
+from datetime import timedelta
 from frappe.utils import get_datetime
 
-@frappe.whitelist()
-def get_round_machine_data(rb_name: str) -> dict:
-    """Return {round_no: [logs]} for the given Roast Batch.
-    Strategy A: group Coffee Roasting Log rows whose log_name ends with -R##.
-    Strategy B: if no tagging, partition charge_start..development_end into N equal windows.
-    Assumes an existing DocType "Coffee Roasting Log" with fields:
-      - roast_batch (Link), log_name (Data), timestamp (Datetime), data_json (Long Text / JSON)
-    """
-    if not rb_name:
-        frappe.throw("rb_name is required")
+ROUND_TAG = re.compile(r"-R(\d{1,2})$")
+ROUND_PAGE_LEN = 200      # logs per get_round_data page
+ROUND_MAX_POINTS = 500    # data_json entries kept per log after downsampling
+
 
+def _round_windows(rb_name: str):
+    """(roast batch, number of rounds, [(name, log_name, timestamp)] sorted by timestamp).
+
+    Only the columns needed to assign rounds are read; data_json stays in the database.
+    """
     rb = frappe.get_doc("Roast Batch", rb_name)
-    rounds = rb.get("rounds") or []
-    n = len(rounds)
+    n = len(rb.get("rounds") or [])
+    logs = frappe.db.get_all(
+        "Coffee Roasting Log",
+        fields=["name", "log_name", "timestamp"],
+        filters={"roast_batch": rb_name},
+        order_by="timestamp asc",
+        as_list=True,
+    ) if n else []
+    return rb, n, logs
+
+
+def _assign_rounds(rb, n: int, logs: list) -> dict:
+    """{round_no: [log rows]} for rows from `_round_windows`.
+
+    Strategy A: group rows whose log_name ends with -R##.
+    Strategy B: if no tagging, partition charge_start..development_end into N equal
+    windows; rows are already sorted, so each window boundary is one bisect.
+    """
     out = {i + 1: [] for i in range(n)}
     if n == 0:
         return out
 
-    logs = frappe.get_all(
-        "Coffee Roasting Log",
-        fields=["name", "log_name", "timestamp", "data_json"],
-        filters={"roast_batch": rb_name},
-        order_by="timestamp asc"
-    )
-
-    # Try Strategy A: suffix -R## in log_name
     got_any = False
-    for l in logs:
-        ln = (l.get("log_name") or "").strip()
-        m = re.search(r"-R(\d{1,2})$", ln)
-        if m:
-            rn = int(m.group(1))
-            if 1 <= rn <= n:
-                out[rn].append(l)
-                got_any = True
+    for row in logs:
+        m = ROUND_TAG.search((row[1] or "").strip())
+        if m and 1 <= int(m.group(1)) <= n:
+            out[int(m.group(1))].append(row)
+            got_any = True
     if got_any:
         return out
 
-    # Strategy B: equal time windows from charge_start..development_end (or charge_end)
     start = rb.get("charge_start") or rb.get("roast_date")
-    end   = rb.get("development_end") or rb.get("charge_end") or rb.get("roast_date")
+    end = rb.get("development_end") or rb.get("charge_end") or rb.get("roast_date")
     if not (start and end):
         return out
-
-    start_ts = get_datetime(start)
-    end_ts = get_datetime(end)
+    start_ts, end_ts = get_datetime(start), get_datetime(end)
     total = (end_ts - start_ts).total_seconds()
     if total <= 0:
         return out
 
-    def bucket(ts):
-        rel = (get_datetime(ts) - start_ts).total_seconds() / total
-        idx = max(0, min(n - 1, int(rel * n)))
-        return idx + 1
+    # the database already returns datetimes, sorted; untimed rows are kept out of the
+    # bisect (substituting start_ts could unsort it) and land in round 1
+    untimed = [row for row in logs if not row[2]]
+    timed = [row for row in logs if row[2]]
+    stamps = [row[2] for row in timed]
+    cuts = [0] + [bisect_left(stamps, start_ts + timedelta(seconds=total * k / n)) for k in range(1, n)] + [len(timed)]
+    for k in range(n):
+        out[k + 1] = timed[cuts[k]:cuts[k + 1]]
+    out[1] = untimed + out[1]
+    return out
+
+
+def _mean(values):
+    vals = [v for v in values if v is not None]
+    return round(sum(vals) / len(vals), 1) if vals else None
 
-    for l in logs:
-        rn = bucket(l["timestamp"])
-        out[rn].append(l)
 
+@frappe.whitelist()
+def get_round_summaries(rb_name: str) -> dict:
+    """{round_no: {logs, start, end, duration_s, metrics}} for a Roast Batch, without data_json."""
+    if not rb_name:
+        frappe.throw("rb_name is required")
+    rb, n, logs = _round_windows(rb_name)
+    rounds = _assign_rounds(rb, n, logs)
+
+    metrics = {}
+    if logs:
+        for m in frappe.get_all("Roast Metrics Summary",
+                                filters={"coffee_roasting_log": ["in", [row[0] for row in logs]]},
+                                fields=["coffee_roasting_log", "roast_time_s", "dtr_pct", "max_ror", "drop_temp"]):
+            metrics[m.coffee_roasting_log] = m
+
+    out = {}
+    for rn, rows in rounds.items():
+        start = rows[0][2] if rows else None
+        end = rows[-1][2] if rows else None
+        found = [metrics[row[0]] for row in rows if row[0] in metrics]
+        out[rn] = {
+            "round_no": rn,
+            "logs": len(rows),
+            "start": start,
+            "end": end,
+            "duration_s": int((get_datetime(end) - get_datetime(start)).total_seconds()) if start and end else 0,
+            "metrics": {f: _mean(m[f] for m in found) for f in ("roast_time_s", "dtr_pct", "max_ror", "drop_temp")},
+        }
     return out
+
+
+def _downsample(data, max_points: int):
+    """Thin a data_json list to `max_points` entries (LTTB on bean temperature when present)."""
+    if not isinstance(data, list) or len(data) <= max_points:
+        return data
+    if all(isinstance(p, dict) for p in data[:1]):
+        key = next((k for k in ("bt", "bean_temp", "BT") if k in data[0]), None)
+        if key:
+            from coffee_roaster.roaster.machines.curve import lttb_indices
+            ys = [float(p.get(key)) if isinstance(p.get(key), int | float) else float("nan") for p in data]
+            return [data[i] for i in lttb_indices(range(len(data)), ys, max_points)]
+    step = len(data) / max_points
+    return [data[int(i * step)] for i in range(max_points - 1)] + [data[-1]]
+
+
+@frappe.whitelist()
+def get_round_data(rb_name: str, round_no: int, page: int = 1, page_len: int = ROUND_PAGE_LEN,
+                   max_points: int = ROUND_MAX_POINTS) -> dict:
+    """One page of one round's logs with their data_json parsed and downsampled."""
+    if not rb_name:
+        frappe.throw("rb_name is required")
+    round_no, page = int(round_no), max(1, int(page or 1))
+    page_len = max(1, min(int(page_len or ROUND_PAGE_LEN), 1000))
+    max_points = max(2, int(max_points or ROUND_MAX_POINTS))
+
+    rb, n, logs = _round_windows(rb_name)
+    rows = _assign_rounds(rb, n, logs).get(round_no, [])
+    page_rows = rows[(page - 1) * page_len:page * page_len]
+
+    data = {}
+    if page_rows:
+        for r in frappe.get_all("Coffee Roasting Log", fields=["name", "data_json"],
+                                filters={"name": ["in", [row[0] for row in page_rows]]}):
+            try:
+                parsed = json.loads(r.data_json) if r.data_json else None
+            except ValueError:
+                parsed = None
+            data[r.name] = _downsample(parsed, max_points)
+
+    return {
+        "round_no": round_no,
+        "page": page,
+        "page_len": page_len,
+        "total": len(rows),
+        "has_more": page * page_len < len(rows),
+        "logs": [{"name": row[0], "log_name": row[1], "timestamp": row[2], "data": data.get(row[0])}
+                 for row in page_rows],
+    }
+
+
+@frappe.whitelist()
+def get_round_machine_data(rb_name: str) -> dict:
+    """Return {round_no: [logs]} for the given Roast Batch, data_json included.
+
+    Kept for existing callers; new code should use `get_round_summaries` and page
+    through `get_round_data` instead of loading every log's data_json at once.
+    """
+    if not rb_name:
+        frappe.throw("rb_name is required")
+    rb, n, logs = _round_windows(rb_name)
+    rounds = _assign_rounds(rb, n, logs)
+    data = {}
+    if logs:
+        data = dict(frappe.db.get_all("Coffee Roasting Log", fields=["name", "data_json"],
+                                      filters={"roast_batch": rb_name}, as_list=True))
+    return {rn: [frappe._dict(name=row[0], log_name=row[1], timestamp=row[2], data_json=data.get(row[0]))
+                 for row in rows] for rn, rows in rounds.items()}
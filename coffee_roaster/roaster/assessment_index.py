@@ -0,0 +1,100 @@
+"""Latest Assessment Index: one row per Roast Batch pointing at its newest assessments.
+
+The Combined Assessment Report used to find "latest per roast_batch" with a
+GROUP BY / MAX(modified) subquery over each full assessment table on every run. The
+pointers are now kept current from the assessments' doc events, so the report is a
+single join over the (date-indexed) pointer rows it actually needs.
+"""
+
+from typing import Optional
+
+import frappe
+
+from coffee_roaster.roaster.report_cache import invalidate_after_commit
+
+INDEX = "Latest Assessment Index"
+# assessment doctype -> pointer field
+KINDS = {
+	"Descriptive Assessment": "descriptive_assessment",
+	"Extrinsic Assessment": "extrinsic_assessment",
+	"Physical Assessment": "physical_assessment",
+	"Affective Assessment": "affective_assessment",
+}
+
+
+def _latest(doctype: str, roast_batch: str, exclude: str | None = None) -> dict | None:
+	filters = {"roast_batch": roast_batch, "docstatus": ["<", 2]}
+	if exclude:
+		filters["name"] = ["!=", exclude]
+	fields = ["name", "roast_date"] if doctype == "Descriptive Assessment" else ["name"]
+	rows = frappe.get_all(doctype, filters=filters, fields=fields, order_by="modified desc", limit=1)
+	return rows[0] if rows else None
+
+
+def refresh(roast_batch: str, exclude: str | None = None):
+	"""Re-point one batch's row at its newest non-cancelled assessments (dropping `exclude`)."""
+	if not roast_batch:
+		return
+	values = {}
+	for doctype, field in KINDS.items():
+		row = _latest(doctype, roast_batch, exclude)
+		values[field] = row.name if row else None
+		if field == "descriptive_assessment":
+			values["roast_date"] = row.roast_date if row else None
+
+	if not any(values[f] for f in KINDS.values()):
+		frappe.db.delete(INDEX, {"name": roast_batch})
+	elif frappe.db.exists(INDEX, roast_batch):
+		frappe.db.set_value(INDEX, roast_batch, values, update_modified=False)
+	else:
+		frappe.get_doc({"doctype": INDEX, "roast_batch": roast_batch, **values}).insert(
+			ignore_permissions=True
+		)
+
+
+def on_assessment_change(doc, method=None):
+	"""doc_events hook for the four assessment doctypes (insert/update/submit/cancel/trash)."""
+	exclude = doc.name if method == "on_trash" else None
+	refresh(doc.get("roast_batch"), exclude)
+	before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+	if before and before.get("roast_batch") and before.get("roast_batch") != doc.get("roast_batch"):
+		refresh(before.get("roast_batch"))
+
+
+def rebuild():
+	"""Recreate every pointer row from the assessment tables (patch / manual repair)."""
+	latest = {}
+	for doctype, field in KINDS.items():
+		extra = ", t.roast_date" if doctype == "Descriptive Assessment" else ""
+		for r in frappe.db.sql(
+			f"""
+            SELECT t.roast_batch, t.name{extra}
+            FROM `tab{doctype}` t
+            JOIN (
+                SELECT roast_batch, MAX(modified) AS m
+                FROM `tab{doctype}`
+                WHERE docstatus < 2
+                GROUP BY roast_batch
+            ) x ON x.roast_batch = t.roast_batch AND x.m = t.modified
+            WHERE t.docstatus < 2
+        """,
+			as_dict=True,
+		):
+			row = latest.setdefault(r.roast_batch, {})
+			row[field] = r.name
+			if extra:
+				row["roast_date"] = r.roast_date
+
+	frappe.db.delete(INDEX)
+	user, now = frappe.session.user, frappe.utils.now_datetime()
+	fields = ["roast_date", *list(KINDS.values())]
+	frappe.db.bulk_insert(
+		INDEX,
+		["name", "owner", "modified_by", "creation", "modified", "docstatus", "idx", "roast_batch", *fields],
+		[
+			(rb, user, user, now, now, 0, 0, rb, *tuple(row.get(f) for f in fields))
+			for rb, row in latest.items()
+			if rb
+		],
+	)
+	invalidate_after_commit(INDEX)
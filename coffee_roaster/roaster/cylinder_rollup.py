@@ -0,0 +1,260 @@
+"""Roast Cylinder Daily: per-cylinder daily totals of submitted Roast Batch rounds.
+
+One row per (cylinder, roast date, machine, operator) with the G1/G2/G3 green, roasted,
+moisture-loss, quacker-loss and net-coffee split the Cylinder Tracking report shows.
+Submitting a Roast Batch adds its rounds to the rows it touches, cancelling takes them
+out again and an edit after submit moves them from the old values to the new ones (an
+atomic `+=` per row, so concurrent submits on one day don't race); `reconcile` rebuilds
+the table nightly from the source batches.
+
+The report and the dashboard endpoints below read it with date-range scans and roll
+days up to weeks or months in SQL.
+"""
+
+import hashlib
+import logging
+
+import frappe
+from frappe.utils import now_datetime
+
+from coffee_roaster.roaster.report_cache import invalidate_doctype
+
+DOCTYPE = "Roast Cylinder Daily"
+GRADES = ("G1", "G2", "G3")
+MEASURES = ("green", "roasted", "moisture_loss", "quacker_loss", "net_coffee")
+TOTALS = ("total_input", "total_output", "total_moisture_loss", "total_quacker_loss", "total_net_coffee")
+KEY_FIELDS = ("roast_cylinder", "roast_date", "roasting_machine", "operator")
+SUM_FIELDS = ("batches", "rounds", *tuple(f"{g.lower()}_{m}" for m in MEASURES for g in GRADES), *TOTALS)
+PERIODS = {
+	"Day": "cd.roast_date",
+	"Week": "DATE_SUB(cd.roast_date, INTERVAL WEEKDAY(cd.roast_date) DAY)",
+	"Month": "DATE_SUB(cd.roast_date, INTERVAL DAYOFMONTH(cd.roast_date) - 1 DAY)",
+}
+
+log = logging.getLogger(__name__)
+
+
+def _name(key: tuple) -> str:
+	"""Deterministic rollup_key (and row name), so increments of the same day meet on one row."""
+	return hashlib.sha1("|".join(str(k or "") for k in key).encode()).hexdigest()[:20]
+
+
+def _round_values(r) -> dict:
+	inp, out, quacker = (float(r.get(f) or 0) for f in ("input_qty", "output_qty", "quacker"))
+	return {
+		"green": inp,
+		"roasted": out,
+		"moisture_loss": inp - out,
+		"quacker_loss": quacker,
+		"net_coffee": out - quacker,
+	}
+
+
+def contributions(doc) -> dict:
+	"""{key: {sum field: value}} of one Roast Batch; a batch without rounds still counts once."""
+	out = {}
+	rounds = doc.get("rounds") or []
+	for r in rounds or [frappe._dict()]:
+		key = (
+			r.get("roast_cylinder") or doc.get("roast_cylinder"),
+			str(doc.get("roast_date") or ""),
+			doc.get("roasting_machine"),
+			doc.get("operator"),
+		)
+		row = out.setdefault(key, dict.fromkeys(SUM_FIELDS, 0))
+		row["batches"] = 1
+		if not rounds:
+			continue
+		row["rounds"] += 1
+		v = _round_values(r)
+		grade = (r.get("bean_group") or "").lower()
+		if grade in ("g1", "g2", "g3"):
+			for m in MEASURES:
+				row[f"{grade}_{m}"] += v[m]
+		row["total_input"] += v["green"]
+		row["total_output"] += v["roasted"]
+		row["total_moisture_loss"] += v["moisture_loss"]
+		row["total_quacker_loss"] += v["quacker_loss"]
+		row["total_net_coffee"] += v["net_coffee"]
+	return out
+
+
+def _apply(doc, sign: int):
+	"""Add (sign=1) or remove (sign=-1) one batch's contributions."""
+	if not doc.get("roast_date"):
+		return
+	user, now = frappe.session.user, now_datetime()
+	cols = (
+		"name",
+		"owner",
+		"modified_by",
+		"creation",
+		"modified",
+		"docstatus",
+		"idx",
+		"rollup_key",
+		*KEY_FIELDS,
+		*SUM_FIELDS,
+	)
+	sql = f"""
+        INSERT INTO `tab{DOCTYPE}` ({", ".join(f"`{c}`" for c in cols)})
+        VALUES ({", ".join(["%s"] * len(cols))})
+        ON DUPLICATE KEY UPDATE {", ".join(f"`{f}` = `{f}` + VALUES(`{f}`)" for f in SUM_FIELDS)},
+            `modified` = VALUES(`modified`)
+    """
+	names = []
+	for key, sums in contributions(doc).items():
+		names.append(_name(key))
+		frappe.db.sql(
+			sql,
+			(
+				names[-1],
+				user,
+				user,
+				now,
+				now,
+				0,
+				0,
+				names[-1],
+				*key,
+				*tuple(sign * sums[f] for f in SUM_FIELDS),
+			),
+		)
+	if sign < 0 and names:
+		frappe.db.delete(DOCTYPE, {"name": ["in", names], "batches": ["<=", 0]})
+
+
+# ---- doc events ----
+def on_roast_batch_submit(doc, method=None):
+	_apply(doc, 1)
+
+
+def on_roast_batch_cancel(doc, method=None):
+	_apply(doc, -1)
+
+
+def on_roast_batch_update_after_submit(doc, method=None):
+	"""Rounds, cylinder or date edited on a submitted batch: swap its old contributions for the new."""
+	before = doc.get_doc_before_save()
+	if before is None or contributions(before) == contributions(doc):
+		return
+	_apply(before, -1)
+	_apply(doc, 1)
+
+
+# ---- nightly reconcile ----
+def reconcile():
+	"""Rebuild every row from submitted Roast Batches."""
+	rows = {}
+	batches = frappe.get_all(
+		"Roast Batch",
+		filters={"docstatus": 1},
+		fields=["name", "roast_date", "roast_cylinder", "roasting_machine", "operator"],
+	)
+	by_name = {b.name: b for b in batches}
+	for b in batches:
+		b.rounds = []
+	if by_name:
+		for r in frappe.get_all(
+			"Roast Batch Round",
+			filters={"parent": ["in", list(by_name)], "parenttype": "Roast Batch"},
+			fields=["parent", "bean_group", "roast_cylinder", "input_qty", "output_qty", "quacker"],
+		):
+			by_name[r.parent].rounds.append(r)
+	for b in batches:
+		if not b.roast_date:
+			continue
+		for key, sums in contributions(b).items():
+			acc = rows.setdefault(key, dict.fromkeys(SUM_FIELDS, 0))
+			for f in SUM_FIELDS:
+				acc[f] += sums[f]
+
+	frappe.db.delete(DOCTYPE)
+	user, now = frappe.session.user, now_datetime()
+	frappe.db.bulk_insert(
+		DOCTYPE,
+		[
+			"name",
+			"owner",
+			"modified_by",
+			"creation",
+			"modified",
+			"docstatus",
+			"idx",
+			"rollup_key",
+			*list(KEY_FIELDS + SUM_FIELDS),
+		],
+		[
+			(_name(key), user, user, now, now, 0, 0, _name(key), *key, *tuple(sums[f] for f in SUM_FIELDS))
+			for key, sums in rows.items()
+		],
+	)
+	frappe.db.commit()
+	invalidate_doctype(DOCTYPE)
+	log.info(f"Cylinder rollups reconciled: {len(batches)} batches, {len(rows)} rows")
+
+
+# ---- reads ----
+def query(filters=None, period: str = "Day") -> list:
+	"""Rollup rows per cylinder and period start, filtered on date/cylinder/machine/operator."""
+	f = frappe._dict(filters or {})
+	if period not in PERIODS:
+		frappe.throw(f"Period must be one of {', '.join(PERIODS)}")
+	where, vals = ["1=1"], {}
+	if f.from_date:
+		where.append("cd.roast_date >= %(from_date)s")
+		vals["from_date"] = f.from_date
+	if f.to_date:
+		where.append("cd.roast_date <= %(to_date)s")
+		vals["to_date"] = f.to_date
+	for k in ("roast_cylinder", "roasting_machine", "operator"):
+		if f.get(k):
+			where.append(f"cd.{k} = %({k})s")
+			vals[k] = f.get(k)
+	return frappe.db.sql(
+		f"""
+        SELECT
+            cd.roast_cylinder,
+            {PERIODS[period]} AS period_start,
+            {", ".join(f"SUM(cd.{c}) AS {c}" for c in SUM_FIELDS)}
+        FROM `tab{DOCTYPE}` cd
+        WHERE {" AND ".join(where)}
+        GROUP BY cd.roast_cylinder, period_start
+        ORDER BY period_start DESC, cd.roast_cylinder
+    """,
+		vals,
+		as_dict=True,
+	)
+
+
+@frappe.whitelist()
+def get_cylinder_throughput(from_date=None, to_date=None, roast_cylinder=None, period="Week") -> list:
+	"""Throughput per cylinder and day/week/month, for dashboard charts."""
+	frappe.has_permission("Roast Batch", throw=True)
+	return query({"from_date": from_date, "to_date": to_date, "roast_cylinder": roast_cylinder}, period)
+
+
+@frappe.whitelist()
+def get_cylinder_wear() -> list:
+	"""Rounds and green kg per cylinder since its last service (and in total)."""
+	frappe.has_permission("Roast Batch", throw=True)
+	return frappe.db.sql(
+		f"""
+        SELECT
+            c.name AS roast_cylinder,
+            c.status,
+            c.capacity_kg,
+            c.last_service_date,
+            COALESCE(SUM(cd.rounds), 0) AS rounds_total,
+            COALESCE(SUM(cd.total_input), 0) AS kg_total,
+            COALESCE(SUM(CASE WHEN c.last_service_date IS NULL OR cd.roast_date >= c.last_service_date
+                              THEN cd.rounds END), 0) AS rounds_since_service,
+            COALESCE(SUM(CASE WHEN c.last_service_date IS NULL OR cd.roast_date >= c.last_service_date
+                              THEN cd.total_input END), 0) AS kg_since_service
+        FROM `tabRoast Cylinder` c
+        LEFT JOIN `tab{DOCTYPE}` cd ON cd.roast_cylinder = c.name
+        GROUP BY c.name, c.status, c.capacity_kg, c.last_service_date
+        ORDER BY kg_since_service DESC
+    """,
+		as_dict=True,
+	)
@@ -13,7 +13,8 @@ from coffee_roaster.roaster.machines.service import import_curve_into_log
 def import_roast_curve_from_attachment(name: str, adapter: str=None):
     files = frappe.get_all(
         "File",
-        filters={"attached_to_doctype": "Coffee Roasting Log", "attached_to_name": name},
+        filters={"attached_to_doctype": "Coffee Roasting Log", "attached_to_name": name,
+                 "file_name": ["not like", "%.rcz"]},
         fields=["file_url"],
         order_by="creation desc",
         limit=1
@@ -30,7 +31,8 @@ def import_roast_curve_from_attachment(name: str, adapter: str=None):
 @frappe.whitelist()
 def import_roast_curve_from_attachment(name: str, adapter: str=None):
     files = frappe.get_all("File",
-        filters={"attached_to_doctype": "Coffee Roasting Log", "attached_to_name": name},
+        filters={"attached_to_doctype": "Coffee Roasting Log", "attached_to_name": name,
+                 "file_name": ["not like", "%.rcz"]},
         fields=["file_url"], order_by="creation desc", limit=1
     )
     if not files:
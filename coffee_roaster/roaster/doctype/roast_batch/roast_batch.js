@@ -102,18 +102,15 @@ async function load_machine_data(frm) {
       return;
     }
     const { message } = await frappe.call({
-      method: 'coffee_roaster.coffee_roaster.api.get_round_machine_data',
+      method: 'coffee_roaster.roaster.api.get_round_summaries',
       args: { rb_name: frm.doc.name }
     });
-    // message: { 1: [logs], 2: [logs], ... }
+    // message: { 1: {logs, start, end, duration_s, metrics}, 2: {...}, ... }
     const rounds = frm.doc.rounds || [];
     rounds.forEach(r => {
-      const arr = message && message[r.round_no] ? message[r.round_no] : [];
-      if (!arr || !arr.length) return;
-      const firstTs = arr[0].timestamp;
-      const lastTs  = arr[arr.length - 1].timestamp;
-      const dur = (dayjs(lastTs).diff(dayjs(firstTs), 'second')) || 0;
-      r.notes = `Logs: ${arr.length}, start: ${firstTs || '-'}, end: ${lastTs || '-'}, duration: ${dur}s`;
+      const s = message && message[r.round_no];
+      if (!s || !s.logs) return;
+      r.notes = `Logs: ${s.logs}, start: ${s.start || '-'}, end: ${s.end || '-'}, duration: ${s.duration_s || 0}s`;
     });
     frm.refresh_field('rounds');
     frappe.show_alert({ message: __('Machine data summarized into Notes'), indicator: 'green' });
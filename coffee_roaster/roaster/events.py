@@ -1,35 +1,97 @@
 import re
+import json
 import frappe
-from frappe.utils import now_datetime, flt
+from frappe.utils import get_datetime, now_datetime, flt
+
+# Machine events are coalesced per batch instead of saving the Roast Batch on each one:
+# they are pushed to a Redis list, merged (first start / last finish per round) and
+# written in one UPDATE once COALESCE_WINDOW has passed, when the last round finishes,
+# or by the scheduler for batches that went quiet.
+COALESCE_WINDOW = 10      # seconds between Roast Batch writes for one batch
+PENDING_KEY = "roast_events:pending"
+
+
+def _queue_key(rb_name: str) -> str:
+    return f"roast_events:{rb_name}"
+
+
+def _since_key(rb_name: str) -> str:
+    return f"roast_events:{rb_name}:since"
+
 
 def on_machine_event(rb_name: str, round_no: int, state: str, ts: str):
     """Map machine events to Roast Batch timestamps without schema changes.
     state: 'start' or 'finish' (others ignored)
     """
-    if not (rb_name and state and ts):
+    if not (rb_name and state in ("start", "finish") and ts):
         return
-    try:
-        rb = frappe.get_doc("Roast Batch", rb_name)
-    except frappe.DoesNotExistError:
+    cache = frappe.cache()
+    cache.rpush(_queue_key(rb_name), json.dumps({"round_no": int(round_no or 0), "state": state, "ts": str(ts)}))
+    cache.sadd(PENDING_KEY, rb_name)
+    since = cache.get_value(_since_key(rb_name))
+    if not since:
+        cache.set_value(_since_key(rb_name), str(now_datetime()), expires_in_sec=3600)
+
+    final = state == "finish" and int(round_no or 0) == frappe.db.count(
+        "Roast Batch Round", {"parenttype": "Roast Batch", "parent": rb_name})
+    if final or (since and (now_datetime() - get_datetime(since)).total_seconds() >= COALESCE_WINDOW):
+        flush_machine_events(rb_name)
+
+
+def _merge(events) -> dict:
+    """round_no -> {"start": first start, "finish": last finish} for a burst of events."""
+    rounds = {}
+    for e in events:
+        ts = get_datetime(e["ts"])
+        r = rounds.setdefault(e["round_no"], {"start": None, "finish": None})
+        if e["state"] == "start" and (r["start"] is None or ts < r["start"]):
+            r["start"] = ts
+        elif e["state"] == "finish" and (r["finish"] is None or ts > r["finish"]):
+            r["finish"] = ts
+    return rounds
+
+
+def flush_machine_events(rb_name: str):
+    """Drain the batch's queued events and write the merged result in one UPDATE."""
+    cache = frappe.cache()
+    cache.delete_value(_since_key(rb_name))
+    cache.srem(PENDING_KEY, rb_name)
+    events = []
+    while True:  # LPOP per item is atomic, so concurrent flushers never drop an event
+        raw = cache.lpop(_queue_key(rb_name))
+        if raw is None:
+            break
+        events.append(json.loads(raw))
+    if not events:
         return
 
-    changed = False
-    n = len(rb.get("rounds") or [])
-
-    if state == "start":
-        if not rb.charge_start:
-            rb.charge_start = get_datetime(ts)
-            changed = True
+    current = frappe.db.get_value("Roast Batch", rb_name, ["charge_start", "development_end"], as_dict=True)
+    if not current:
+        return
+    rounds = _merge(events)
+    n = frappe.db.count("Roast Batch Round", {"parenttype": "Roast Batch", "parent": rb_name})
+
+    values = {}
+    starts = [r["start"] for r in rounds.values() if r["start"]]
+    if starts and not current.charge_start:
+        values["charge_start"] = min(starts)
+    # set Development End when the final round finishes
+    final = rounds.get(n) if n else None
+    if final and final["finish"] and not current.development_end:
+        values["development_end"] = final["finish"]
+    if values:
+        frappe.db.set_value("Roast Batch", rb_name, values, update_modified=False)
+        frappe.db.commit()
 
-    elif state == "finish":
-        # set Development End when the final round finishes
-        if n and round_no == n and not rb.development_end:
-            rb.development_end = get_datetime(ts)
-            changed = True
 
-    if changed:
-        rb.save(ignore_permissions=True)
-        frappe.db.commit()
+def flush_pending_machine_events():
+    """Scheduler job: write out batches whose events have sat longer than the window."""
+    cache = frappe.cache()
+    for rb_name in cache.smembers(PENDING_KEY) or []:
+        rb_name = frappe.safe_decode(rb_name)
+        since = cache.get_value(_since_key(rb_name))
+        if not since or (now_datetime() - get_datetime(since)).total_seconds() >= COALESCE_WINDOW:
+            flush_machine_events(rb_name)
 
 def _snake(s: str) -> str:
     return re.sub(r"\W+", "_", s).strip("_").lower()
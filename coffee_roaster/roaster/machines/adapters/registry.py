@@ -0,0 +1,175 @@
+"""Single-pass adapter detection from compiled header signatures.
+
+The upload head is analysed once (leading byte, first-line tokens, delimiter, JSON keys)
+and every registered signature is scored against that analysis, so no adapter is asked
+to trial-parse a truncated head. `classify` returns the winner with a confidence in
+[0, 1], a human-readable reason and the CSV delimiter the adapter should split on.
+"""
+
+import re
+from collections import namedtuple
+
+from . import artisan, cropster, probat
+
+Detection = namedtuple("Detection", ["name", "module", "confidence", "reason", "delimiter"], defaults=(None,))
+
+# a match below this is treated as a guess and reported as the default adapter
+MIN_CONFIDENCE = 0.15
+# header tokens every vendor format uses; they count for a quarter of a vendor-specific one
+SHARED_TOKENS = frozenset({"time", "event", "sec", "elapsed"})
+SHARED_WEIGHT = 0.25
+
+_SPLIT = re.compile(r"[,;\t]")
+_JSON_KEY = re.compile(r'"([^"\\]{1,64})"\s*:')
+
+
+class Signature:
+	def __init__(
+		self,
+		name,
+		module,
+		*,
+		extensions=(),
+		magic=(),
+		vendor=(),
+		header_tokens=(),
+		json_keys=(),
+		keywords=(),
+		delimiter=None,
+	):
+		self.name = name
+		self.module = module
+		self.extensions = tuple(e.lower() for e in extensions)
+		self.magic = tuple(magic)
+		self.vendor = re.compile("|".join(re.escape(v) for v in vendor)) if vendor else None
+		self.header_tokens = {
+			t.lower(): SHARED_WEIGHT if t.lower() in SHARED_TOKENS else 1.0 for t in header_tokens
+		}
+		self.header_weight = sum(self.header_tokens.values())
+		self.json_keys = frozenset(k.lower() for k in json_keys)
+		self.keywords = re.compile("|".join(re.escape(k) for k in keywords)) if keywords else None
+		self.delimiter = delimiter
+
+	def score(self, head: "Head"):
+		score, why = 0.0, []
+		if self.vendor:
+			if self.vendor.search(head.filename):
+				score += 0.5
+				why.append(f"filename names {self.name}")
+			elif self.vendor.search(head.text):
+				score += 0.4
+				why.append(f"head names {self.name}")
+		if head.ext and head.ext in self.extensions:
+			score += 0.1
+			why.append(f"extension {head.ext}")
+		if head.lead and head.lead in self.magic:
+			score += 0.1
+			why.append(f"starts with '{head.lead}'")
+		if self.header_tokens and head.tokens:
+			hit = self.header_tokens.keys() & head.tokens
+			if hit:
+				score += 0.4 * sum(self.header_tokens[t] for t in hit) / self.header_weight
+				why.append("header " + ",".join(sorted(hit)))
+		if self.json_keys and head.keys:
+			hit = self.json_keys & head.keys
+			if hit:
+				score += 0.4 * len(hit) / len(self.json_keys)
+				why.append("keys " + ",".join(sorted(hit)))
+		if self.delimiter and head.delimiter == self.delimiter:
+			score += 0.2
+			why.append(f"'{self.delimiter}' delimited")
+		if self.keywords and self.keywords.search(head.text):
+			score += 0.1
+			why.append("vendor keywords")
+		return min(score, 1.0), why
+
+
+class Head:
+	"""Everything the signatures look at, computed in one pass over the upload head."""
+
+	def __init__(self, filename: str, text: str):
+		self.filename = (filename or "").lower()
+		self.ext = self.filename.rsplit(".", 1)[-1] if "." in self.filename else ""
+		self.ext = f".{self.ext}" if self.ext else ""
+		self.text = (text or "").lower()
+		stripped = self.text.lstrip()
+		self.lead = stripped[:1]
+		self.keys = frozenset()
+		self.tokens = frozenset()
+		self.delimiter = None
+		if self.lead in ("{", "["):
+			self.keys = frozenset(_JSON_KEY.findall(stripped))
+		else:
+			first = stripped.split("\n", 1)[0]
+			self.delimiter = (
+				max((";", ",", "\t"), key=first.count) if any(c in first for c in ";,\t") else None
+			)
+			self.tokens = frozenset(t.strip().strip('"') for t in _SPLIT.split(first) if t.strip())
+
+
+SIGNATURES = [
+	Signature(
+		"artisan",
+		artisan,
+		extensions=(".alog", ".json", ".csv"),
+		magic=("{", "["),
+		vendor=("artisan",),
+		header_tokens=("time", "bt", "et", "ror", "event"),
+		json_keys=("time", "bt", "et", "ror", "event", "points"),
+		delimiter=",",
+	),
+	Signature(
+		"cropster",
+		cropster,
+		extensions=(".json", ".csv"),
+		magic=("{",),
+		vendor=("cropster",),
+		header_tokens=("time", "bean temp", "env temp", "rate of rise", "event", "event name"),
+		json_keys=("curve", "events", "bean_temp", "env_temp", "name"),
+		keywords=("first crack", "yellow"),
+	),
+	Signature(
+		"probat",
+		probat,
+		extensions=(".csv", ".txt"),
+		vendor=("probat",),
+		header_tokens=(
+			"time",
+			"beantemp",
+			"bean temperature",
+			"exhausttemp",
+			"environmental",
+			"rateofrise",
+			"marker",
+		),
+		delimiter=";",
+	),
+]
+
+BY_NAME = {s.name: s for s in SIGNATURES}
+
+
+def classify(filename: str, head_text: str, requested: str | None = None) -> Detection:
+	"""Score every signature against one analysis of the head and return the best match.
+
+	A `requested` adapter name skips the scoring but still picks up the head's delimiter.
+	"""
+	head = Head(filename, head_text)
+	if requested in BY_NAME:
+		sig = BY_NAME[requested]
+		return Detection(sig.name, sig.module, 1.0, "requested", head.delimiter)
+	best, best_score, best_why = SIGNATURES[0], -1.0, []
+	for sig in SIGNATURES:
+		score, why = sig.score(head)
+		if score > best_score:
+			best, best_score, best_why = sig, score, why
+	if best_score < MIN_CONFIDENCE:
+		sig = SIGNATURES[0]
+		return Detection(
+			sig.name,
+			sig.module,
+			round(max(best_score, 0.0), 2),
+			"no signature matched; default",
+			head.delimiter,
+		)
+	return Detection(best.name, best.module, round(best_score, 2), "; ".join(best_why), head.delimiter)
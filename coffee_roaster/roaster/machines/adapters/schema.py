@@ -0,0 +1,228 @@
+"""Per-file schema inference shared by the curve adapters.
+
+A file's header (CSV) or first point (JSON) is resolved once against the vendor's alias
+table into an `Extractor`: fixed column indices / keys, a temperature converter (°F or
+°C, from the header units or the median of the leading readings) and a time parser
+(mm:ss or seconds, from the first time value). The row loop then does no key scanning.
+"""
+
+import re
+from itertools import chain
+
+# field -> header aliases, matched case-insensitively after units are stripped
+ALIASES = {
+	"artisan": {
+		"t": ["time", "sec", "t", "elapsed", "time (s)", "time(s)"],
+		"bt": ["bt", "bean", "bean temp", "bean_temp", "bean temperature"],
+		"et": ["et", "env", "environment", "env temp", "exhaust"],
+		"ror": ["ror", "rate of rise", "rate_of_rise"],
+		"event": ["event", "flag", "mark"],
+	},
+	"cropster": {
+		"t": ["time", "sec", "elapsed"],
+		"bt": ["bean temp", "bt", "bean_temp"],
+		"et": ["env temp", "et", "environment"],
+		"ror": ["rate of rise", "ror"],
+		"event": ["event", "event name"],
+	},
+	"probat": {
+		"t": ["time"],
+		"bt": ["beantemp", "bean temperature", "bt"],
+		"et": ["exhausttemp", "environmental", "et"],
+		"ror": ["ror", "rateofrise"],
+		"event": ["event", "marker"],
+	},
+}
+
+# field -> JSON keys (exact, case-sensitive as the vendors write them)
+JSON_KEYS = {
+	"artisan": {
+		"t": ["time", "t", "sec"],
+		"bt": ["BT", "bean", "bean_temp"],
+		"et": ["ET", "env", "environment"],
+		"ror": ["RoR", "ror"],
+		"event": ["event"],
+	},
+	"cropster": {
+		"t": ["t", "time"],
+		"bt": ["bt", "bean_temp"],
+		"et": ["et", "env_temp"],
+		"ror": ["ror"],
+	},
+}
+
+# readings above this cannot be °C for a coffee roast
+FAHRENHEIT_ABOVE = 300.0
+# leading BT/ET readings (each) whose median decides the units when the header names none
+UNIT_SAMPLE = 5
+UNIT_ROWS = 50  # rows buffered at most while looking for them
+
+_UNIT = re.compile(r"\s*[\(\[]\s*(°?\s*[cf]|deg\s*[cf]|s|sec|mm:ss)\s*[\)\]]\s*$")
+_FAHRENHEIT = re.compile(r"°\s*f\b|\bdeg\s*f\b|fahrenheit|[\(\[]\s*f\s*[\)\]]")
+
+
+def _flt(x):
+	try:
+		return float(str(x).strip())
+	except Exception:
+		return None
+
+
+def _f_to_c(v):
+	return None if v is None else round((v - 32.0) * 5.0 / 9.0, 2)
+
+
+def _f_rate_to_c(v):
+	return None if v is None else round(v * 5.0 / 9.0, 2)
+
+
+def _sec_plain(v):
+	try:
+		return int(float(v))
+	except Exception:
+		return _sec_any(v)
+
+
+def _sec_mmss(v):
+	try:
+		mm, ss = v.split(":")[-2:]
+		return int(mm) * 60 + int(ss)
+	except Exception:
+		return _sec_any(v)
+
+
+def _sec_any(v):
+	if v is None:
+		return None
+	s = str(v).strip()
+	if ":" in s:
+		mm, ss = s.split(":")[-2:]
+		try:
+			return int(float(mm)) * 60 + int(float(ss))
+		except Exception:
+			return None
+	try:
+		return int(float(s))
+	except Exception:
+		return None
+
+
+def _normalize(cell):
+	name = (cell or "").strip().lower()
+	unit = _UNIT.search(name)
+	return (name[: unit.start()] if unit else name).strip()
+
+
+class Extractor:
+	"""Compiled mapping from raw rows to curve points for one file."""
+
+	def __init__(self, idx, fahrenheit=None, vendor=None):
+		self.idx = idx  # field -> column index / JSON key (None if absent)
+		self.fahrenheit = fahrenheit  # None = decide from the leading readings
+		self.vendor = vendor  # for JSON keys compiled on the first point
+		self.sec = None
+
+	def _decide_units(self, rows):
+		"""Buffer the leading rows until the units can be told apart; returns them for replay.
+
+		The median of the first UNIT_SAMPLE BT and ET readings decides °F vs °C, so one hot
+		charge reading or a sensor glitch cannot flip the whole curve.
+		"""
+		head, temps = [], []
+		for row in rows:
+			head.append(row)
+			temps.extend(v for v in row[1:3] if v is not None)
+			if len(temps) >= 2 * UNIT_SAMPLE or len(head) >= UNIT_ROWS:
+				break
+		temps.sort()
+		self.fahrenheit = bool(temps) and temps[len(temps) // 2] > FAHRENHEIT_ABOVE
+		return head
+
+	def _items(self, rows):
+		"""Yield ("point", p) / ("event", e) from (t_raw, bt, et, ror, event) tuples."""
+		rows = iter(rows)
+		if self.fahrenheit is None:
+			rows = chain(self._decide_units(rows), rows)
+		for t_raw, bt, et, ror, name in rows:
+			if self.sec is None:
+				self.sec = _sec_mmss if (isinstance(t_raw, str) and ":" in t_raw) else _sec_plain
+			if self.fahrenheit:
+				bt, et, ror = _f_to_c(bt), _f_to_c(et), _f_rate_to_c(ror)
+			ts = self.sec(t_raw) if t_raw is not None else None
+			yield "point", {"t": ts, "bt": bt, "et": et, "ror": ror}
+			if name:
+				yield "event", {"type": str(name), "t": ts, "temp": bt}
+
+	def csv_items(self, reader):
+		"""Yield ("point", p) / ("event", e) for CSV rows."""
+		yield from self._items(self._csv_rows(reader))
+
+	def _csv_rows(self, reader):
+		it, ib, ie, ir, iv = (self.idx.get(k) for k in ("t", "bt", "et", "ror", "event"))
+		for r in reader:
+			if not r:
+				continue
+			n = len(r)
+			yield (
+				r[it] if it is not None and it < n else None,
+				_flt(r[ib]) if ib is not None and ib < n else None,
+				_flt(r[ie]) if ie is not None and ie < n else None,
+				_flt(r[ir]) if ir is not None and ir < n else None,
+				r[iv] if iv is not None and iv < n else None,
+			)
+
+	def json_items(self, items):
+		"""Yield ("point", p) / ("event", e) for JSON point dicts; keys resolve on the first point."""
+		yield from self._items(self._json_rows(items))
+
+	def _json_rows(self, items):
+		keys = None
+		for p in items:
+			if not isinstance(p, dict):
+				continue
+			if keys is None:
+				if self.idx is None:
+					self.idx = compile_keys(p, self.vendor).idx
+				keys = kt, kb, ke, kr, kv = tuple(self.idx.get(k) for k in ("t", "bt", "et", "ror", "event"))
+			yield (
+				p.get(kt) if kt else None,
+				_flt(p.get(kb)) if kb else None,
+				_flt(p.get(ke)) if ke else None,
+				_flt(p.get(kr)) if kr else None,
+				p.get(kv) if kv else None,
+			)
+
+
+def compile_header(header, vendor: str) -> Extractor:
+	"""Resolve a CSV header once against `vendor`'s alias table."""
+	names = [_normalize(h) for h in header]
+	idx = {}
+	for field, aliases in ALIASES[vendor].items():
+		idx[field] = next((names.index(a) for a in aliases if a in names), None)
+	fahrenheit = None
+	for field in ("bt", "et"):
+		i = idx.get(field)
+		if i is not None:
+			raw = (header[i] or "").lower()
+			if _FAHRENHEIT.search(raw):
+				fahrenheit = True
+			elif re.search(r"°\s*c\b|\bdeg\s*c\b|celsius|[\(\[]\s*c\s*[\)\]]", raw):
+				fahrenheit = False
+	return Extractor(idx, fahrenheit)
+
+
+def compile_keys(sample: dict, vendor: str) -> Extractor:
+	"""Resolve JSON point keys once from a sample point.
+
+	Fields absent from the sample (an "event" only on marked points) fall back to their
+	first alias, so sparse keys are still picked up later in the file.
+	"""
+	idx = {
+		field: next((k for k in keys if k in sample), keys[0]) for field, keys in JSON_KEYS[vendor].items()
+	}
+	return Extractor(idx)
+
+
+def json_extractor(vendor: str) -> Extractor:
+	"""An extractor whose keys are compiled lazily from the first JSON point it sees."""
+	return Extractor(None, vendor=vendor)
@@ -0,0 +1,200 @@
+"""Chunked readers shared by the curve adapters.
+
+Adapters expose `iter_parse(fp, filename)` on top of these helpers so a curve can be
+walked point by point while only one chunk of the file is held in memory.
+"""
+
+import csv
+import io
+import json
+import mmap
+import os
+from contextlib import contextmanager
+
+from ..curve import RoastCurve
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+class MappedReader(io.RawIOBase):
+	"""Raw reader over a memory map (or any buffer): `readinto` copies straight out of the map."""
+
+	def __init__(self, buf):
+		self.view = memoryview(buf)
+		self.pos = 0
+
+	def readable(self):
+		return True
+
+	def readinto(self, b):
+		n = min(len(b), len(self.view) - self.pos)
+		b[:n] = self.view[self.pos : self.pos + n]
+		self.pos += n
+		return n
+
+	def close(self):
+		# drop the export so the map can be closed by its owner
+		self.view.release()
+		super().close()
+
+
+def open_text(fp):
+	"""Wrap a binary file-like object as utf-8 text (undecodable bytes are dropped)."""
+	if not hasattr(fp, "read1"):
+		fp = io.BufferedReader(fp, CHUNK_SIZE)
+	return io.TextIOWrapper(fp, encoding="utf-8", errors="ignore", newline="")
+
+
+class Scanner:
+	"""Incremental JSON tokenizer over a text stream.
+
+	Only the current chunk (plus one partially decoded value) is buffered, so arrays
+	of any length can be walked item by item.
+	"""
+
+	def __init__(self, fp, chunk_size=CHUNK_SIZE):
+		self.fp = fp
+		self.chunk_size = chunk_size
+		self.buf = ""
+		self.pos = 0
+		self.eof = False
+
+	def _fill(self) -> bool:
+		if self.eof:
+			return False
+		chunk = self.fp.read(self.chunk_size)
+		if not chunk:
+			self.eof = True
+			return False
+		self.buf = self.buf[self.pos :] + chunk
+		self.pos = 0
+		return True
+
+	def peek(self) -> str:
+		"""Next non-whitespace character without consuming it ('' at EOF)."""
+		while True:
+			while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+				self.pos += 1
+			if self.pos < len(self.buf):
+				return self.buf[self.pos]
+			if not self._fill():
+				return ""
+
+	def expect(self, ch: str):
+		if self.peek() != ch:
+			raise ValueError(f"Expected '{ch}' at offset {self.pos}")
+		self.pos += 1
+
+	def value(self):
+		"""Decode one complete JSON value."""
+		self.peek()
+		while True:
+			try:
+				val, end = _decoder.raw_decode(self.buf, self.pos)
+				# a number at the very end of the buffer may still be truncated
+				if end < len(self.buf) or self.eof:
+					self.pos = end
+					return val
+			except json.JSONDecodeError:
+				if self.eof:
+					raise
+			if not self._fill():
+				val, self.pos = _decoder.raw_decode(self.buf, self.pos)
+				return val
+
+	def skip(self):
+		"""Consume one value; containers are walked instead of being decoded whole."""
+		c = self.peek()
+		if c == "[":
+			for _ in self.items(decode=False):
+				pass
+		elif c == "{":
+			for _ in self.members():
+				self.skip()
+		else:
+			self.value()
+
+	def items(self, decode=True):
+		"""Yield the elements of the array at the cursor."""
+		self.expect("[")
+		if self.peek() == "]":
+			self.pos += 1
+			return
+		while True:
+			if decode:
+				yield self.value()
+			else:
+				self.skip()
+				yield None
+			c = self.peek()
+			self.pos += 1
+			if c == "]":
+				return
+			if c != ",":
+				raise ValueError(f"Expected ',' or ']' at offset {self.pos}")
+
+	def members(self):
+		"""Yield the keys of the object at the cursor; the caller must consume each value."""
+		self.expect("{")
+		if self.peek() == "}":
+			self.pos += 1
+			return
+		while True:
+			key = self.value()
+			self.expect(":")
+			yield key
+			c = self.peek()
+			self.pos += 1
+			if c == "}":
+				return
+			if c != ",":
+				raise ValueError(f"Expected ',' or '}}' at offset {self.pos}")
+
+	def lines(self):
+		"""Yield the remaining text line by line (line endings kept, for csv.reader)."""
+		pending = self.buf[self.pos :]
+		self.buf, self.pos = "", 0
+		while True:
+			cut = pending.rfind("\n") + 1
+			if cut:
+				yield from io.StringIO(pending[:cut])
+				pending = pending[cut:]
+			if self.eof:
+				break
+			chunk = self.fp.read(self.chunk_size)
+			if not chunk:
+				self.eof = True
+			pending += chunk
+		if pending:
+			yield pending
+
+
+@contextmanager
+def map_file(path):
+	"""Yield (head bytes view, binary reader) over a memory-mapped file; nothing is read up front."""
+	with open(path, "rb") as f:
+		if not os.fstat(f.fileno()).st_size:
+			yield b"", io.BytesIO(b"")
+			return
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+			reader = MappedReader(mm)
+			head = reader.view[:1024]
+			try:
+				yield head, io.BufferedReader(reader, CHUNK_SIZE)
+			finally:
+				head.release()
+				reader.close()
+
+
+def csv_dicts(scanner: Scanner, delimiter=","):
+	"""Return (header, row iterator) for CSV text at the scanner cursor."""
+	reader = csv.reader(scanner.lines(), delimiter=delimiter)
+	header = next(reader, None) or []
+	return header, reader
+
+
+def collect(items) -> dict:
+	"""Materialize an `iter_parse` generator as a RoastCurve in the {"points", "events"} dict shape."""
+	return RoastCurve.from_items(items).as_dict()
@@ -0,0 +1,122 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import io
+import json
+import unittest
+
+from coffee_roaster.roaster.machines.adapters import artisan, cropster, probat, stream
+
+
+def _scanner(text, chunk_size=7):
+	return stream.Scanner(io.StringIO(text), chunk_size=chunk_size)
+
+
+def _parse(module, text, filename="roast"):
+	items = list(module.iter_parse(io.BytesIO(text.encode()), filename))
+	return [p for kind, p in items if kind == "point"], [e for kind, e in items if kind == "event"]
+
+
+class TestScanner(unittest.TestCase):
+	def test_items_across_chunk_boundaries(self):
+		data = [{"t": i, "bt": 180.25 + i, "label": "x" * (i % 9)} for i in range(40)]
+		self.assertEqual(list(_scanner(json.dumps(data)).items()), data)
+
+	def test_numbers_split_by_a_chunk_are_not_truncated(self):
+		self.assertEqual(list(_scanner("[1234567, 89.0125]", chunk_size=3).items()), [1234567, 89.0125])
+
+	def test_members_and_skip(self):
+		sc = _scanner('{"meta": {"a": [1, {"b": 2}]}, "skip": [[1], [2]], "points": [1, 2], "z": "}"}')
+		seen = {}
+		for key in sc.members():
+			if key == "points":
+				seen[key] = list(sc.items())
+			else:
+				sc.skip()
+				seen[key] = None
+		self.assertEqual(seen, {"meta": None, "skip": None, "points": [1, 2], "z": None})
+		self.assertEqual(sc.peek(), "")
+
+	def test_empty_containers(self):
+		self.assertEqual(list(_scanner("[ ]").items()), [])
+		self.assertEqual(list(_scanner("{}").members()), [])
+
+	def test_malformed_array(self):
+		with self.assertRaises(ValueError):
+			list(_scanner("[1 2]").items())
+
+	def test_lines_keep_endings_and_the_unterminated_tail(self):
+		sc = _scanner("a,b\r\n1,2\n3,4", chunk_size=4)
+		self.assertEqual(list(sc.lines()), ["a,b\r\n", "1,2\n", "3,4"])
+
+
+class TestArtisan(unittest.TestCase):
+	def test_json_points(self):
+		points, events = _parse(
+			artisan,
+			json.dumps(
+				{
+					"title": "x",
+					"points": [{"time": 0, "BT": 180, "ET": 230}, {"time": 60, "BT": 150, "event": "TP"}],
+				}
+			),
+		)
+		self.assertEqual([(p["t"], p["bt"], p["et"]) for p in points], [(0, 180.0, 230.0), (60, 150.0, None)])
+		self.assertEqual([(e["type"], e["t"]) for e in events], [("TP", 60)])
+
+	def test_json_list(self):
+		points, _ = _parse(artisan, '[{"time": "01:05", "BT": 150}]')
+		self.assertEqual(points[0]["t"], 65)
+
+	def test_csv(self):
+		points, events = _parse(artisan, "Time,BT,ET,RoR,Event\n0,180,230,,Charge\n00:30,120,225,-40,\n")
+		self.assertEqual([p["t"] for p in points], [0, 30])
+		self.assertEqual(points[1]["ror"], -40.0)
+		self.assertEqual([(e["type"], e["t"], e["temp"]) for e in events], [("Charge", 0, 180.0)])
+
+
+class TestCropster(unittest.TestCase):
+	def test_json_curve_and_events(self):
+		doc = {
+			"curve": [{"t": 0, "bean_temp": 200, "env_temp": 240}, {"t": 1, "bean_temp": 190}],
+			"events": [{"name": "First crack", "time": "08:10", "temp": 196}],
+		}
+		points, events = _parse(cropster, json.dumps(doc))
+		self.assertEqual([(p["t"], p["bt"]) for p in points], [(0, 200.0), (1, 190.0)])
+		self.assertEqual(events, [{"type": "First crack", "t": 490, "temp": 196.0}])
+
+	def test_csv(self):
+		points, _ = _parse(
+			cropster, "Time,Bean temp,Env temp,Rate of rise,Event\n00:00,200,240,,\n00:01,199,240,-60,\n"
+		)
+		self.assertEqual([(p["t"], p["bt"], p["et"], p["ror"]) for p in points][1], (1, 199.0, 240.0, -60.0))
+
+
+class TestProbat(unittest.TestCase):
+	def test_semicolon_csv(self):
+		points, events = _parse(
+			probat, "Time;BeanTemp;ExhaustTemp;RateOfRise;Marker\n0;200;240;;\n5;190;238;-120;Charge\n"
+		)
+		self.assertEqual([(p["t"], p["bt"], p["et"]) for p in points], [(0, 200.0, 240.0), (5, 190.0, 238.0)])
+		self.assertEqual([e["type"] for e in events], ["Charge"])
+
+
+class TestUnits(unittest.TestCase):
+	def test_fahrenheit_from_the_leading_readings(self):
+		rows = "".join(f"{t},{400 - t},{450}\n" for t in range(20))
+		points, _ = _parse(artisan, "Time,BT,ET\n" + rows)
+		self.assertAlmostEqual(points[0]["bt"], 204.44, places=2)
+
+	def test_one_hot_reading_does_not_flip_celsius(self):
+		rows = "0,999,230\n" + "".join(f"{t},{200 - t},230\n" for t in range(1, 20))
+		points, _ = _parse(artisan, "Time,BT,ET\n" + rows)
+		self.assertEqual(points[0]["bt"], 999.0)
+		self.assertEqual(points[1]["bt"], 199.0)
+
+	def test_header_unit_wins(self):
+		points, _ = _parse(artisan, "Time,BT (°F),ET (°F)\n0,212,212\n")
+		self.assertEqual((points[0]["bt"], points[0]["et"]), (100.0, 100.0))
+
+	def test_short_files_still_decide(self):
+		points, _ = _parse(cropster, '{"curve": [{"t": 0, "bean_temp": 410}]}')
+		self.assertAlmostEqual(points[0]["bt"], 210.0, places=2)
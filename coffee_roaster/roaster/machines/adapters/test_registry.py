@@ -0,0 +1,55 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import io
+import unittest
+
+from coffee_roaster.roaster.machines.adapters import registry
+from coffee_roaster.roaster.machines.curve import RoastCurve
+
+
+class TestClassify(unittest.TestCase):
+	def assertDetects(self, filename, head, name, delimiter=None):
+		found = registry.classify(filename, head)
+		self.assertEqual(found.name, name, found.reason)
+		self.assertEqual(found.delimiter, delimiter)
+		self.assertGreaterEqual(found.confidence, registry.MIN_CONFIDENCE)
+
+	def test_artisan(self):
+		self.assertDetects("roast.csv", "Time,BT,ET,Event\n0,180,220,\n", "artisan", ",")
+		self.assertDetects("roast.alog", '{"points": [{"time": 0, "BT": 180}]}', "artisan")
+
+	def test_cropster_csv_without_vendor_in_filename(self):
+		head = "Time,Bean temp,Env temp,Rate of rise,Event\n00:00,180,220,,\n"
+		self.assertDetects("export.csv", head, "cropster", ",")
+
+	def test_cropster_json(self):
+		self.assertDetects("export.json", '{"curve": [{"t": 0, "bean_temp": 180}], "events": []}', "cropster")
+
+	def test_probat(self):
+		head = "Time;BeanTemp;ExhaustTemp;RateOfRise;Marker\n0;180;220;;\n"
+		self.assertDetects("pilot.csv", head, "probat", ";")
+
+	def test_vendor_name_wins(self):
+		self.assertDetects("probat_batch_12.csv", "Time,BT,ET\n", "probat", ",")
+
+	def test_unknown_head_falls_back_to_default(self):
+		found = registry.classify("", "hello")
+		self.assertEqual(found.name, registry.SIGNATURES[0].name)
+		self.assertEqual(found.reason, "no signature matched; default")
+
+	def test_requested_adapter_keeps_head_delimiter(self):
+		found = registry.classify("roast.csv", "Time;BT;ET\n", requested="artisan")
+		self.assertEqual((found.name, found.confidence, found.delimiter), ("artisan", 1.0, ";"))
+
+
+class TestDelimiterReachesParser(unittest.TestCase):
+	def test_semicolon_csv(self):
+		body = b"Time;BT;ET;Event\n0;180;220;\n1;181;221;Charge\n"
+		detected = registry.classify("roast.csv", body.decode())
+		self.assertEqual(detected.delimiter, ";")
+		curve = RoastCurve.from_items(
+			detected.module.iter_parse(io.BytesIO(body), "roast.csv", detected.delimiter)
+		)
+		self.assertEqual([p["bt"] for p in curve], [180.0, 181.0])
+		self.assertEqual([e["type"] for e in curve.events], ["Charge"])
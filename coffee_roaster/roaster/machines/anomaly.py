@@ -0,0 +1,322 @@
+"""Rolling-window anomaly detection over roast telemetry.
+
+One `Detector` consumes frames ({"t", "bt", "et", "ror"}) in time order and keeps only
+fixed-size windows (deques plus running sums), so each frame costs O(window) at most.
+The same class runs in batch mode over a stored curve / telemetry history (`scan`) and
+incrementally while a roast streams in (`feed_live`, called from live.py).
+
+Warnings:
+  scorching    ET - BT above the profile's limit, or a RoR spike (rolling z-score)
+  baking       RoR held under the floor with too little ET - BT drive before first crack
+  stalled_ror  the RoR slope turns from falling to flat/rising while RoR is low
+"""
+
+import math
+from collections import deque
+from typing import Optional
+
+import frappe
+
+from .curve import MISSING_T, RoastCurve
+
+WINDOW = 30  # seconds of history behind RoR, slope and z-score
+WARMUP = 90  # seconds after charge before anything is judged (turning point noise)
+DELTA_FROM_BT = 120.0  # °C BT before ET - BT is judged; the post-charge gap is always wide
+Z_LIMIT = 3.0  # |z| of RoR against its rolling window that counts as a spike
+SPIKE_MIN_ROR = 15.0  # °C/min, spikes below this are not scorching
+SLOPE_EPS = 0.5  # °C/min per minute of fall that arms the stall detector
+PERSIST = 10  # seconds a delta / RoR condition must hold
+BAKE_SECONDS = 60  # seconds of low RoR + low drive that count as baking
+COOLDOWN = 60  # seconds before the same warning is raised again
+STATE_TTL = 6 * 3600
+
+# limits used when the Roast Profile leaves a field empty
+DEFAULT_LIMITS = {
+	"max_et_bt_delta": 120.0,  # °C
+	"min_et_bt_delta": 15.0,  # °C
+	"min_ror": 3.0,  # °C/min
+}
+PROFILE_FIELDS = tuple(DEFAULT_LIMITS)
+
+
+def profile_limits(profile: str | None = None) -> dict:
+	"""Per-profile limits, falling back to DEFAULT_LIMITS field by field."""
+	limits = dict(DEFAULT_LIMITS)
+	if profile:
+		row = frappe.db.get_value("Roast Profile", profile, list(PROFILE_FIELDS), as_dict=True) or {}
+		limits.update({k: float(v) for k, v in row.items() if v})
+	return limits
+
+
+class Detector:
+	__slots__ = (
+		"bt_hist",
+		"first_crack",
+		"flat_since",
+		"last_alert",
+		"limits",
+		"low_since",
+		"over_since",
+		"prev_slope",
+		"ror_hist",
+		"ror_sq",
+		"ror_sum",
+		"start",
+	)
+
+	def __init__(self, limits: dict | None = None):
+		self.limits = limits or dict(DEFAULT_LIMITS)
+		self.start = None  # t of the first frame
+		self.bt_hist = deque()  # (t, bt) within WINDOW, for RoR when the frame has none
+		self.ror_hist = deque()  # (t, ror) within WINDOW
+		self.ror_sum = 0.0
+		self.ror_sq = 0.0
+		self.prev_slope = None  # last clearly falling slope; armed until a flat/rising one
+		self.flat_since = None  # t at which the armed slope went flat
+		self.over_since = None  # t at which ET - BT went over the limit
+		self.low_since = None  # t at which RoR / drive went low
+		self.first_crack = False
+		self.last_alert = {}  # kind -> t
+
+	# ---- persistence (deques as lists, for the cache) ----
+	def to_dict(self) -> dict:
+		d = {k: getattr(self, k) for k in self.__slots__}
+		d["bt_hist"], d["ror_hist"] = list(self.bt_hist), list(self.ror_hist)
+		return d
+
+	@classmethod
+	def from_dict(cls, d: dict) -> "Detector":
+		det = cls(d.get("limits"))
+		for k in cls.__slots__:
+			if k in d and k != "limits":
+				setattr(det, k, d[k])
+		det.bt_hist = deque(tuple(x) for x in det.bt_hist)
+		det.ror_hist = deque(tuple(x) for x in det.ror_hist)
+		return det
+
+	# ---- windows ----
+	def _ror(self, t: int, bt: float, ror: float | None) -> float | None:
+		self.bt_hist.append((t, bt))
+		while self.bt_hist[0][0] < t - WINDOW:
+			self.bt_hist.popleft()
+		if ror is not None:
+			return ror
+		t0, bt0 = self.bt_hist[0]
+		return (bt - bt0) * 60.0 / (t - t0) if t > t0 else None
+
+	def _push_ror(self, t: int, r: float):
+		self.ror_hist.append((t, r))
+		self.ror_sum += r
+		self.ror_sq += r * r
+		while self.ror_hist[0][0] < t - WINDOW:
+			_, old = self.ror_hist.popleft()
+			self.ror_sum -= old
+			self.ror_sq -= old * old
+
+	def _zscore(self, r: float) -> float | None:
+		n = len(self.ror_hist)
+		if n < 5:
+			return None
+		mean = self.ror_sum / n
+		var = max(self.ror_sq / n - mean * mean, 0.0)
+		return (r - mean) / math.sqrt(var) if var > 1e-6 else None
+
+	def _slope(self) -> float | None:
+		"""RoR change per minute across the window: mean of the newer half minus the older."""
+		n = len(self.ror_hist)
+		if n < 6:
+			return None
+		half = n // 2
+		old = [r for _, r in list(self.ror_hist)[:half]]
+		new = [r for _, r in list(self.ror_hist)[half:]]
+		dt = (self.ror_hist[-1][0] - self.ror_hist[0][0]) / 2.0
+		return (sum(new) / len(new) - sum(old) / len(old)) * 60.0 / dt if dt > 0 else None
+
+	def _alert(self, kind: str, t: int, detail: str, out: list, **values):
+		last = self.last_alert.get(kind)
+		if last is not None and t - last < COOLDOWN:
+			return
+		self.last_alert[kind] = t
+		out.append({"kind": kind, "t": t, "detail": detail, **values})
+
+	# ---- per frame ----
+	def feed(self, frame: dict) -> list:
+		"""Advance by one frame; returns the warnings it raised."""
+		out = []
+		t, bt = frame.get("t"), frame.get("bt")
+		if t is None or bt in (None, ""):
+			return out
+		t, bt = int(float(t)), float(bt)
+		et = frame.get("et")
+		et = float(et) if et not in (None, "") else None
+		ror = frame.get("ror")
+		ror = float(ror) if ror not in (None, "") and ror == ror else None
+		ev = str(frame.get("event") or "").lower()
+		if "crack" in ev or "fcs" in ev:
+			self.first_crack = True
+		if self.start is None:
+			self.start = t
+
+		r = self._ror(t, bt, ror)
+		if r is None or t - self.start < WARMUP:
+			return out
+		z = self._zscore(r)
+		self._push_ror(t, r)
+		lim = self.limits
+
+		# scorching: too much drive, or a sudden RoR spike
+		delta = et - bt if et is not None else None
+		if delta is not None and bt >= DELTA_FROM_BT and delta > lim["max_et_bt_delta"]:
+			self.over_since = t if self.over_since is None else self.over_since
+			if t - self.over_since >= PERSIST:
+				self._alert(
+					"scorching",
+					t,
+					f"ET - BT {delta:.0f} °C above {lim['max_et_bt_delta']:.0f} °C",
+					out,
+					et_bt_delta=round(delta, 1),
+				)
+		else:
+			self.over_since = None
+		if z is not None and z > Z_LIMIT and r >= SPIKE_MIN_ROR:
+			self._alert(
+				"scorching", t, f"RoR spike {r:.1f} °C/min (z={z:.1f})", out, ror=round(r, 1), z=round(z, 1)
+			)
+
+		# baking: RoR under the floor with little drive, before first crack
+		low = r < lim["min_ror"] and (delta is None or delta < lim["min_et_bt_delta"])
+		if low and not self.first_crack:
+			self.low_since = t if self.low_since is None else self.low_since
+			if t - self.low_since >= BAKE_SECONDS:
+				self._alert(
+					"baking", t, f"RoR {r:.1f} °C/min for {t - self.low_since}s", out, ror=round(r, 1)
+				)
+		else:
+			self.low_since = None
+
+		# stalled RoR: before first crack the slope turns from falling to flat/rising (held for
+		# PERSIST seconds) while RoR is low
+		slope = self._slope()
+		if slope is not None:
+			if slope < -SLOPE_EPS:
+				self.prev_slope, self.flat_since = slope, None
+			elif (
+				self.prev_slope is not None and slope >= 0 and not self.first_crack and r < lim["min_ror"] * 2
+			):
+				self.flat_since = t if self.flat_since is None else self.flat_since
+				if t - self.flat_since >= PERSIST:
+					self._alert(
+						"stalled_ror",
+						t,
+						f"RoR stopped falling at {r:.1f} °C/min",
+						out,
+						ror=round(r, 1),
+						slope=round(slope, 2),
+					)
+					self.prev_slope = self.flat_since = None
+			else:
+				self.flat_since = None
+		return out
+
+
+# ---- batch mode ----
+def scan(curve: RoastCurve, limits: dict | None = None) -> list:
+	"""All warnings over a stored curve, exactly as the live detector would have raised them."""
+	det = Detector(limits)
+	fc = next(
+		(
+			e.get("t")
+			for e in curve.events
+			if any(k in (e.get("type") or "").lower() for k in ("first crack", "fcs"))
+		),
+		None,
+	)
+	out = []
+	t, bt, et, ror = curve.t, curve.bt, curve.et, curve.ror
+	for i in range(len(curve)):
+		if t[i] == MISSING_T or bt[i] != bt[i]:
+			continue
+		out.extend(
+			det.feed(
+				{
+					"t": t[i],
+					"bt": bt[i],
+					"et": et[i] if et[i] == et[i] else None,
+					"ror": ror[i] if ror[i] == ror[i] else None,
+					"event": "first crack" if fc is not None and t[i] >= fc and not det.first_crack else None,
+				}
+			)
+		)
+	return out
+
+
+def scan_telemetry(roast_batch: str, limits: dict | None = None) -> list:
+	"""Warnings over a batch's stored Roast Machine Telemetry."""
+	rows = frappe.get_all(
+		"Roast Machine Telemetry",
+		filters={"roast_batch": roast_batch},
+		fields=["reading_time", "bean_temp", "environment_temp", "ror"],
+		order_by="reading_time asc",
+		as_list=True,
+	)
+	if not rows:
+		return []
+	t0 = rows[0][0]
+	det = Detector(limits)
+	out = []
+	for ts, bt, et, ror in rows:
+		out.extend(det.feed({"t": int((ts - t0).total_seconds()), "bt": bt, "et": et, "ror": ror}))
+	return out
+
+
+@frappe.whitelist()
+def get_anomalies(roast_batch: str | None = None, log: str | None = None) -> list:
+	"""Warnings for a Roast Batch's telemetry or a Coffee Roasting Log's imported curve."""
+	if log:
+		frappe.has_permission("Coffee Roasting Log", doc=log, throw=True)
+		from .archive import open_for_log
+
+		arc = open_for_log(log)
+		if not arc:
+			frappe.throw(f"{log} has no imported curve")
+		with arc:
+			curve = arc.read()
+		rb = frappe.db.get_value("Coffee Roasting Log", log, "roast_batch")
+		return scan(curve, _batch_limits(rb))
+	if roast_batch:
+		frappe.has_permission("Roast Batch", doc=roast_batch, throw=True)
+		return scan_telemetry(roast_batch, _batch_limits(roast_batch))
+	frappe.throw("Pass a Roast Batch or a Coffee Roasting Log")
+
+
+def _batch_limits(roast_batch: str | None) -> dict:
+	profile = frappe.db.get_value("Roast Batch", roast_batch, "roast_profile") if roast_batch else None
+	return profile_limits(profile)
+
+
+# ---- incremental mode ----
+def _key(roast_batch: str) -> str:
+	return f"roast_anomaly:{roast_batch}"
+
+
+def feed_live(roast_batch: str, frames: list) -> list:
+	"""Run a chunk of live frames through the batch's cached detector; returns new warnings."""
+	cache = frappe.cache()
+	raw = cache.get_value(_key(roast_batch))
+	det = Detector.from_dict(raw) if raw else Detector(_batch_limits(roast_batch))
+	out = []
+	for frame in frames:
+		out.extend(det.feed(frame))
+	cache.set_value(_key(roast_batch), det.to_dict(), expires_in_sec=STATE_TTL)
+	if out:
+		frappe.publish_realtime(
+			"roast_anomaly",
+			{"roast_batch": roast_batch, "warnings": out},
+			doctype="Roast Batch",
+			docname=roast_batch,
+		)
+	return out
+
+
+def discard_live(roast_batch: str):
+	frappe.cache().delete_value(_key(roast_batch))
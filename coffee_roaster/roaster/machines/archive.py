@@ -0,0 +1,205 @@
+"""Compact binary curve archive (.rcz) kept alongside each Coffee Roasting Log.
+
+Layout (little-endian):
+
+    header   magic "RCZ1", version, codec, scale, points, blocks, block size, events length
+    index    one (first_t, last_t, offset, length, count) entry per block
+    events   JSON list of the curve's events
+    blocks   compressed [t deltas int32][bt int16][et int16][ror int16] per block
+
+Timestamps are delta-encoded and temperatures quantized to 1/scale °C, then each block of
+`BLOCK_SIZE` points is compressed on its own. A reader memory-maps the file, binary
+searches the index and only decompresses the blocks that overlap the requested window.
+"""
+
+import json
+import lzma
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+import frappe
+
+from .curve import MISSING_T, RoastCurve
+
+EXTENSION = ".rcz"
+BLOCK_SIZE = 1024
+SCALE = 10  # 0.1 °C resolution
+MISSING_Q = -(2**15)  # int16 sentinel for a missing temperature
+
+CODECS = {0: (zlib.compress, zlib.decompress), 1: (lzma.compress, lzma.decompress)}
+CODEC_IDS = {"zlib": 0, "lzma": 1}
+
+_MAGIC = b"RCZ1"
+_HEADER = struct.Struct("<4sBBHIIII")
+_INDEX = struct.Struct("<iiIII")
+
+
+def _quantize(col, lo, hi, scale):
+	out = array("h")
+	for v in col[lo:hi]:
+		out.append(MISSING_Q if v != v else max(-32767, min(32767, round(v * scale))))
+	return out
+
+
+def _le(col):
+	if sys.byteorder != "little":
+		col = array(col.typecode, col)
+		col.byteswap()
+	return col
+
+
+def dumps(curve: RoastCurve, codec: str = "zlib", block_size: int = BLOCK_SIZE, scale: int = SCALE) -> bytes:
+	"""Encode a RoastCurve; points without a timestamp are dropped."""
+	compress = CODECS[CODEC_IDS[codec]][0]
+	keep = [i for i in range(len(curve)) if curve.t[i] != MISSING_T]
+	t = array("i", (curve.t[i] for i in keep))
+	cols = [array("f", (c[i] for i in keep)) for c in (curve.bt, curve.et, curve.ror)]
+
+	index, blocks, offset = [], [], 0
+	for lo in range(0, len(t), block_size):
+		hi = min(lo + block_size, len(t))
+		deltas = array("i", [t[lo]] + [t[i] - t[i - 1] for i in range(lo + 1, hi)])
+		raw = _le(deltas).tobytes() + b"".join(_le(_quantize(c, lo, hi, scale)).tobytes() for c in cols)
+		blob = compress(raw)
+		index.append(_INDEX.pack(t[lo], t[hi - 1], offset, len(blob), hi - lo))
+		blocks.append(blob)
+		offset += len(blob)
+
+	events = json.dumps(curve.events, separators=(",", ":"), default=str).encode()
+	header = _HEADER.pack(_MAGIC, 1, CODEC_IDS[codec], scale, len(t), len(blocks), block_size, len(events))
+	return b"".join([header, *index, events, *blocks])
+
+
+class CurveArchive:
+	"""Random-access reader over an encoded archive (bytes, or a memory map via `open`).
+
+	Use it as a context manager (or call `close`) so a memory-mapped archive is unmapped
+	as soon as the caller is done with it.
+	"""
+
+	def __init__(self, buf):
+		self._map = buf if isinstance(buf, mmap.mmap) else None
+		self.buf = memoryview(buf)
+		magic, _ver, codec, self.scale, self.points, n_blocks, self.block_size, ev_len = _HEADER.unpack_from(
+			self.buf, 0
+		)
+		if magic != _MAGIC:
+			raise ValueError("Not a roast curve archive")
+		self._decompress = CODECS[codec][1]
+		pos = _HEADER.size
+		self.index = [_INDEX.unpack_from(self.buf, pos + i * _INDEX.size) for i in range(n_blocks)]
+		pos += n_blocks * _INDEX.size
+		self.events = json.loads(bytes(self.buf[pos : pos + ev_len]) or b"[]")
+		self._data = pos + ev_len
+		self._first = [e[0] for e in self.index]
+		self._last = [e[1] for e in self.index]
+
+	@classmethod
+	def open(cls, path: str) -> "CurveArchive":
+		with open(path, "rb") as f:
+			return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+	def close(self):
+		self.buf.release()
+		if self._map is not None:
+			self._map.close()
+			self._map = None
+
+	def __enter__(self) -> "CurveArchive":
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def _block(self, i: int, curve: RoastCurve, t0=None, t1=None):
+		_first, _last, offset, length, count = self.index[i]
+		start = self._data + offset
+		raw = self._decompress(self.buf[start : start + length])
+		t = array("i")
+		t.frombytes(raw[: 4 * count])
+		qs = []
+		for k in range(3):
+			q = array("h")
+			q.frombytes(raw[4 * count + 2 * count * k : 4 * count + 2 * count * (k + 1)])
+			qs.append(q)
+		if sys.byteorder != "little":
+			for c in [t, *qs]:
+				c.byteswap()
+		cur = 0
+		for j in range(count):
+			cur = t[j] if j == 0 else cur + t[j]
+			if (t0 is not None and cur < t0) or (t1 is not None and cur > t1):
+				continue
+			curve.t.append(cur)
+			for q, col in zip(qs, (curve.bt, curve.et, curve.ror), strict=True):
+				col.append(float("nan") if q[j] == MISSING_Q else q[j] / self.scale)
+
+	def window(self, t0: int | None = None, t1: int | None = None) -> RoastCurve:
+		"""Points with t0 <= t <= t1 (either bound optional); only overlapping blocks are decoded."""
+		lo = 0 if t0 is None else bisect_left(self._last, t0)
+		hi = len(self.index) if t1 is None else bisect_right(self._first, t1)
+		curve = RoastCurve()
+		for i in range(lo, hi):
+			self._block(i, curve, t0, t1)
+		curve.events = [
+			e
+			for e in self.events
+			if (t0 is None or (e.get("t") or 0) >= t0) and (t1 is None or (e.get("t") or 0) <= t1)
+		]
+		return curve
+
+	def read(self) -> RoastCurve:
+		return self.window()
+
+
+def archive_file_name(log_name: str) -> str:
+	return f"curve-{log_name}{EXTENSION}"
+
+
+def save_for_log(log_name: str, curve: RoastCurve, codec: str = "zlib") -> str:
+	"""Attach the encoded curve to the log as a private File, replacing any earlier archive."""
+	fname = archive_file_name(log_name)
+	for old in frappe.get_all(
+		"File",
+		filters={
+			"attached_to_doctype": "Coffee Roasting Log",
+			"attached_to_name": log_name,
+			"file_name": fname,
+		},
+		pluck="name",
+	):
+		frappe.delete_doc("File", old, ignore_permissions=True)
+	f = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": fname,
+			"attached_to_doctype": "Coffee Roasting Log",
+			"attached_to_name": log_name,
+			"is_private": 1,
+			"content": dumps(curve, codec=codec),
+		}
+	)
+	f.insert(ignore_permissions=True)
+	return f.file_url
+
+
+def open_for_log(log_name: str) -> CurveArchive | None:
+	"""Memory-map a log's archive, or None if it has none; close it when done (`with` works)."""
+	from .service import _local_file_path
+
+	url = frappe.db.get_value(
+		"File",
+		{
+			"attached_to_doctype": "Coffee Roasting Log",
+			"attached_to_name": log_name,
+			"file_name": archive_file_name(log_name),
+		},
+		"file_url",
+	)
+	path = _local_file_path(url) if url else None
+	return CurveArchive.open(path) if path else None
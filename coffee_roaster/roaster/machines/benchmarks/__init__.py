@@ -0,0 +1,5 @@
+"""Offline benchmarks for the curve adapters and phase computation.
+
+Run with ``python -m coffee_roaster.roaster.machines.benchmarks``; a stub ``frappe``
+module is installed when the real one is not importable, so no bench/site is needed.
+"""
@@ -0,0 +1,114 @@
+"""python -m coffee_roaster.roaster.machines.benchmarks [--sizes 1000,10000] [--formats artisan_csv,...]"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+import types
+
+
+def _install_frappe_stub():
+	try:
+		import frappe
+
+		return
+	except ImportError:
+		pass
+	from datetime import datetime
+
+	class _Dict(dict):
+		__getattr__ = dict.get
+
+	def _throw(msg, exc=Exception):
+		raise exc(msg)
+
+	utils = types.ModuleType("frappe.utils")
+	utils.get_datetime = lambda v: v if isinstance(v, datetime) else datetime.fromisoformat(str(v))
+	utils.now_datetime = datetime.now
+	stub = types.ModuleType("frappe")
+	stub._dict = _Dict
+	stub.throw = _throw
+	stub.whitelist = lambda *a, **kw: (lambda fn: fn)
+	stub.utils = utils
+	sys.modules["frappe"] = stub
+	sys.modules["frappe.utils"] = utils
+
+
+def _sec(v):
+	if not v:
+		return None
+	m, s = v.split(":")[-2:]
+	return int(m) * 60 + int(s)
+
+
+def bench(fmt: str, n: int) -> dict:
+	from .. import service
+	from . import synthetic
+
+	roast = synthetic.Roast(n)
+	content = synthetic.render(roast, fmt)
+	fname = synthetic.filename(fmt)
+	truth = roast.truth()
+
+	# timed run, then a separate traced run (tracemalloc slows parsing several-fold)
+	start = time.perf_counter()
+	detected, curve = service.parse_curve(content, fname)
+	parsed = time.perf_counter()
+	phases, metrics = service._compute_phases(curve, curve.events)
+	done = time.perf_counter()
+
+	del curve
+	tracemalloc.start()
+	_, curve = service.parse_curve(content, fname)
+	service._compute_phases(curve, curve.events)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	maillard = next((p for p in phases if p["phase"] == "Maillard"), {})
+	return {
+		"format": fmt,
+		"points": len(curve),
+		"adapter_ok": detected.name == synthetic.ADAPTER[fmt],
+		"parse_pts_s": len(curve) / max(parsed - start, 1e-9),
+		"phase_ms": (done - parsed) * 1000,
+		"peak_mb": peak / 2**20,
+		"input_mb": len(content) / 2**20,
+		"err_yellow": abs((_sec(maillard.get("start_time")) or 0) - truth["yellow"]),
+		"err_fc": abs((_sec(metrics.get("first_crack_start")) or 0) - truth["first_crack"]),
+		"err_drop": abs((_sec(metrics.get("roast_time")) or 0) - truth["drop"]),
+	}
+
+
+def main(argv=None):
+	from . import synthetic
+
+	ap = argparse.ArgumentParser(description="Benchmark the roast curve adapters")
+	ap.add_argument("--sizes", default="1000,10000,100000,1000000")
+	ap.add_argument("--formats", default=",".join(synthetic.FORMATS))
+	args = ap.parse_args(argv)
+
+	cols = [
+		"format",
+		"points",
+		"adapter_ok",
+		"parse_pts_s",
+		"phase_ms",
+		"peak_mb",
+		"input_mb",
+		"err_yellow",
+		"err_fc",
+		"err_drop",
+	]
+	print("  ".join(f"{c:>12}" for c in cols))
+	failed = False
+	for n in (int(s) for s in args.sizes.split(",")):
+		for fmt in args.formats.split(","):
+			r = bench(fmt, n)
+			print("  ".join(f"{r[c]:>12.1f}" if isinstance(r[c], float) else f"{r[c]!s:>12}" for c in cols))
+			failed |= not r["adapter_ok"] or max(r["err_yellow"], r["err_fc"], r["err_drop"]) > 0
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	_install_frappe_stub()
+	sys.exit(main())
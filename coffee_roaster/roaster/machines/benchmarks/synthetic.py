@@ -0,0 +1,81 @@
+"""Synthetic roast curves with known ground truth, rendered in each vendor's export format."""
+
+import json
+import math
+import random
+
+FORMATS = ("artisan_json", "artisan_csv", "cropster_csv", "probat_csv")
+
+# expected adapter per format
+ADAPTER = {
+	"artisan_json": "artisan",
+	"artisan_csv": "artisan",
+	"cropster_csv": "cropster",
+	"probat_csv": "probat",
+}
+
+# ground-truth marks as a fraction of the roast
+YELLOW_AT = 0.45
+FC_AT = 0.80
+
+
+class Roast:
+	"""A 1 Hz curve of `n` points: charge, turning point, a flattening rise, first crack and drop."""
+
+	def __init__(self, n: int, seed: int = 7):
+		rnd = random.Random(seed)
+		self.n = n
+		self.yellow = int(n * YELLOW_AT)
+		self.fc = int(n * FC_AT)
+		self.drop = n - 1
+		tp = max(1, int(n * 0.12))
+		self.t, self.bt, self.et = [], [], []
+		for t in range(n):
+			if t < tp:
+				bt = 200 - 110 * math.sin(math.pi / 2 * t / tp)
+			else:
+				u = (t - tp) / max(1, n - 1 - tp)
+				bt = 90 + 125 * (1 - math.exp(-2.2 * u)) / (1 - math.exp(-2.2))
+			self.t.append(t)
+			self.bt.append(round(bt + rnd.gauss(0, 0.15), 1))
+			self.et.append(round(230 + 15 * math.sin(t / max(1, n) * math.pi) + rnd.gauss(0, 0.3), 1))
+
+	def event(self, t):
+		return {self.yellow: "Yellow", self.fc: "FCs", self.drop: "Drop"}.get(t, "")
+
+	def truth(self) -> dict:
+		return {"yellow": self.yellow, "first_crack": self.fc, "drop": self.drop}
+
+
+def _mmss(t: int) -> str:
+	return f"{t // 60}:{t % 60:02d}"
+
+
+def render(roast: Roast, fmt: str) -> bytes:
+	ev, rows = roast.event, zip(roast.t, roast.bt, roast.et, strict=False)
+	if fmt == "artisan_json":
+		return json.dumps(
+			[{"time": t, "BT": bt, "ET": et, **({"event": ev(t)} if ev(t) else {})} for t, bt, et in rows]
+		).encode()
+	if fmt == "artisan_csv":
+		lines = ["Time,BT,ET,Event"] + [f"{t},{bt},{et},{ev(t)}" for t, bt, et in rows]
+	elif fmt == "cropster_csv":
+		lines = ["Time,Bean temp,Env temp,Rate of rise,Event"] + [
+			f"{t},{bt},{et},,{ev(t)}" for t, bt, et in rows
+		]
+	elif fmt == "probat_csv":
+		lines = ["Time;BeanTemp;ExhaustTemp;RoR;Event"] + [
+			f"{_mmss(t)};{bt};{et};;{ev(t)}" for t, bt, et in rows
+		]
+	else:
+		raise ValueError(f"Unknown format {fmt}")
+	return ("\n".join(lines) + "\n").encode()
+
+
+def filename(fmt: str) -> str:
+	return {
+		"artisan_json": "roast.alog",
+		"artisan_csv": "roast.csv",
+		"cropster_csv": "cropster_export.csv",
+		"probat_csv": "probat_pilot.csv",
+	}[fmt]
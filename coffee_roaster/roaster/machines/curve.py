@@ -0,0 +1,153 @@
+"""Columnar, typed-array representation of a parsed roast curve.
+
+Points are kept in four parallel `array.array` columns (int32 seconds, float32 temps)
+instead of one dict per point, which is roughly a tenth of the memory and lets metrics
+run as single C-level passes (`max`, slicing) over a column.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Optional
+
+# int32 has no None, so a missing timestamp is stored as this sentinel
+MISSING_T = -(2**31)
+NAN = float("nan")
+
+_MAGIC = b"RCV1"
+_HEADER = struct.Struct("<4sII")  # magic, points, events-json length
+
+
+def _f(v) -> float:
+	return NAN if v is None else v
+
+
+def _opt(v) -> float | None:
+	# float32 -> float; round away the float32 noise (100.1 -> 100.0999984...)
+	return None if v != v else round(v, 3)
+
+
+class RoastCurve:
+	__slots__ = ("bt", "et", "events", "ror", "t")
+
+	def __init__(self):
+		self.t = array("i")
+		self.bt = array("f")
+		self.et = array("f")
+		self.ror = array("f")
+		self.events = []
+
+	# ---- building ----
+	def append(self, p: dict):
+		t = p.get("t")
+		self.t.append(MISSING_T if t is None else int(t))
+		self.bt.append(_f(p.get("bt")))
+		self.et.append(_f(p.get("et")))
+		self.ror.append(_f(p.get("ror")))
+
+	@classmethod
+	def from_points(cls, points, events=None) -> "RoastCurve":
+		curve = cls()
+		for p in points or []:
+			curve.append(p)
+		curve.events = list(events or [])
+		return curve
+
+	@classmethod
+	def from_items(cls, items) -> "RoastCurve":
+		"""Build from an adapter `iter_parse` generator without an intermediate list of dicts."""
+		curve = cls()
+		for kind, item in items:
+			if kind == "point":
+				curve.append(item)
+			else:
+				curve.events.append(item)
+		return curve
+
+	# ---- reading ----
+	def __len__(self):
+		return len(self.t)
+
+	def point(self, i: int) -> dict:
+		t = self.t[i]
+		return {
+			"t": None if t == MISSING_T else t,
+			"bt": _opt(self.bt[i]),
+			"et": _opt(self.et[i]),
+			"ror": _opt(self.ror[i]),
+		}
+
+	def __iter__(self):
+		"""Yield legacy point dicts, so a curve can stand in for `parsed["points"]`."""
+		for i in range(len(self.t)):
+			yield self.point(i)
+
+	def max_t(self) -> int:
+		return max(max(self.t, default=0), 0)
+
+	def has_ror(self) -> bool:
+		return any(v == v for v in self.ror)
+
+	def as_dict(self) -> dict:
+		return {"points": self, "events": self.events, "curve": self}
+
+	# ---- serialization ----
+	def to_bytes(self) -> bytes:
+		ev = json.dumps(self.events, separators=(",", ":"), default=str).encode()
+		cols = [self.t, self.bt, self.et, self.ror]
+		if sys.byteorder != "little":
+			cols = [array(c.typecode, c) for c in cols]
+			for c in cols:
+				c.byteswap()
+		return b"".join([_HEADER.pack(_MAGIC, len(self.t), len(ev))] + [c.tobytes() for c in cols] + [ev])
+
+	@classmethod
+	def from_bytes(cls, data) -> "RoastCurve":
+		magic, n, ev_len = _HEADER.unpack_from(data, 0)
+		if magic != _MAGIC:
+			raise ValueError("Not a serialized RoastCurve")
+		curve = cls()
+		off = _HEADER.size
+		view = memoryview(data)
+		for col in (curve.t, curve.bt, curve.et, curve.ror):
+			size = n * col.itemsize
+			col.frombytes(view[off : off + size])
+			if sys.byteorder != "little":
+				col.byteswap()
+			off += size
+		curve.events = json.loads(bytes(view[off : off + ev_len]) or b"[]")
+		return curve
+
+
+def lttb_indices(xs, ys, threshold: int) -> list:
+	"""Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the curve's shape.
+
+	`xs` must be ascending; NaN `ys` are treated as 0 for area purposes only.
+	"""
+	n = len(xs)
+	if threshold >= n or threshold < 3:
+		return list(range(n))
+	ys = [0.0 if y is None or y != y else y for y in ys]
+	out = [0]
+	every = (n - 2) / (threshold - 2)
+	a = 0
+	for i in range(threshold - 2):
+		# average of the next bucket is the third triangle vertex
+		nxt_lo = int((i + 1) * every) + 1
+		nxt_hi = min(int((i + 2) * every) + 1, n)
+		cnt = nxt_hi - nxt_lo
+		avg_x = sum(xs[nxt_lo:nxt_hi]) / cnt
+		avg_y = sum(ys[nxt_lo:nxt_hi]) / cnt
+
+		lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+		ax, ay = xs[a], ys[a]
+		best, best_area = lo, -1.0
+		for j in range(lo, hi):
+			area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+			if area > best_area:
+				best, best_area = j, area
+		out.append(best)
+		a = best
+	out.append(n - 1)
+	return out
@@ -0,0 +1,81 @@
+"""Content-addressed cache of curve import results.
+
+Machine clients retry uploads, so the same file often reaches `import_curve_into_log`
+several times. Results are cached under SHA-256(payload) + adapter + target log, and a
+hit is only honoured while the log's `modified` still matches the save that produced it.
+"""
+
+import hashlib
+from typing import Optional
+
+import frappe
+
+TTL = 6 * 3600
+MAX_ENTRIES = 5000
+CHUNK_SIZE = 1024 * 1024
+
+_PREFIX = "roast_import_cache:"
+_INDEX = "roast_import_cache_index"
+_STATS = "roast_import_cache_stats"
+
+
+def hash_bytes(content: bytes) -> str:
+	return hashlib.sha256(content).hexdigest()
+
+
+def hash_file(path: str) -> str:
+	"""SHA-256 of a file, hashed straight from a memory map of it."""
+	from .adapters.stream import map_file
+
+	h = hashlib.sha256()
+	with map_file(path) as (_head, fp):
+		for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def make_key(content_hash: str, adapter: str | None, doctype: str, name: str) -> str:
+	return f"{_PREFIX}{content_hash}:{adapter or 'auto'}:{doctype}:{name}"
+
+
+def _count(field: str):
+	cache = frappe.cache()
+	cache.hincrby(cache.make_key(_STATS), field, 1)
+
+
+def get(key: str, doctype: str, name: str) -> dict | None:
+	"""Return the cached result if the log has not been saved since, counting the hit or miss."""
+	entry = frappe.cache().get_value(key)
+	if entry and str(frappe.db.get_value(doctype, name, "modified")) == entry.get("modified"):
+		_count("hits")
+		return entry.get("result")
+	_count("misses")
+	return None
+
+
+def put(key: str, doc, result: dict):
+	cache = frappe.cache()
+	cache.set_value(key, {"modified": str(doc.modified), "result": result}, expires_in_sec=TTL)
+	# size limit: newest keys at the head, anything past MAX_ENTRIES is dropped. A re-stored
+	# key is moved rather than duplicated, or its stale copy would evict the fresh entry.
+	# (lrem is not one of the key-prefixing list wrappers, hence make_key.)
+	cache.lrem(cache.make_key(_INDEX), 0, key)
+	cache.lpush(_INDEX, key)
+	for old in cache.lrange(_INDEX, MAX_ENTRIES, -1) or []:
+		cache.delete_value(old.decode() if isinstance(old, bytes) else old)
+	cache.ltrim(_INDEX, 0, MAX_ENTRIES - 1)
+
+
+@frappe.whitelist()
+def stats() -> dict:
+	"""Hit/miss counters and hit rate, for monitoring."""
+	cache = frappe.cache()
+	# counters are plain redis integers, so bypass the pickling hget/hgetall wrappers
+	hits, misses = (int(v or 0) for v in cache.hmget(cache.make_key(_STATS), ["hits", "misses"]))
+	total = hits + misses
+	return {
+		"hits": hits,
+		"misses": misses,
+		"hit_rate": round(hits / total, 4) if total else 0.0,
+		"entries": cache.llen(_INDEX),
+	}
@@ -0,0 +1,225 @@
+"""Incremental phase detection for telemetry streamed while a roast is running.
+
+Each active roast keeps a fixed-size `LiveRoast` state in the cache; frames are fed
+through its state machine (charge -> turning point -> dry end -> first crack -> drop)
+as they arrive, and detected marks are written to the Roast Batch at most once per
+`FLUSH_INTERVAL` seconds (and immediately on drop).
+"""
+
+import json
+from datetime import timedelta
+from typing import Optional
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+DRY_END_BT = 150.0  # °C, bean colour turns yellow
+FIRST_CRACK_BT = 196.0  # °C, used when the machine sends no FC event
+TP_RISE = 3  # consecutive rising BT frames that confirm the turning point
+DROP_FALL = 15.0  # °C BT drop below the peak that marks discharge without an event
+FLUSH_INTERVAL = 15  # seconds between Roast Batch writes
+STATE_TTL = 6 * 3600
+LOCK_TIMEOUT = 30  # seconds a chunk may hold the batch's lock
+LOCK_WAIT = 10  # seconds a concurrent chunk waits for it
+
+PHASES = ("charge", "turning", "drying", "maillard", "development", "dropped")
+
+# mark -> Roast Batch field it is written to
+MARK_FIELDS = {
+	"charge": "charge_start",
+	"turning_point": "charge_end",
+	"dry_end": "drying_end",
+	"first_crack": "maillard_end",
+	"drop": "development_end",
+}
+
+
+class LiveRoast:
+	__slots__ = (
+		"charge_temp",
+		"dirty",
+		"flushed_at",
+		"frames",
+		"last_t",
+		"marks",
+		"min_bt",
+		"min_t",
+		"peak_bt",
+		"phase",
+		"rising",
+		"roast_batch",
+		"start",
+	)
+
+	def __init__(self, roast_batch: str):
+		self.roast_batch = roast_batch
+		self.phase = "charge"
+		self.start = None  # ISO wall-clock time of t=0
+		self.frames = 0
+		self.last_t = None
+		self.min_bt = None
+		self.min_t = None
+		self.peak_bt = None
+		self.rising = 0
+		self.charge_temp = None
+		self.marks = {}  # mark -> t (seconds)
+		self.dirty = False
+		self.flushed_at = None  # ISO time of the last Roast Batch write
+
+	# ---- persistence ----
+	@staticmethod
+	def _key(roast_batch: str) -> str:
+		return f"roast_live:{roast_batch}"
+
+	@classmethod
+	def load(cls, roast_batch: str) -> "LiveRoast":
+		raw = frappe.cache().get_value(cls._key(roast_batch))
+		state = cls(roast_batch)
+		for k, v in (raw or {}).items():
+			setattr(state, k, v)
+		return state
+
+	def save(self):
+		frappe.cache().set_value(
+			self._key(self.roast_batch),
+			{k: getattr(self, k) for k in self.__slots__},
+			expires_in_sec=STATE_TTL,
+		)
+
+	def discard(self):
+		frappe.cache().delete_value(self._key(self.roast_batch))
+
+	# ---- state machine ----
+	def _mark(self, name: str, t: int, out: list):
+		if name not in self.marks:
+			self.marks[name] = t
+			self.dirty = True
+			out.append({"mark": name, "t": t})
+
+	def feed(self, frame: dict) -> list:
+		"""Advance on one frame ({"t", "bt", "et", "ror", "event", "ts"}); returns new marks."""
+		out = []
+		if self.phase == "dropped":
+			return out
+		t, bt = frame.get("t"), frame.get("bt")
+		if t is None:
+			return out
+		t = int(float(t))
+		bt = float(bt) if bt not in (None, "") else None
+		ev = str(frame.get("event") or "").lower()
+		self.frames += 1
+		if self.start is None:
+			ts = get_datetime(frame["ts"]) if frame.get("ts") else now_datetime()
+			self.start = str(ts - timedelta(seconds=t))
+		self.last_t = t
+
+		if self.phase == "charge":
+			self.charge_temp = bt
+			self._mark("charge", t, out)
+			self.phase = "turning"
+		elif bt is not None and self.phase == "turning":
+			if self.min_bt is None or bt < self.min_bt:
+				self.min_bt, self.min_t, self.rising = bt, t, 0
+			elif bt > self.min_bt:
+				self.rising += 1
+				if self.rising >= TP_RISE:
+					self._mark("turning_point", self.min_t, out)
+					self.phase = "drying"
+
+		# peak only counts after the turning point, otherwise the charge temperature looks like a drop
+		if bt is not None and self.phase not in ("charge", "turning"):
+			if self.peak_bt is None or bt > self.peak_bt:
+				self.peak_bt = bt
+
+		if self.phase == "drying" and ("yellow" in ev or "dry" in ev or (bt or 0) >= DRY_END_BT):
+			self._mark("dry_end", t, out)
+			self.phase = "maillard"
+		if self.phase == "maillard" and ("crack" in ev or "fcs" in ev or (bt or 0) >= FIRST_CRACK_BT):
+			self._mark("first_crack", t, out)
+			self.phase = "development"
+		if self.phase in ("maillard", "development") and (
+			"drop" in ev
+			or "eject" in ev
+			or (bt is not None and self.peak_bt is not None and self.peak_bt - bt >= DROP_FALL)
+		):
+			self._mark("drop", t, out)
+			self.phase = "dropped"
+		return out
+
+	# ---- Roast Batch writes ----
+	def due(self) -> bool:
+		if not self.dirty:
+			return False
+		if self.phase == "dropped" or not self.flushed_at:
+			return True
+		return (now_datetime() - get_datetime(self.flushed_at)).total_seconds() >= FLUSH_INTERVAL
+
+	def flush(self):
+		"""Write all marks so far to the Roast Batch in one UPDATE (no version rows)."""
+		start = get_datetime(self.start)
+		values = {MARK_FIELDS[m]: start + timedelta(seconds=t) for m, t in self.marks.items()}
+		if self.charge_temp is not None:
+			values["charge_temp"] = self.charge_temp
+		frappe.db.set_value("Roast Batch", self.roast_batch, values, update_modified=False)
+		self.dirty = False
+		self.flushed_at = str(now_datetime())
+
+
+def iter_frames(body: bytes):
+	"""Parse an NDJSON body; blank and malformed lines are skipped."""
+	for line in body.splitlines():
+		line = line.strip()
+		if not line:
+			continue
+		try:
+			frame = json.loads(line)
+		except ValueError:
+			continue
+		if isinstance(frame, dict):
+			# accept the adapters' long key names too
+			frame.setdefault("bt", frame.get("bean_temp") or frame.get("BT"))
+			frame.setdefault("et", frame.get("environment_temp") or frame.get("ET"))
+			yield frame
+
+
+def _lock(roast_batch: str):
+	"""Per-batch cache lock: concurrent chunks of one roast load, feed and save in turn."""
+	cache = frappe.cache()
+	return cache.lock(
+		cache.make_key(f"roast_live_lock:{roast_batch}"), timeout=LOCK_TIMEOUT, blocking_timeout=LOCK_WAIT
+	)
+
+
+def ingest_frames(roast_batch: str, body: bytes) -> dict:
+	"""Feed one chunk of NDJSON frames into the batch's live state."""
+	from .anomaly import discard_live, feed_live
+
+	frames = list(iter_frames(body))
+	with _lock(roast_batch):
+		state = LiveRoast.load(roast_batch)
+		marks = []
+		for frame in frames:
+			marks.extend(state.feed(frame))
+		warnings = feed_live(roast_batch, frames)
+		flushed = state.due()
+		if flushed:
+			state.flush()
+		if state.phase == "dropped" and not state.dirty:
+			state.discard()
+			discard_live(roast_batch)
+		else:
+			state.save()
+	return {
+		"roast_batch": roast_batch,
+		"phase": state.phase,
+		"frames": state.frames,
+		"t": state.last_t,
+		"marks": marks,
+		"warnings": warnings,
+		"flushed": flushed,
+	}
+
+
+def get_state(roast_batch: str) -> dict | None:
+	raw = frappe.cache().get_value(LiveRoast._key(roast_batch))
+	return raw or None
@@ -0,0 +1,146 @@
+"""Per-log roast metrics summary (Roast Metrics Summary).
+
+`_compute_phases` only keeps what fits on the Coffee Roasting Log; everything else a
+report might want (turning point, DTR, drop temperature, energy proxy...) is derived
+here once per import and upserted into one narrow row per log, so reports join that
+table instead of reparsing curves.
+"""
+
+from typing import Optional
+
+import frappe
+
+from .curve import MISSING_T, RoastCurve
+from .live import DRY_END_BT
+
+DOCTYPE = "Roast Metrics Summary"
+FIELDS = (
+	"points",
+	"charge_temp",
+	"turning_point_temp",
+	"turning_point_s",
+	"yellow_s",
+	"first_crack_s",
+	"roast_time_s",
+	"dtr_pct",
+	"max_ror",
+	"drop_temp",
+	"energy_proxy",
+)
+LOG_FIELDS = ("roast_batch", "roast_date", "roaster_used")
+
+
+def _round(v, nd=1):
+	return None if v is None else round(v, nd)
+
+
+def _seconds(v) -> int | None:
+	"""Duration/Time values come back as seconds or "mm:ss" depending on who wrote them."""
+	from .service import _to_sec_str
+
+	if v in (None, ""):
+		return None
+	if isinstance(v, int | float):
+		return int(v)
+	try:
+		return int(float(v))
+	except ValueError:
+		return _to_sec_str(v)
+
+
+def summarize(curve: RoastCurve) -> dict:
+	"""All summary metrics of a curve in one pass over its columns."""
+	from .service import _compute_phases, _matches, _to_sec_str, ror_metrics
+
+	_phases, metrics = _compute_phases(curve, curve.events)
+	fc = _to_sec_str(metrics.get("first_crack_start"))
+	roast = _to_sec_str(metrics.get("roast_time"))
+	yellow_ev = next((e for e in curve.events if _matches(e, ("yellow", "dry end", "color change"))), None)
+	yellow = yellow_ev.get("t") if yellow_ev else None
+
+	t, bt, et = curve.t, curve.bt, curve.et
+	charge = tp = tp_t = drop = None
+	energy = 0.0
+	prev_t = None
+	for i in range(len(curve)):
+		ti, b = t[i], bt[i]
+		if ti == MISSING_T or b != b:
+			continue
+		if charge is None:
+			charge = b
+		# the turning point is the BT minimum before the beans start to dry out
+		if (yellow is None or ti <= yellow) and (tp is None or b < tp) and (fc is None or ti < fc):
+			tp, tp_t = b, ti
+		if yellow is None and b >= DRY_END_BT and tp_t is not None and ti > tp_t:
+			yellow = ti
+		if roast is None or ti <= roast:
+			drop = b
+			e = et[i]
+			if prev_t is not None and e == e and e > b:
+				energy += (e - b) * (ti - prev_t) / 60.0
+			prev_t = ti
+
+	drop_ev = next((e for e in curve.events if _matches(e, ("drop", "end", "eject"))), None)
+	if drop_ev and drop_ev.get("temp") is not None:
+		drop = drop_ev["temp"]
+	return {
+		"points": len(curve),
+		"charge_temp": _round(charge),
+		"turning_point_temp": _round(tp),
+		"turning_point_s": tp_t,
+		"yellow_s": yellow,
+		"first_crack_s": fc,
+		"roast_time_s": roast,
+		"dtr_pct": _round((roast - fc) / roast * 100.0) if fc is not None and roast else None,
+		"max_ror": ror_metrics(curve, fc).get("max_ror"),
+		"drop_temp": _round(drop),
+		"energy_proxy": _round(energy) if prev_t is not None else None,
+	}
+
+
+def _from_log(doc) -> dict:
+	"""What can be summarized from the log's own fields when it has no imported curve."""
+	fc = _seconds(doc.get("first_crack_start"))
+	roast = _seconds(doc.get("roast_time"))
+	return {
+		"charge_temp": doc.get("charge_temp_c"),
+		"drop_temp": doc.get("final_temp_c"),
+		"first_crack_s": fc,
+		"roast_time_s": roast,
+		"dtr_pct": _round((roast - fc) / roast * 100.0) if fc is not None and roast else None,
+	}
+
+
+def refresh(doc, curve: RoastCurve | None = None):
+	"""Upsert the summary row for a Coffee Roasting Log (from `curve`, its archive, or its fields)."""
+	if curve is None:
+		from .archive import open_for_log
+
+		arc = open_for_log(doc.name)
+		if arc:
+			with arc:
+				curve = arc.read()
+	values = summarize(curve) if curve is not None and len(curve) else _from_log(doc)
+	values.update({f: doc.get(f) for f in LOG_FIELDS})
+
+	if frappe.db.exists(DOCTYPE, doc.name):
+		frappe.db.set_value(DOCTYPE, doc.name, {f: values.get(f) for f in FIELDS + LOG_FIELDS})
+	else:
+		frappe.get_doc({"doctype": DOCTYPE, "coffee_roasting_log": doc.name, **values}).insert(
+			ignore_permissions=True
+		)
+
+
+def on_update_after_submit(doc, method=None):
+	"""doc_events hook: keep the summary in step with edits to submitted logs."""
+	if doc.flags.get("roast_curve") is None:  # curve imports refresh from `_after_save`
+		refresh(doc)
+
+
+def rebuild():
+	"""Backfill summaries for every log (run via `frappe.enqueue`)."""
+	for name in frappe.get_all(
+		"Coffee Roasting Log", filters={"docstatus": ["<", 2]}, order_by="name asc", pluck="name"
+	):
+		refresh(frappe.get_doc("Coffee Roasting Log", name))
+		frappe.db.commit()
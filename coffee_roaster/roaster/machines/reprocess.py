@@ -0,0 +1,247 @@
+"""Bulk re-import of roast curves, e.g. after an adapter fix or a phase-heuristic change.
+
+Matching Coffee Roasting Logs are walked in name order, one chunk at a time. Each chunk's
+attachments are parsed in a process pool (`service.parse_curve` is DB-free); the format is
+always detected per file, and an `adapter` filter only selects the logs whose attachment
+detects as that adapter. The results are then written back and committed as one
+transaction; archive/similarity files and other `_after_save` side effects are only
+written for logs of a committed chunk, so a rolled-back log never leaves them out of
+step with the database. A checkpoint file under the
+site's private folder records the last committed log, so a crashed job resumes where
+it stopped.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import frappe
+from frappe.utils import now_datetime
+
+from .curve import RoastCurve
+
+CHUNK_SIZE = 50
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+CHECKPOINT_FOLDER = "roast_reprocess"
+
+log = logging.getLogger(__name__)
+
+
+def _checkpoint_path(job_id: str) -> str:
+	folder = frappe.get_site_path("private", CHECKPOINT_FOLDER)
+	os.makedirs(folder, exist_ok=True)
+	return os.path.join(folder, f"{job_id}.json")
+
+
+def load_checkpoint(job_id: str) -> dict | None:
+	path = _checkpoint_path(job_id)
+	if not os.path.exists(path):
+		return None
+	with open(path) as f:
+		return json.load(f)
+
+
+def _save_checkpoint(state: dict):
+	path = _checkpoint_path(state["job_id"])
+	tmp = f"{path}.tmp"
+	with open(tmp, "w") as f:
+		json.dump(state, f, default=str)
+	os.replace(tmp, path)
+
+
+def _log_filters(state: dict) -> dict:
+	f = state["filters"]
+	filters = {"docstatus": ["<", 2]}
+	if f.get("from_date") and f.get("to_date"):
+		filters["roast_date"] = ["between", [f["from_date"], f["to_date"]]]
+	elif f.get("from_date"):
+		filters["roast_date"] = [">=", f["from_date"]]
+	elif f.get("to_date"):
+		filters["roast_date"] = ["<=", f["to_date"]]
+	if f.get("machine"):
+		filters["roaster_used"] = f["machine"]
+	if state.get("last_name"):
+		filters["name"] = [">", state["last_name"]]
+	return filters
+
+
+@frappe.whitelist()
+def enqueue_reprocess(
+	from_date: str | None = None,
+	to_date: str | None = None,
+	machine: str | None = None,
+	adapter: str | None = None,
+) -> dict:
+	"""Queue a bulk re-import of every matching log's latest curve attachment.
+
+	`adapter` restricts the job to attachments detected as that adapter (artisan, cropster,
+	probat); each file is still parsed with the format detected from its own head.
+	"""
+	frappe.only_for("System Manager")
+	job_id = frappe.generate_hash(length=12)
+	state = {
+		"job_id": job_id,
+		"filters": {"from_date": from_date, "to_date": to_date, "machine": machine, "adapter": adapter},
+		"status": "queued",
+		"processed": 0,
+		"skipped": 0,
+		"failed": [],
+		"last_name": None,
+		"created": str(now_datetime()),
+		"user": frappe.session.user,
+	}
+	state["total"] = frappe.db.count("Coffee Roasting Log", _log_filters(state))
+	_save_checkpoint(state)
+	_enqueue(job_id)
+	return state
+
+
+@frappe.whitelist()
+def resume_reprocess(job_id: str) -> dict:
+	"""Re-queue a crashed or stopped job; it continues after its last committed log."""
+	frappe.only_for("System Manager")
+	state = load_checkpoint(job_id)
+	if not state:
+		frappe.throw(f"Unknown reprocess job {job_id}", frappe.DoesNotExistError)
+	if state["status"] != "done":
+		_enqueue(job_id)
+	return state
+
+
+@frappe.whitelist()
+def reprocess_status(job_id: str) -> dict | None:
+	return load_checkpoint(job_id)
+
+
+def _enqueue(job_id: str):
+	frappe.enqueue(
+		"coffee_roaster.roaster.machines.reprocess.run",
+		queue="long",
+		timeout=6 * 3600,
+		job_id=f"roast_reprocess::{job_id}",
+		reprocess_job_id=job_id,
+	)
+
+
+def _latest_attachments(names: list) -> dict:
+	"""log name -> (file_url, file_name) of its newest non-archive attachment, in one query."""
+	out = {}
+	for f in frappe.get_all(
+		"File",
+		filters={
+			"attached_to_doctype": "Coffee Roasting Log",
+			"attached_to_name": ["in", names],
+			"file_name": ["not like", "%.rcz"],
+		},
+		fields=["attached_to_name", "file_url", "file_name"],
+		order_by="creation desc",
+	):
+		out.setdefault(f.attached_to_name, (f.file_url, f.file_name))
+	return out
+
+
+def _head(source) -> str:
+	from .service import _read_head
+
+	if isinstance(source, str):
+		with open(source, "rb") as f:
+			return _read_head(f.read(1024))
+	return _read_head(source)
+
+
+def _parse_one(source, filename, only_adapter=None):
+	"""Worker-process entry point: returns (adapter name, serialized curve) or raises.
+
+	Returns None without parsing when `only_adapter` is set and the file is another format.
+	"""
+	from .adapters import registry
+	from .service import parse_curve
+
+	if only_adapter and registry.classify(filename, _head(source)).name != only_adapter:
+		return None
+	detected, curve = parse_curve(source, filename)
+	return detected.name, curve.to_bytes()
+
+
+def run(reprocess_job_id: str):
+	from .service import _after_save, _local_file_path, apply_curve
+
+	state = load_checkpoint(reprocess_job_id)
+	if not state or state["status"] == "done":
+		return
+	adapter = state["filters"].get("adapter")
+	state["status"] = "running"
+	_save_checkpoint(state)
+
+	with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+		while True:
+			names = frappe.get_all(
+				"Coffee Roasting Log",
+				filters=_log_filters(state),
+				order_by="name asc",
+				limit=CHUNK_SIZE,
+				pluck="name",
+			)
+			if not names:
+				break
+			files = _latest_attachments(names)
+
+			futures = {}
+			for name in names:
+				if name not in files:
+					continue
+				url, fname = files[name]
+				source = _local_file_path(url)
+				if not source:
+					from frappe.utils.file_manager import get_file
+
+					_, source = get_file(url)
+				futures[name] = pool.submit(_parse_one, source, fname, adapter)
+
+			saved, skipped = [], len(names) - len(futures)
+			for name in names:
+				fut = futures.get(name)
+				if fut is None:
+					continue
+				frappe.db.savepoint("roast_reprocess_log")
+				try:
+					parsed = fut.result()
+					if parsed is None:
+						skipped += 1
+						continue
+					curve = RoastCurve.from_bytes(parsed[1])
+					doc = frappe.get_doc("Coffee Roasting Log", name)
+					apply_curve(doc, curve)
+					doc.flags.ignore_validate_update_after_submit = True
+					doc.save(ignore_permissions=True)
+					saved.append((doc, curve))
+				except Exception as e:
+					frappe.db.rollback(save_point="roast_reprocess_log")
+					log.error(f"Reprocess {reprocess_job_id}: {name} failed: {e}", exc_info=True)
+					state["failed"].append({"log": name, "error": str(e)})
+
+			# one transaction per chunk; files (a savepoint rollback can't undo them) follow it
+			frappe.db.commit()
+			for doc, curve in saved:
+				try:
+					_after_save(doc, curve)
+				except Exception as e:
+					log.error(
+						f"Reprocess {reprocess_job_id}: {doc.name} saved, archive/summary failed: {e}",
+						exc_info=True,
+					)
+					state["failed"].append({"log": doc.name, "error": f"after save: {e}"})
+			frappe.db.commit()
+			# then move the checkpoint past the chunk
+			state["last_name"] = names[-1]
+			state["processed"] += len(saved)
+			state["skipped"] += skipped
+			_save_checkpoint(state)
+			frappe.publish_realtime("roast_reprocess_progress", state, user=state.get("user"))
+
+	state["status"] = "done"
+	state["finished"] = str(now_datetime())
+	_save_checkpoint(state)
+	frappe.publish_realtime("roast_reprocess_progress", state, user=state.get("user"))
@@ -1,49 +1,123 @@
 import frappe, io
+from array import array
+from collections import deque
 from typing import Optional, Tuple
-from .adapters import artisan, cropster, probat
-
-ADAPTERS = [
-    ("artisan", artisan),
-    ("cropster", cropster),
-    ("probat", probat),
-]
-
-def _detect_adapter(filename: str, head_text: str):
-    for name, mod in ADAPTERS:
-        try:
-            if mod.detect(filename, head_text):
-                return name, mod
-        except Exception:
-            continue
-    return "artisan", artisan  # safe default
+from .adapters import registry, stream
+from .curve import RoastCurve, MISSING_T
+from . import import_cache
+
+ADAPTERS = [(sig.name, sig.module) for sig in registry.SIGNATURES]
+
+def _detect_adapter(filename: str, head_text: str) -> registry.Detection:
+    """Classify an upload in one pass over its head (see adapters/registry.py)."""
+    return registry.classify(filename, head_text)
 
-def _read_head(content: bytes, n=1024) -> str:
-    return content[:n].decode("utf-8", errors="ignore")
+def _read_head(content, n=1024) -> str:
+    return bytes(content[:n]).decode("utf-8", errors="ignore")
+
+def _choose_adapter(adapter: str | None, filename: str, head: str) -> registry.Detection:
+    """The requested adapter, or the detected one; either way with the head's CSV delimiter."""
+    return registry.classify(filename, head, requested=adapter)
+
+def _local_file_path(file_url: str) -> str | None:
+    """Resolve a /files/ or /private/files/ url to a path on this site's disk, if it exists there."""
+    import os
+    url = (file_url or "").split("?", 1)[0]
+    if url.startswith("/private/files/"):
+        path = frappe.get_site_path("private", "files", url[len("/private/files/"):])
+    elif url.startswith("/files/"):
+        path = frappe.get_site_path("public", "files", url[len("/files/"):])
+    else:
+        return None
+    return path if os.path.isfile(path) else None
 
 def _sec_to_timestr(sec: Optional[int]) -> Optional[str]:
     if sec is None: return None
     m, s = divmod(int(sec), 60)
     return f"{m:02d}:{s:02d}"
 
+# first-match keywords per event kind (same precedence _compute_phases always used)
+EVENT_KINDS = (
+    ("fc_s", ("FCs", "first crack start", "first crack")),
+    ("fc_e", ("FCe", "first crack end")),
+    ("yellow", ("yellow", "dry end", "color change")),
+    ("drop", ("drop", "end", "eject")),
+)
+
+def _matches(event, names) -> bool:
+    t = (event.get("type") or "").lower()
+    return any(n.lower() in t for n in names)
+
 def _first(events, *names) -> Optional[dict]:
-    want = {n.lower() for n in names}
     for e in (events or []):
-        t = (e.get("type") or "").lower()
-        if any(w in t for w in want):
+        if _matches(e, names):
             return e
     return None
 
+class PhaseAccumulator:
+    """Incremental form of `_compute_phases`.
+
+    Points and events are fed one at a time and only the running maximum time plus the
+    first event of each kind is kept, so memory stays constant for any curve length.
+    """
+
+    def __init__(self):
+        self.points = 0
+        self.events = 0
+        self.last_t = 0
+        self.marks = {}
+
+    def add_point(self, p: dict):
+        self.points += 1
+        t = p.get("t") or 0
+        if t > self.last_t:
+            self.last_t = t
+
+    def add_event(self, e: dict):
+        self.events += 1
+        for kind, names in EVENT_KINDS:
+            if kind not in self.marks and _matches(e, names):
+                self.marks[kind] = e
+
+    def add_curve(self, curve: RoastCurve):
+        """Fold in a RoastCurve's points with one pass over its time column (events are added separately)."""
+        self.points += len(curve)
+        self.last_t = max(self.last_t, curve.max_t())
+
+    def feed(self, items):
+        """Consume an adapter `iter_parse` generator."""
+        for kind, item in items:
+            if kind == "point":
+                self.add_point(item)
+            else:
+                self.add_event(item)
+        return self
+
+    def result(self) -> tuple[list, dict]:
+        return _phases_from_marks(self.last_t, self.marks)
+
 def _compute_phases(points, events) -> Tuple[list, dict]:
     """Return (phases, metrics) where phases = list of {phase,start_time,end_time,temperature_c,...}."""
+    acc = PhaseAccumulator()
+    if isinstance(points, RoastCurve):
+        acc.add_curve(points)
+    else:
+        for p in (points or []):
+            acc.add_point(p)
+    for e in (events or []):
+        acc.add_event(e)
+    return acc.result()
+
+def _phases_from_marks(max_t, marks) -> tuple[list, dict]:
     # Heuristics:
     t0 = 0
-    fc_s = _first(events, "FCs", "first crack start", "first crack")
-    fc_e = _first(events, "FCe", "first crack end")
-    yel  = _first(events, "yellow", "dry end", "color change")
-    drop = _first(events, "drop", "end", "eject")
+    fc_s = marks.get("fc_s")
+    fc_e = marks.get("fc_e")
+    yel  = marks.get("yellow")
+    drop = marks.get("drop")
 
     # Fallbacks if events missing
-    last_t = max([p.get("t") or 0 for p in (points or [])] + [fc_s.get("t") if fc_s else 0, fc_e.get("t") if fc_e else 0])
+    last_t = max(max_t, (fc_s.get("t") or 0) if fc_s else 0, (fc_e.get("t") or 0) if fc_e else 0)
     if not drop: drop = {"t": last_t}
     # naive yellow at ~4m if unavailable
     if not yel: yel = {"t": min(240, (fc_s.get("t") if fc_s else last_t//2 or 240))}
@@ -73,32 +147,152 @@ def _compute_phases(points, events) -> Tuple[list, dict]:
     }
     return phases, metrics
 
-def import_curve_into_log(doctype: str, name: str, *, filename: Optional[str]=None, content: Optional[bytes]=None, file_url: Optional[str]=None, adapter: Optional[str]=None) -> dict:
-    """Parse a machine file and write phases + metrics into Coffee Roasting Log."""
-    if doctype != "Coffee Roasting Log":
-        frappe.throw("Only Coffee Roasting Log is supported")
-    doc = frappe.get_doc(doctype, name)
+# ---- rate of rise ----
+ROR_WINDOW = 30      # seconds of BT history behind each RoR value
+ROR_SMOOTH = 5       # Savitzky-Golay half-width in samples (0 disables smoothing)
+CRASH_DROP = 5.0     # °C/min lost within one window after first crack
+FLICK_RISE = 2.0     # °C/min regained after the post-crack minimum
 
-    if file_url and not content:
-        from frappe.utils.file_manager import get_file
-        _, content = get_file(file_url)
+SG_BLOCK = 256       # samples per block of sliding Savitzky-Golay sums (re-summed exactly per block)
 
-    if not content:
-        frappe.throw("No content to import. Provide file_url or content.")
+def _window_sums(vals, center: int, half: int):
+    """(S0, S2) of vals[center-half : center+half+1] with S_p = sum(k**p * v); NaN if the window has one."""
+    s0 = s2 = 0.0
+    for k in range(-half, half + 1):
+        v = vals[center + k]
+        s0 += v
+        s2 += k * k * v
+    return s0, s2
+
+def _savgol(vals, half: int):
+    """Quadratic Savitzky-Golay smoothing; edges and windows containing NaN are left as-is.
 
-    head = _read_head(content)
-    chosen = None
-    if adapter:
-        for nm, mod in ADAPTERS:
-            if adapter == nm:
-                chosen = (nm, mod); break
-    if not chosen:
-        chosen = _detect_adapter(filename or "", head)
-    adapter_name, mod = chosen
+    Each output is (base*S0 - 15*S2) / norm over its window. Within a block of SG_BLOCK
+    samples the sums are slid one sample at a time in O(1), carrying S1 = sum(k*v) to
+    update S2; each block starts from exact sums so rounding error cannot build up along
+    the curve. A NaN poisons the sliding sums, so a block that ends in NaN is redone one
+    window at a time.
+    """
+    n = len(vals)
+    if half <= 0 or n < 2 * half + 1:
+        return vals
+    norm = (2 * half - 1) * (2 * half + 1) * (2 * half + 3)
+    a = 3 * (3 * half * half + 3 * half - 1) / norm
+    b = 15.0 / norm
+    hh, h1 = half * half, half + 1
+    out = array("d", vals)
+    for start in range(half, n - half, SG_BLOCK):
+        stop = min(start + SG_BLOCK, n - half)
+        s0 = s1 = s2 = 0.0
+        for k in range(-half, half + 1):
+            v = vals[start + k]
+            s0 += v
+            s1 += k * v
+            s2 += k * k * v
+        seg = [a * s0 - b * s2]
+        # slide right: vals[i-half-1] leaves at k=-half-1, vals[i+half] enters at k=half
+        for old, new in zip(vals[start - half : stop - half - 1], vals[start + half + 1 : stop + half], strict=True):
+            s2 += s0 - 2.0 * s1 - h1 * h1 * old + hh * new
+            s1 += h1 * old + half * new - s0
+            s0 += new - old
+            seg.append(a * s0 - b * s2)
+        if s0 == s0:
+            out[start:stop] = array("d", seg)
+            continue
+        for i in range(start, stop):
+            w0, w2 = _window_sums(vals, i, half)
+            if w0 == w0:
+                out[i] = a * w0 - b * w2
+    return out
+
+def compute_ror(curve: RoastCurve, window: int = ROR_WINDOW, smooth: int = ROR_SMOOTH, force: bool = False) -> RoastCurve:
+    """Fill `curve.ror` (°C/min) from BT when the file did not carry it.
+
+    RoR at each point is the BT slope over the trailing `window` seconds of smoothed BT,
+    found with a two-pointer sweep over the timed, non-NaN samples so the whole curve is
+    one O(n) pass.
+    """
+    if not force and curve.has_ror():
+        return curve
+    nan = float("nan")
+    bt = _savgol(curve.bt, smooth)
+    idx = [i for i, (ti, bi) in enumerate(zip(curve.t, bt, strict=True)) if ti != MISSING_T and bi == bi]
+    vt = [curve.t[i] for i in idx]
+    vb = [bt[i] for i in idx]
+    ror = [nan] * len(curve)
+    j = 0
+    for k, (ti, bi) in enumerate(zip(vt, vb, strict=True)):
+        while ti - vt[j] > window:
+            j += 1
+        dt = ti - vt[j]
+        ror[idx[k]] = (bi - vb[j]) * 60.0 / dt if dt > 0 else nan
+    curve.ror[:] = array("f", ror)
+    return curve
 
-    parsed = mod.parse(content, filename or "")
-    points, events = parsed.get("points") or [], parsed.get("events") or []
-    phases, metrics = _compute_phases(points, events)
+def ror_metrics(curve: RoastCurve, fc_t: int | None = None, window: int = ROR_WINDOW) -> dict:
+    """Max RoR, RoR at first crack and crash/flick indicators in a single pass over the curve."""
+    t, ror = curve.t, curve.ror
+    max_ror = at_fc = None
+    post_min = None
+    crash = flick = 0.0
+    peaks = deque()   # monotonic (t, ror) maxima of the trailing window after first crack
+    for i in range(len(curve)):
+        r, ti = ror[i], t[i]
+        if r != r or ti == MISSING_T:
+            continue
+        if max_ror is None or r > max_ror:
+            max_ror = r
+        if fc_t is None or ti < fc_t:
+            continue
+        if at_fc is None:
+            at_fc = r
+            post_min = r
+        while peaks and peaks[-1][1] <= r:
+            peaks.pop()
+        peaks.append((ti, r))
+        while peaks[0][0] < ti - window:
+            peaks.popleft()
+        crash = max(crash, peaks[0][1] - r)
+        if r < post_min:
+            post_min = r
+        flick = max(flick, r - post_min)
+    return {
+        "max_ror": round(max_ror, 1) if max_ror is not None else None,
+        "ror_at_first_crack": round(at_fc, 1) if at_fc is not None else None,
+        "ror_crash": crash >= CRASH_DROP,
+        "ror_flick": flick >= FLICK_RISE,
+        "ror_crash_depth": round(crash, 1),
+        "ror_flick_rise": round(flick, 1),
+    }
+
+def _to_sec_str(v: str | None) -> int | None:
+    if not v:
+        return None
+    m, s = str(v).split(":")[-2:]
+    return int(m) * 60 + int(s)
+
+def parse_curve(source, filename: str | None=None, adapter: str | None=None) -> tuple[registry.Detection, RoastCurve]:
+    """Detect the adapter and parse `source` (bytes, or a local file path) into a RoastCurve with RoR.
+
+    Touches no database, so it can run in worker processes (see reprocess.py).
+    """
+    if isinstance(source, str):
+        # memory-map the file: the head is sniffed from the map and the parser reads
+        # through a buffer view, so neither a bytes nor a text copy of the file exists
+        with stream.map_file(source) as (head_view, fp):
+            detected = _choose_adapter(adapter, filename or source, _read_head(head_view))
+            curve = RoastCurve.from_items(detected.module.iter_parse(fp, filename or source, detected.delimiter))
+    else:
+        head = _read_head(source)
+        detected = _choose_adapter(adapter, filename or "", head)
+        curve = RoastCurve.from_items(detected.module.iter_parse(io.BytesIO(source), filename or "", detected.delimiter))
+    compute_ror(curve)
+    return detected, curve
+
+def apply_curve(doc, curve: RoastCurve) -> tuple[list, dict]:
+    """Write phases + metrics derived from `curve` onto a Coffee Roasting Log (without saving)."""
+    phases, metrics = _compute_phases(curve, curve.events)
+    metrics.update(ror_metrics(curve, _to_sec_str(metrics.get("first_crack_start"))))
 
     # write phases
     doc.roast_phases = []
@@ -119,6 +313,58 @@ def import_curve_into_log(doctype: str, name: str, *, filename: Optional[str]=No
     }.items():
         if v and frappe.db.has_column("Coffee Roasting Log", f):
             setattr(doc, f, v)
+    doc.flags.roast_curve = curve
+    return phases, metrics
+
+def _after_save(doc, curve: RoastCurve):
+    from .archive import save_for_log
+    from .metrics import refresh
+    from .similarity import upsert
+    save_for_log(doc.name, curve)
+    upsert(doc.name, curve, doc.get("green_origin"))
+    refresh(doc, curve)
+    if doc.get("roast_batch"):
+        from coffee_roaster.roaster.report.roast_curve.roast_curve import clear_cache
+        clear_cache(doc.roast_batch)
+
+def import_curve_into_log(doctype: str, name: str, *, filename: str | None=None, content: bytes | None=None, file_url: str | None=None, adapter: str | None=None, telemetry: bool=False, local_path: str | None=None) -> dict:
+    """Parse a machine file and write phases + metrics into Coffee Roasting Log.
+
+    The file is given as `content` bytes, a `file_url`, or (server-side callers only, e.g. the
+    spool worker) a `local_path` that is memory-mapped instead of read into memory.
+    With `telemetry`, every curve point is also bulk-written to Roast Machine Telemetry
+    for the log's Roast Batch.
+    """
+    if doctype != "Coffee Roasting Log":
+        frappe.throw("Only Coffee Roasting Log is supported")
+
+    if file_url and not content and not local_path:
+        local_path = _local_file_path(file_url)
+        if not local_path:
+            from frappe.utils.file_manager import get_file
+            _, content = get_file(file_url)
+
+    if not content and not local_path:
+        frappe.throw("No content to import. Provide file_url or content.")
+
+    # identical re-uploads short-circuit to the previous result without touching the log
+    cache_key = import_cache.make_key(
+        import_cache.hash_file(local_path) if local_path else import_cache.hash_bytes(content),
+        f"{adapter or 'auto'}+telemetry" if telemetry else adapter, doctype, name)
+    cached = import_cache.get(cache_key, doctype, name)
+    if cached:
+        return {**cached, "cached": True}
+
+    doc = frappe.get_doc(doctype, name)
 
+    detected, curve = parse_curve(local_path or content, filename, adapter)
+    phases, _metrics = apply_curve(doc, curve)
     doc.save()
-    return {"adapter": adapter_name, "points": len(points), "events": len(events), "phases": len(phases)}
+    _after_save(doc, curve)
+    result = {"adapter": detected.name, "confidence": detected.confidence, "reason": detected.reason,
+              "points": len(curve), "events": len(curve.events), "phases": len(phases)}
+    if telemetry and doc.get("roast_batch"):
+        from .telemetry import curve_start, write_curve
+        result["telemetry_rows"] = write_curve(doc.roast_batch, doc.name, curve, curve_start(doc))
+    import_cache.put(cache_key, doc, result)
+    return result
@@ -0,0 +1,286 @@
+"""Nearest-neighbour search over historical roast curves.
+
+Every imported curve is reduced to a fixed-length feature vector (BT and RoR resampled at
+normalized time, phase ratios, a few scalars), stored as one float32 row of an on-disk
+matrix under the site's private folder. Queries load the matrix once per process into
+one flat `array("f")` (4 bytes per feature) and rank rows with `math.dist` (C-level
+Euclidean distance), which keeps 100k rows well under a second without a numeric
+dependency. Trashed and cancelled logs are removed from the matrix, and `rebuild`
+(weekly) rewrites it from scratch.
+"""
+
+import fcntl
+import heapq
+import json
+import math
+import os
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Optional
+
+import frappe
+
+from .curve import MISSING_T, RoastCurve
+
+FOLDER = "roast_similarity"
+BT_SAMPLES = 24
+ROR_SAMPLES = 12
+
+# feature layout: [BT x24][RoR x12][dry, maillard, development ratios][charge, development min, roast min]
+SCALARS = ("charge_temp", "development_min", "roast_min")
+DIM = BT_SAMPLES + ROR_SAMPLES + 3 + len(SCALARS)
+_SCALAR_AT = {name: BT_SAMPLES + ROR_SAMPLES + 3 + i for i, name in enumerate(SCALARS)}
+
+# scale so one unit is roughly "one noticeable difference" in every block
+BT_SCALE, ROR_SCALE, RATIO_SCALE = 1 / 10.0, 1 / 2.0, 10.0
+CHARGE_SCALE, MINUTES_SCALE = 1 / 10.0, 1.0
+
+_loaded = {"mtime": None, "flat": array("f"), "meta": []}
+
+
+def _paths():
+	folder = frappe.get_site_path("private", FOLDER)
+	os.makedirs(folder, exist_ok=True)
+	return os.path.join(folder, "features.f32"), os.path.join(folder, "rows.json")
+
+
+@contextmanager
+def _locked():
+	matrix, meta = _paths()
+	with open(f"{meta}.lock", "w") as lock:
+		fcntl.flock(lock, fcntl.LOCK_EX)
+		try:
+			yield matrix, meta
+		finally:
+			fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _sample(t, col, duration: int, n: int) -> list:
+	"""Linear interpolation of `col` at n evenly spaced fractions of the roast."""
+	out = []
+	for k in range(n):
+		x = duration * k / (n - 1)
+		i = bisect_left(t, x)
+		if i <= 0:
+			v = col[0]
+		elif i >= len(t):
+			v = col[-1]
+		else:
+			t0, t1 = t[i - 1], t[i]
+			a, b = col[i - 1], col[i]
+			v = a if t1 == t0 else a + (b - a) * (x - t0) / (t1 - t0)
+		out.append(0.0 if v != v else v)
+	return out
+
+
+def curve_features(curve: RoastCurve) -> list | None:
+	"""Fixed-length feature vector of a curve, or None if it is too short to describe."""
+	from .service import _compute_phases, _to_sec_str
+
+	keep = [i for i in range(len(curve)) if curve.t[i] != MISSING_T and curve.bt[i] == curve.bt[i]]
+	if len(keep) < 10:
+		return None
+	t = array("i", (curve.t[i] for i in keep))
+	bt = array("f", (curve.bt[i] for i in keep))
+	ror = array("f", (curve.ror[i] for i in keep))
+
+	phases, metrics = _compute_phases(curve, curve.events)
+	duration = _to_sec_str(metrics.get("roast_time")) or t[-1]
+	if duration <= 0:
+		return None
+	maillard = next((p for p in phases if p["phase"] == "Maillard"), None)
+	yellow = _to_sec_str(maillard["start_time"]) if maillard else duration // 2
+	fc = _to_sec_str(metrics.get("first_crack_start")) or duration
+
+	vec = [v * BT_SCALE for v in _sample(t, bt, duration, BT_SAMPLES)]
+	vec += [v * ROR_SCALE for v in _sample(t, ror, duration, ROR_SAMPLES)]
+	vec += [
+		yellow / duration * RATIO_SCALE,
+		(fc - yellow) / duration * RATIO_SCALE,
+		(duration - fc) / duration * RATIO_SCALE,
+	]
+	vec += [bt[0] * CHARGE_SCALE, (duration - fc) / 60 * MINUTES_SCALE, duration / 60 * MINUTES_SCALE]
+	return vec
+
+
+def upsert(log_name: str, curve: RoastCurve, origin: str | None = None):
+	"""Add or overwrite a log's row in the on-disk matrix."""
+	vec = curve_features(curve)
+	if vec is not None:
+		_write([(log_name, origin, vec)])
+
+
+def _read_meta(meta_path: str) -> list:
+	if not os.path.exists(meta_path):
+		return []
+	with open(meta_path) as f:
+		return json.load(f)
+
+
+def _save_meta(meta_path: str, meta: list):
+	tmp = f"{meta_path}.tmp"
+	with open(tmp, "w") as out:
+		json.dump(meta, out)
+	os.replace(tmp, meta_path)
+
+
+def _write(entries: list):
+	"""Write [(log, origin, vector)] rows in place (existing logs) or at the end, under one lock."""
+	with _locked() as (matrix, meta_path):
+		meta = _read_meta(meta_path)
+		pos_of = {m[0]: i for i, m in enumerate(meta)}
+		with open(matrix, "r+b" if os.path.exists(matrix) else "w+b") as f:
+			for log_name, origin, vec in entries:
+				pos = pos_of.get(log_name)
+				if pos is None:
+					pos = pos_of[log_name] = len(meta)
+					meta.append([log_name, origin])
+				else:
+					meta[pos][1] = origin
+				f.seek(pos * DIM * 4)
+				f.write(array("f", vec).tobytes())
+		_save_meta(meta_path, meta)
+
+
+def remove(log_names: list):
+	"""Drop the logs' rows; the last row is moved into each freed slot so the matrix stays dense."""
+	with _locked() as (matrix, meta_path):
+		meta = _read_meta(meta_path)
+		pos_of = {m[0]: i for i, m in enumerate(meta)}
+		gone = [pos_of[n] for n in log_names if n in pos_of]
+		if not gone or not os.path.exists(matrix):
+			return
+		with open(matrix, "r+b") as f:
+			for pos in sorted(gone, reverse=True):
+				last = len(meta) - 1
+				if pos != last:
+					f.seek(last * DIM * 4)
+					row = f.read(DIM * 4)
+					f.seek(pos * DIM * 4)
+					f.write(row)
+					meta[pos] = meta[last]
+				meta.pop()
+			f.truncate(len(meta) * DIM * 4)
+		_save_meta(meta_path, meta)
+
+
+def on_log_removed(doc, method=None):
+	"""Coffee Roasting Log on_trash / on_cancel: stop offering it as a similar roast."""
+	remove([doc.name])
+
+
+def _load():
+	"""(flat float32 rows, meta), reloaded only when the matrix changes.
+
+	Rows stay in one `array("f")`; `math.dist` takes array slices directly, so 100k rows
+	cost ~17 MB per worker instead of a list of Python float tuples.
+	"""
+	matrix, meta_path = _paths()
+	if not os.path.exists(matrix) or not os.path.exists(meta_path):
+		return array("f"), []
+	mtime = (os.path.getmtime(matrix), os.path.getmtime(meta_path))
+	if _loaded["mtime"] != mtime:
+		# under the writers' lock, so the matrix and its meta are read as one consistent pair
+		with _locked():
+			meta = _read_meta(meta_path)
+			flat = array("f")
+			with open(matrix, "rb") as f:
+				flat.frombytes(f.read(len(meta) * DIM * 4))
+		_loaded.update(mtime=mtime, meta=meta[: len(flat) // DIM], flat=flat)
+	return _loaded["flat"], _loaded["meta"]
+
+
+def _profile_query(profile: str):
+	"""A Roast Profile has no curve, so it is matched on the scalars it does define."""
+	p = frappe.db.get_value("Roast Profile", profile, ["charge_temp", "development_time"], as_dict=True)
+	if not p:
+		frappe.throw(f"Roast Profile {profile} not found", frappe.DoesNotExistError)
+	dims, vec = [], []
+	if p.charge_temp:
+		dims.append(_SCALAR_AT["charge_temp"])
+		vec.append(p.charge_temp * CHARGE_SCALE)
+	if p.development_time:
+		dims.append(_SCALAR_AT["development_min"])
+		vec.append(p.development_time * MINUTES_SCALE)
+	if not dims:
+		frappe.throw(f"Roast Profile {profile} has no charge temperature or development time to match on")
+	return dims, vec
+
+
+def nearest(
+	vec: list, k: int = 10, dims: list | None = None, origin: str | None = None, exclude: str | None = None
+) -> list:
+	flat, meta = _load()
+	candidates = range(len(meta))
+	if origin:
+		o = origin.strip().lower()
+		candidates = [i for i in candidates if (meta[i][1] or "").strip().lower() == o]
+	if dims:
+		dist = lambda i: math.dist(vec, [flat[i * DIM + d] for d in dims])  # noqa: E731
+	else:
+		dist = lambda i: math.dist(vec, flat[i * DIM : (i + 1) * DIM])  # noqa: E731
+	best = heapq.nsmallest(k + (1 if exclude else 0), candidates, key=dist)
+	return [
+		{"log": meta[i][0], "green_origin": meta[i][1], "distance": round(dist(i), 4)}
+		for i in best
+		if meta[i][0] != exclude
+	][:k]
+
+
+@frappe.whitelist()
+def find_similar_roasts(
+	log: str | None = None, profile: str | None = None, k: int = 10, same_origin: int = 0
+) -> list:
+	"""k nearest historical roasts to a Coffee Roasting Log's curve or to a Roast Profile."""
+	k = max(1, min(int(k or 10), 200))
+	if log:
+		frappe.has_permission("Coffee Roasting Log", doc=log, throw=True)
+		from .archive import open_for_log
+
+		vec = None
+		arc = open_for_log(log)
+		if arc:
+			with arc:
+				vec = curve_features(arc.read())
+		if vec is None:
+			frappe.throw(f"{log} has no imported curve to compare")
+		origin = (
+			frappe.db.get_value("Coffee Roasting Log", log, "green_origin") if int(same_origin or 0) else None
+		)
+		return nearest(vec, k, origin=origin, exclude=log)
+	if profile:
+		dims, vec = _profile_query(profile)
+		return nearest(vec, k, dims=dims)
+	frappe.throw("Pass a Coffee Roasting Log or a Roast Profile")
+
+
+def rebuild():
+	"""Weekly: re-derive every row from the logs' curve archives into a fresh matrix.
+
+	Rows are written to temporary files and swapped in under the lock, so logs deleted
+	or cancelled without their hooks running drop out too.
+	"""
+	from .archive import open_for_log
+
+	matrix, meta_path = _paths()
+	tmp_matrix = f"{matrix}.{os.getpid()}.tmp"
+	meta = []
+	with open(tmp_matrix, "wb") as f:
+		for log in frappe.get_all(
+			"Coffee Roasting Log",
+			filters={"docstatus": ["<", 2]},
+			fields=["name", "green_origin"],
+			order_by="name asc",
+		):
+			arc = open_for_log(log.name)
+			if not arc:
+				continue
+			with arc:
+				vec = curve_features(arc.read())
+			if vec is not None:
+				f.write(array("f", vec).tobytes())
+				meta.append([log.name, log.green_origin])
+	with _locked():
+		os.replace(tmp_matrix, matrix)
+		_save_meta(meta_path, meta)
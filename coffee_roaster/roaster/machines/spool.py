@@ -0,0 +1,169 @@
+"""On-disk spool for asynchronously ingested machine curves.
+
+The webhook only writes the raw body here and enqueues `process`; parsing, phase
+rewriting and `doc.save()` happen in a background worker. Job progress is kept in the
+cache so `webhook.ingest_status` can report it without touching the database.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Optional
+
+import frappe
+
+log = logging.getLogger(__name__)
+
+SPOOL_FOLDER = "roast_spool"
+STATUS_TTL = 24 * 3600
+# job_id -> content_hash of every job whose body may still be needed (queued, running, failed)
+PINS = "roast_ingest_spool_pins"
+
+
+def spool_dir() -> str:
+	path = frappe.get_site_path("private", SPOOL_FOLDER)
+	os.makedirs(path, exist_ok=True)
+	return path
+
+
+def spool_path(content_hash: str) -> str:
+	return os.path.join(spool_dir(), f"{content_hash}.bin")
+
+
+def write(content: bytes) -> str:
+	"""Store `content` under its SHA-256 and return the hash; identical bodies share one file."""
+	content_hash = hashlib.sha256(content).hexdigest()
+	path = spool_path(content_hash)
+	if not os.path.exists(path):
+		tmp = f"{path}.{os.getpid()}.tmp"
+		with open(tmp, "wb") as f:
+			f.write(content)
+		os.replace(tmp, path)
+	else:
+		os.utime(path)  # keep a re-uploaded body out of the next purge
+	return content_hash
+
+
+def _status_key(job_id: str) -> str:
+	return f"roast_ingest_job:{job_id}"
+
+
+def set_status(job_id: str, status: str, **extra):
+	frappe.cache().set_value(
+		_status_key(job_id), {"job_id": job_id, "status": status, **extra}, expires_in_sec=STATUS_TTL
+	)
+	# a finished job no longer needs its body; queued and failed ones keep it for the worker / replay
+	if status == "done":
+		frappe.cache().hdel(PINS, job_id)
+	elif extra.get("content_hash"):
+		frappe.cache().hset(PINS, job_id, extra["content_hash"])
+
+
+def get_status(job_id: str) -> dict | None:
+	return frappe.cache().get_value(_status_key(job_id))
+
+
+def enqueue(
+	content: bytes,
+	*,
+	filename: str,
+	adapter: str | None,
+	log_name: str | None,
+	auto_create: bool,
+	telemetry: bool = False,
+) -> dict:
+	"""Spool the body and queue a background import; returns {"job_id", "content_hash"}."""
+	content_hash = write(content)
+	job_id = frappe.generate_hash(length=16)
+	set_status(job_id, "queued", content_hash=content_hash, log_name=log_name)
+	frappe.enqueue(
+		"coffee_roaster.roaster.machines.spool.process",
+		queue="long",
+		job_id=f"roast_ingest::{job_id}",
+		ingest_job_id=job_id,
+		content_hash=content_hash,
+		filename=filename,
+		adapter=adapter,
+		log_name=log_name,
+		auto_create=auto_create,
+		telemetry=telemetry,
+	)
+	return {"job_id": job_id, "content_hash": content_hash}
+
+
+def process(
+	ingest_job_id: str,
+	content_hash: str,
+	filename: str,
+	adapter: str | None = None,
+	log_name: str | None = None,
+	auto_create: bool = False,
+	telemetry: bool = False,
+):
+	"""Background job: import a spooled body into its Coffee Roasting Log."""
+	from coffee_roaster.roaster.machines.service import import_curve_into_log
+
+	# the webhook already authenticated the machine token
+	frappe.set_user("Administrator")
+	path = spool_path(content_hash)
+	set_status(ingest_job_id, "running", content_hash=content_hash, log_name=log_name)
+	try:
+		if not log_name and auto_create:
+			crl = frappe.new_doc("Coffee Roasting Log")
+			crl.roast_date = frappe.utils.today()
+			crl.insert(ignore_permissions=True)
+			log_name = crl.name
+		if not log_name:
+			frappe.throw("No Coffee Roasting Log to import into", frappe.ValidationError)
+
+		# parsed straight from a memory map of the spool file; the body is never held in memory
+		result = import_curve_into_log(
+			"Coffee Roasting Log",
+			log_name,
+			filename=filename,
+			local_path=path,
+			adapter=adapter,
+			telemetry=telemetry,
+		)
+		frappe.db.commit()
+	except Exception as e:
+		frappe.db.rollback()
+		log.error(f"Spooled import {ingest_job_id} ({content_hash}) failed: {e}", exc_info=True)
+		# keep the spool file so the upload can be replayed
+		set_status(ingest_job_id, "failed", content_hash=content_hash, log_name=log_name, error=str(e))
+		raise
+
+	set_status(ingest_job_id, "done", content_hash=content_hash, log_name=log_name, result=result)
+	return result
+
+
+def _pinned() -> set:
+	"""Content hashes still referenced by a queued, running or failed job; expired pins are dropped."""
+	cache = frappe.cache()
+	keep = set()
+	for job_id, content_hash in (cache.hgetall(PINS) or {}).items():
+		job_id = frappe.safe_decode(job_id)
+		status = get_status(job_id)
+		if status and status.get("status") != "done":
+			keep.add(frappe.safe_decode(content_hash))
+		else:
+			cache.hdel(PINS, job_id)
+	return keep
+
+
+def purge(max_age: int = STATUS_TTL):
+	"""Daily: drop spooled bodies older than `max_age` seconds that no queued or failed job needs."""
+	import time
+
+	cutoff = time.time() - max_age
+	keep = _pinned()
+	folder = spool_dir()
+	for fn in os.listdir(folder):
+		path = os.path.join(folder, fn)
+		if fn.endswith(".bin") and fn[: -len(".bin")] in keep:
+			continue
+		try:
+			if os.path.getmtime(path) < cutoff:
+				os.remove(path)
+		except OSError:
+			pass
@@ -0,0 +1,102 @@
+"""Bulk writer for Roast Machine Telemetry.
+
+A whole RoastCurve becomes telemetry rows through chunked multi-row INSERTs
+(`frappe.db.bulk_insert`) inside the caller's transaction, with row names generated
+up front instead of one `get_doc(...).insert()` per reading. Every row carries the
+Coffee Roasting Log it came from, so a re-import replaces exactly that log's readings.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+from .curve import MISSING_T, RoastCurve
+
+DOCTYPE = "Roast Machine Telemetry"
+CHUNK_SIZE = 2000
+FIELDS = [
+	"name",
+	"owner",
+	"modified_by",
+	"creation",
+	"modified",
+	"docstatus",
+	"idx",
+	"roast_batch",
+	"coffee_roasting_log",
+	"reading_time",
+	"bean_temp",
+	"environment_temp",
+	"ror",
+]
+
+
+def _num(v) -> float | None:
+	return None if v != v else round(v, 3)
+
+
+def curve_start(doc) -> datetime:
+	"""Wall-clock time of t=0 for a log's curve: the log's creation time.
+
+	The log has no charge timestamp, so creation is the most stable anchor it has: every
+	import of the same log lands on the same timestamps, and each round's log of a batch
+	keeps its own span whatever day it is (re-)imported on.
+	"""
+	return get_datetime(doc.get("creation")) if doc.get("creation") else now_datetime()
+
+
+def write_curve(
+	roast_batch: str,
+	coffee_roasting_log: str,
+	curve: RoastCurve,
+	start: datetime,
+	*,
+	replace: bool = True,
+	chunk_size: int = CHUNK_SIZE,
+) -> int:
+	"""Insert one telemetry row per curve point; returns the number of rows written.
+
+	With `replace`, the readings previously written from `coffee_roasting_log` are deleted
+	first, so re-importing a curve does not duplicate it and leaves the batch's other
+	rounds alone.
+	"""
+	if not roast_batch or not len(curve):
+		return 0
+	start = get_datetime(start)
+	t, bt, et, ror = curve.t, curve.bt, curve.et, curve.ror
+
+	if replace and coffee_roasting_log:
+		frappe.db.delete(DOCTYPE, {"coffee_roasting_log": coffee_roasting_log})
+
+	user = frappe.session.user
+	now = now_datetime()
+	prefix = f"RMT-{frappe.generate_hash(length=8)}-"
+	rows = []
+	for i in range(len(curve)):
+		if t[i] == MISSING_T:
+			continue
+		rows.append(
+			(
+				f"{prefix}{i:07d}",
+				user,
+				user,
+				now,
+				now,
+				0,
+				0,
+				roast_batch,
+				coffee_roasting_log,
+				start + timedelta(seconds=t[i]),
+				_num(bt[i]),
+				_num(et[i]),
+				_num(ror[i]),
+			)
+		)
+	frappe.db.bulk_insert(DOCTYPE, FIELDS, rows, chunk_size=chunk_size)
+
+	from coffee_roaster.roaster.report.roast_curve.roast_curve import clear_cache
+
+	clear_cache(roast_batch)
+	return len(rows)
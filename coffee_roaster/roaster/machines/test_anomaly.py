@@ -0,0 +1,71 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import unittest
+
+from coffee_roaster.roaster.machines.anomaly import WARMUP, Detector
+
+
+def _run(det, frames):
+	out = []
+	for frame in frames:
+		out.extend(det.feed(frame))
+	return out
+
+
+def _frames(n, bt=130.0, et=None, ror=None, event_at=None):
+	for t in range(n):
+		yield {
+			"t": t,
+			"bt": bt(t) if callable(bt) else bt,
+			"et": et(t) if callable(et) else et,
+			"ror": ror(t) if callable(ror) else ror,
+			"event": "First Crack" if t == event_at else None,
+		}
+
+
+class TestDetector(unittest.TestCase):
+	def test_nothing_is_judged_during_warmup(self):
+		self.assertEqual(_run(Detector(), _frames(WARMUP, bt=150.0, et=400.0, ror=10.0)), [])
+
+	def test_wide_delta_scorches_after_persisting_with_cooldown(self):
+		out = _run(Detector(), _frames(200, bt=150.0, et=300.0, ror=10.0))
+		self.assertEqual([(w["kind"], w["t"]) for w in out], [("scorching", 100), ("scorching", 160)])
+		self.assertEqual(out[0]["et_bt_delta"], 150.0)
+
+	def test_profile_limit_is_respected(self):
+		det = Detector({"max_et_bt_delta": 200.0, "min_et_bt_delta": 15.0, "min_ror": 3.0})
+		self.assertEqual(_run(det, _frames(200, bt=150.0, et=300.0, ror=10.0)), [])
+
+	def test_ror_spike_scorches(self):
+		ror = lambda t: 40.0 if t == 150 else (9.0 if t % 2 else 11.0)  # noqa: E731
+		out = _run(Detector(), _frames(200, bt=150.0, et=190.0, ror=ror))
+		self.assertEqual([(w["kind"], w["t"]) for w in out], [("scorching", 150)])
+		self.assertGreater(out[0]["z"], 3.0)
+
+	def test_low_ror_with_little_drive_bakes_until_first_crack(self):
+		out = _run(Detector(), _frames(200, bt=130.0, et=135.0, ror=1.0))
+		self.assertEqual([(w["kind"], w["t"]) for w in out], [("baking", 150)])
+		self.assertEqual(_run(Detector(), _frames(200, bt=130.0, et=135.0, ror=1.0, event_at=10)), [])
+
+	def test_ror_that_stops_falling_stalls(self):
+		ror = lambda t: max(20.0 - 0.1 * max(t - 90, 0), 4.0)  # noqa: E731
+		out = _run(Detector(), _frames(400, bt=170.0, et=210.0, ror=ror))
+		self.assertEqual([w["kind"] for w in out], ["stalled_ror"])
+		self.assertGreater(out[0]["t"], 250)
+
+	def test_ror_is_derived_from_bt_when_missing(self):
+		# BT climbing 1 °C/s is a steady 60 °C/min: no spike, no stall, no baking
+		self.assertEqual(_run(Detector(), _frames(300, bt=lambda t: 100.0 + t, et=lambda t: 140.0 + t)), [])
+
+	def test_state_survives_a_cache_round_trip(self):
+		frames = list(_frames(200, bt=150.0, et=300.0, ror=10.0))
+		det = Detector()
+		head = _run(det, frames[:120])
+		det = Detector.from_dict(det.to_dict())
+		self.assertEqual(head + _run(det, frames[120:]), _run(Detector(), frames))
+
+	def test_frames_without_time_or_bt_are_ignored(self):
+		det = Detector()
+		self.assertEqual(det.feed({"t": None, "bt": 150}) + det.feed({"t": 5, "bt": ""}), [])
+		self.assertIsNone(det.start)
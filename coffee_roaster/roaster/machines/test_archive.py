@@ -0,0 +1,61 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import os
+import tempfile
+import unittest
+
+from coffee_roaster.roaster.machines.archive import CurveArchive, dumps
+from coffee_roaster.roaster.machines.curve import RoastCurve
+
+
+def _curve(n=2500):
+	points = [{"t": t, "bt": 150 + t * 0.1, "et": 230.0, "ror": None if t % 7 else 9.5} for t in range(n)]
+	points[10]["t"] = None
+	return RoastCurve.from_points(points, [{"type": "FCs", "t": 480, "temp": 198.0}])
+
+
+class TestCurveArchive(unittest.TestCase):
+	def assertSamePoints(self, got, want):
+		self.assertEqual(len(got), len(want))
+		for a, b in zip(got, want, strict=True):
+			self.assertEqual(a["t"], b["t"])
+			for k in ("bt", "et", "ror"):
+				if b[k] is None:
+					self.assertIsNone(a[k])
+				else:
+					self.assertAlmostEqual(a[k], b[k], delta=0.05)
+
+	def test_round_trip(self):
+		curve = _curve()
+		for codec in ("zlib", "lzma"):
+			arc = CurveArchive(dumps(curve, codec=codec, block_size=256))
+			# the untimed point is dropped
+			self.assertSamePoints(list(arc.read()), [p for p in curve if p["t"] is not None])
+			self.assertEqual(arc.read().events, curve.events)
+
+	def test_window_decodes_only_the_range(self):
+		curve = _curve()
+		arc = CurveArchive(dumps(curve, block_size=256))
+		got = arc.window(1000, 1100)
+		self.assertEqual(list(got.t), list(range(1000, 1101)))
+		self.assertEqual(arc.window(400, 500).events, curve.events)
+		self.assertEqual(arc.window(0, 100).events, [])
+
+	def test_open_memory_maps_and_closes(self):
+		fd, path = tempfile.mkstemp(suffix=".rcz")
+		try:
+			with os.fdopen(fd, "wb") as f:
+				f.write(dumps(_curve(300)))
+			with CurveArchive.open(path) as arc:
+				self.assertEqual(arc.points, 299)
+				self.assertEqual(len(arc.window(0, 9)), 10)
+			self.assertIsNone(arc._map)
+			with self.assertRaises(ValueError):
+				arc.buf[0]  # released with the map
+		finally:
+			os.remove(path)
+
+	def test_rejects_other_data(self):
+		with self.assertRaises(ValueError):
+			CurveArchive(b"\0" * 64)
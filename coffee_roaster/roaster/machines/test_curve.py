@@ -0,0 +1,66 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import unittest
+
+from coffee_roaster.roaster.machines.curve import MISSING_T, RoastCurve, lttb_indices
+
+
+class TestRoastCurve(unittest.TestCase):
+	def test_points_round_trip_through_the_columns(self):
+		points = [
+			{"t": 0, "bt": 180.5, "et": 220.0, "ror": None},
+			{"t": None, "bt": None, "et": 221.3, "ror": 12.25},
+		]
+		curve = RoastCurve.from_points(points)
+		self.assertEqual(curve.t[1], MISSING_T)
+		self.assertEqual(list(curve), points)
+		self.assertEqual(curve.max_t(), 0)
+		self.assertTrue(curve.has_ror())
+
+	def test_from_items_splits_points_and_events(self):
+		curve = RoastCurve.from_items(
+			[("point", {"t": 0, "bt": 100}), ("event", {"type": "Charge", "t": 0}), ("point", {"t": 1})]
+		)
+		self.assertEqual(len(curve), 2)
+		self.assertEqual(curve.events, [{"type": "Charge", "t": 0}])
+		self.assertFalse(curve.has_ror())
+
+	def test_bytes_round_trip(self):
+		curve = RoastCurve.from_points(
+			[{"t": t, "bt": 150 + t / 3, "et": None if t % 5 else 230.1, "ror": 8.0} for t in range(500)],
+			[{"type": "FCs", "t": 420, "temp": 196.2}],
+		)
+		back = RoastCurve.from_bytes(curve.to_bytes())
+		self.assertEqual(list(back), list(curve))
+		self.assertEqual(back.events, curve.events)
+		self.assertEqual(list(RoastCurve.from_bytes(RoastCurve().to_bytes())), [])
+
+	def test_from_bytes_rejects_other_data(self):
+		with self.assertRaises(ValueError):
+			RoastCurve.from_bytes(b"RCZ1" + b"\0" * 8)
+
+
+class TestLttb(unittest.TestCase):
+	def test_keeps_endpoints_and_budget(self):
+		xs = list(range(1000))
+		ys = [(x % 50) * 1.0 for x in xs]
+		idx = lttb_indices(xs, ys, 100)
+		self.assertEqual(len(idx), 100)
+		self.assertEqual((idx[0], idx[-1]), (0, 999))
+		self.assertEqual(idx, sorted(set(idx)))
+
+	def test_keeps_a_spike(self):
+		xs = list(range(500))
+		ys = [100.0] * 500
+		ys[251] = 400.0
+		self.assertIn(251, lttb_indices(xs, ys, 20))
+
+	def test_small_inputs_and_budgets_pass_through(self):
+		self.assertEqual(lttb_indices([0, 1, 2], [1.0, 2.0, 3.0], 10), [0, 1, 2])
+		self.assertEqual(lttb_indices(list(range(10)), [0.0] * 10, 2), list(range(10)))
+
+	def test_nan_counts_as_zero(self):
+		ys = [1.0] * 30
+		ys[14] = float("nan")
+		self.assertEqual(len(lttb_indices(list(range(30)), ys, 5)), 5)
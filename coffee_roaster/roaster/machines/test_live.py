@@ -0,0 +1,58 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import unittest
+
+from coffee_roaster.roaster.machines.live import LiveRoast, iter_frames
+
+
+def _roast():
+	"""Charge at 200 °C, turning point at t=60, then a steady climb and a drop."""
+	frames = [{"t": t, "bt": 200 - 1.5 * t, "ts": "2025-01-01 08:00:00"} for t in range(0, 61, 5)]
+	frames += [{"t": t, "bt": 110 + (t - 60) * 0.5} for t in range(65, 600, 5)]
+	frames.append({"t": 600, "bt": 150, "event": "Drop"})
+	return frames
+
+
+class TestLiveRoast(unittest.TestCase):
+	def test_marks_each_phase_once_in_order(self):
+		state = LiveRoast("RB-1")
+		marks = [m for f in _roast() for m in state.feed(f)]
+		self.assertEqual(
+			[m["mark"] for m in marks], ["charge", "turning_point", "dry_end", "first_crack", "drop"]
+		)
+		self.assertEqual(state.marks["turning_point"], 60)
+		self.assertEqual(state.marks["dry_end"], 140)
+		self.assertEqual(state.phase, "dropped")
+		self.assertEqual(state.charge_temp, 200.0)
+		self.assertEqual(state.start, "2025-01-01 08:00:00")
+
+	def test_chunked_feed_matches_one_pass(self):
+		one = LiveRoast("RB-1")
+		for f in _roast():
+			one.feed(f)
+		chunked = LiveRoast("RB-1")
+		frames = _roast()
+		for i in range(0, len(frames), 7):
+			# state survives a save/load round trip between chunks
+			restored = LiveRoast("RB-1")
+			for k in LiveRoast.__slots__:
+				setattr(restored, k, getattr(chunked, k))
+			for f in frames[i : i + 7]:
+				restored.feed(f)
+			chunked = restored
+		self.assertEqual(chunked.marks, one.marks)
+
+	def test_frames_after_drop_and_untimed_frames_are_ignored(self):
+		state = LiveRoast("RB-1")
+		self.assertEqual(state.feed({"bt": 180}), [])
+		self.assertEqual(state.frames, 0)
+		for f in _roast():
+			state.feed(f)
+		self.assertEqual(state.feed({"t": 700, "bt": 100}), [])
+		self.assertEqual(state.last_t, 600)
+
+	def test_iter_frames(self):
+		body = b'{"t": 0, "BT": 180}\n\nnot json\n[1]\n{"t": 1, "bean_temp": 181, "environment_temp": 230}\n'
+		frames = list(iter_frames(body))
+		self.assertEqual([(f["t"], f["bt"], f["et"]) for f in frames], [(0, 180, None), (1, 181, 230)])
@@ -0,0 +1,78 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import math
+import unittest
+from array import array
+
+from coffee_roaster.roaster.machines.curve import RoastCurve
+from coffee_roaster.roaster.machines.service import SG_BLOCK, _savgol, compute_ror
+
+
+def _savgol_direct(vals, half):
+	"""Reference filter: the convolution _savgol's sliding sums stand in for."""
+	norm = (2 * half - 1) * (2 * half + 1) * (2 * half + 3)
+	base = 3 * (3 * half * half + 3 * half - 1)
+	coef = [(base - 15 * k * k) / norm for k in range(-half, half + 1)]
+	out = list(vals)
+	for i in range(half, len(vals) - half):
+		acc = sum(c * v for c, v in zip(coef, vals[i - half : i + half + 1], strict=True))
+		if acc == acc:
+			out[i] = acc
+	return out
+
+
+class TestSavgol(unittest.TestCase):
+	def test_matches_direct_convolution_across_blocks(self):
+		vals = array("d", (150 + 0.05 * i + math.sin(i / 7.0) for i in range(3 * SG_BLOCK + 17)))
+		for half in (1, 2, 5):
+			for got, want in zip(_savgol(vals, half), _savgol_direct(vals, half), strict=True):
+				self.assertAlmostEqual(got, want, places=6)
+
+	def test_preserves_quadratics(self):
+		vals = array("d", (0.01 * i * i - 3 * i + 200 for i in range(600)))
+		for got, want in zip(_savgol(vals, 4), vals, strict=True):
+			self.assertAlmostEqual(got, want, places=6)
+
+	def test_windows_with_nan_are_left_as_is(self):
+		vals = array("d", (float(i % 13) for i in range(SG_BLOCK + 40)))
+		vals[20] = float("nan")
+		got, want = _savgol(vals, 3), _savgol_direct(vals, 3)
+		for i in range(len(vals)):
+			if 17 <= i <= 23:
+				self.assertEqual(got[i] == got[i], vals[i] == vals[i])
+				if vals[i] == vals[i]:
+					self.assertEqual(got[i], vals[i])
+			else:
+				self.assertAlmostEqual(got[i], want[i], places=6)
+
+	def test_short_input_and_zero_width_pass_through(self):
+		vals = array("d", [1.0, 2.0, 4.0])
+		self.assertIs(_savgol(vals, 2), vals)
+		self.assertIs(_savgol(vals, 0), vals)
+
+
+class TestComputeRor(unittest.TestCase):
+	def test_linear_ramp(self):
+		curve = RoastCurve.from_points([{"t": t, "bt": 100 + 0.5 * t} for t in range(120)])
+		compute_ror(curve, window=30, smooth=0)
+		self.assertNotEqual(curve.ror[0], curve.ror[0])
+		for i in range(1, 120):
+			self.assertAlmostEqual(curve.ror[i], 30.0, places=3)
+
+	def test_skips_untimed_and_missing_samples(self):
+		points = [{"t": t, "bt": 100 + t} for t in range(10)]
+		points[3]["t"] = None
+		points[6]["bt"] = None
+		curve = compute_ror(RoastCurve.from_points(points), window=4, smooth=0)
+		self.assertNotEqual(curve.ror[3], curve.ror[3])
+		self.assertNotEqual(curve.ror[6], curve.ror[6])
+		# t=7 looks back to t=4 (t=3 is untimed, t=6 has no BT): 3 °C over 3 s
+		self.assertAlmostEqual(curve.ror[7], 60.0, places=3)
+
+	def test_keeps_file_ror_unless_forced(self):
+		curve = RoastCurve.from_points([{"t": t, "bt": 100 + t, "ror": 7} for t in range(5)])
+		compute_ror(curve, smooth=0)
+		self.assertEqual(list(curve.ror), [7.0] * 5)
+		compute_ror(curve, smooth=0, force=True)
+		self.assertAlmostEqual(curve.ror[4], 60.0, places=3)
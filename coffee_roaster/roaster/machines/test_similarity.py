@@ -0,0 +1,59 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from coffee_roaster.roaster.machines import similarity
+
+
+class TestMatrix(unittest.TestCase):
+	def setUp(self):
+		tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(tmp.cleanup)
+		paths = (os.path.join(tmp.name, "features.f32"), os.path.join(tmp.name, "rows.json"))
+		patcher = patch.object(similarity, "_paths", return_value=paths)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		similarity._loaded.update(mtime=None)
+
+	def vec(self, x):
+		return [float(x)] * similarity.DIM
+
+	def write(self, *names):
+		similarity._write(
+			[(name, "Kenya" if i % 2 else "Brazil", self.vec(i)) for i, name in enumerate(names)]
+		)
+		similarity._loaded.update(mtime=None)
+
+	def test_nearest_orders_by_distance(self):
+		self.write("A", "B", "C")
+		found = similarity.nearest(self.vec(1.9), k=2)
+		self.assertEqual([r["log"] for r in found], ["C", "B"])
+		self.assertEqual(found[0]["green_origin"], "Brazil")
+
+	def test_overwrite_keeps_one_row(self):
+		self.write("A", "B")
+		similarity._write([("A", "Peru", self.vec(5))])
+		similarity._loaded.update(mtime=None)
+		flat, meta = similarity._load()
+		self.assertEqual(meta, [["A", "Peru"], ["B", "Kenya"]])
+		self.assertEqual(len(flat), 2 * similarity.DIM)
+		self.assertEqual(flat[0], 5.0)
+
+	def test_origin_filter_and_exclude(self):
+		self.write("A", "B", "C", "D")
+		found = similarity.nearest(self.vec(0), k=5, origin=" kenya ", exclude="B")
+		self.assertEqual([r["log"] for r in found], ["D"])
+
+	def test_remove_moves_last_row_into_the_gap(self):
+		self.write("A", "B", "C", "D")
+		similarity.remove(["B", "missing"])
+		similarity._loaded.update(mtime=None)
+		flat, meta = similarity._load()
+		self.assertEqual([m[0] for m in meta], ["A", "D", "C"])
+		self.assertEqual(len(flat), 3 * similarity.DIM)
+		self.assertEqual(flat[similarity.DIM], 3.0)
+		self.assertNotIn("B", [r["log"] for r in similarity.nearest(self.vec(1), k=10)])
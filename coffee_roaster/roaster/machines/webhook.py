@@ -1,12 +1,39 @@
 import frappe
 import json
 from coffee_roaster.roaster.machines.service import import_curve_into_log
+from coffee_roaster.roaster.machines import spool
 
 # Python's built-in logging module
 import logging
 log = logging.getLogger(__name__)
 
 
+def _authenticate(token: str | None = None):
+    """Check the machine token (JSON body, query parameters or headers); returns Roaster Settings."""
+    token = (token
+             or frappe.request.args.get("token")
+             or frappe.request.headers.get("X-Roast-Token"))
+    token = (token or "").strip()
+
+    # SUGGESTION: Cache the settings to reduce DB calls on frequent requests.
+    # The cache will be cleared automatically if Roaster Settings are saved.
+    def _get_roaster_settings():
+        return frappe.db.get_value("Roaster Settings", "Roaster Settings",
+                                   ["machine_webhook_token", "auto_create_roast_log"],
+                                   as_dict=True)
+
+    settings = frappe.cache().get_value("roaster_settings", _get_roaster_settings)
+    token_cfg = (settings.machine_webhook_token or "").strip()
+
+    if not token_cfg or token != token_cfg:
+        frappe.throw("Invalid token", frappe.PermissionError)
+    return settings
+
+
+def _wants_telemetry() -> bool:
+    return (frappe.request.headers.get("X-Roast-Telemetry") or "").strip().lower() in ("1", "true", "yes")
+
+
 @frappe.whitelist(allow_guest=True)
 def ingest(token: str | None = None, log_name: str | None = None):
     """
@@ -20,34 +47,20 @@ def ingest(token: str | None = None, log_name: str | None = None):
         X-Roast-Token: Authentication token.
         X-Roast-Filename: The original filename of the curve data.
         X-Roast-Adapter: The specific adapter to use for parsing.
+        X-Roast-Telemetry: "1" to also store every point in Roast Machine Telemetry.
 
     Args:
         token (str, optional): Authentication token.
         log_name (str, optional): The name of the Coffee Roasting Log to attach the curve to.
     """
     # --- Authentication ---
-    token = (token
-             or frappe.request.args.get("token")
-             or frappe.request.headers.get("X-Roast-Token"))
-    token = (token or "").strip()
-
-    # SUGGESTION: Cache the settings to reduce DB calls on frequent requests.
-    # The cache will be cleared automatically if Roaster Settings are saved.
-    def _get_roaster_settings():
-        return frappe.db.get_value("Roaster Settings", "Roaster Settings",
-                                   ["machine_webhook_token", "auto_create_roast_log"],
-                                   as_dict=True)
-
-    settings = frappe.cache().get_value("roaster_settings", _get_roaster_settings)
-    token_cfg = (settings.machine_webhook_token or "").strip()
-
-    if not token_cfg or token != token_cfg:
-        frappe.throw("Invalid token", frappe.PermissionError)
+    settings = _authenticate(token)
 
     # --- Get Request Data ---
     raw_content = frappe.request.get_data() or b""
     filename = frappe.request.headers.get("X-Roast-Filename") or "roast.json"
     adapter = frappe.request.headers.get("X-Roast-Adapter")
+    telemetry = _wants_telemetry()
 
     # SUGGESTION: Add logging for better debugging.
     log.info(f"Webhook invoked. filename='{filename}', adapter='{adapter}', log_name='{log_name}'")
@@ -77,7 +90,8 @@ def ingest(token: str | None = None, log_name: str | None = None):
             log_name,
             filename=filename,
             content=raw_content,
-            adapter=adapter
+            adapter=adapter,
+            telemetry=telemetry,
         )
         log.info(f"Successfully imported curve into {log_name}")
         # Ensure the result is serializable
@@ -95,3 +109,73 @@ def ingest(token: str | None = None, log_name: str | None = None):
 
         # Re-raise the exception to send a 500 error to the client
         raise
+
+
+@frappe.whitelist(allow_guest=True)
+def ingest_async(token: str | None = None, log_name: str | None = None):
+    """
+    Asynchronous variant of `ingest`.
+
+    Authenticates, spools the raw body to disk under its SHA-256 and enqueues the
+    import as a background job. Responds 202 with a job id; poll `ingest_status`
+    for progress. Log auto-creation (if enabled) happens in the job.
+
+    Takes the same headers and arguments as `ingest`.
+    """
+    settings = _authenticate(token)
+
+    raw_content = frappe.request.get_data() or b""
+    if not raw_content:
+        frappe.throw("Empty request body", frappe.ValidationError)
+    filename = frappe.request.headers.get("X-Roast-Filename") or "roast.json"
+    adapter = frappe.request.headers.get("X-Roast-Adapter")
+    log_name = log_name or frappe.request.headers.get("X-Roast-Log-Name")
+    auto_create = bool(int(settings.auto_create_roast_log or 0))
+    telemetry = _wants_telemetry()
+
+    if not log_name and not auto_create:
+        frappe.throw("Header 'X-Roast-Log-Name' is required (or enable 'auto_create_roast_log' in settings)",
+                     frappe.ValidationError)
+
+    job = spool.enqueue(raw_content, filename=filename, adapter=adapter,
+                        log_name=log_name, auto_create=auto_create, telemetry=telemetry)
+    log.info(f"Spooled curve {job['content_hash']} as job {job['job_id']} (log_name='{log_name}')")
+
+    frappe.local.response["http_status_code"] = 202
+    return {"status": "queued", **job}
+
+
+@frappe.whitelist(allow_guest=True)
+def ingest_status(job_id: str, token: str | None = None):
+    """Report the progress of an `ingest_async` job: queued, running, done or failed."""
+    _authenticate(token)
+    status = spool.get_status(job_id)
+    if not status:
+        frappe.throw(f"Unknown or expired ingest job {job_id}", frappe.DoesNotExistError)
+    return status
+
+
+@frappe.whitelist(allow_guest=True)
+def stream(token: str | None = None, roast_batch: str | None = None):
+    """
+    Live telemetry endpoint, called repeatedly while a roast is running.
+
+    The body is NDJSON, one frame per line: {"t": seconds since charge, "bt", "et",
+    "ror", "event", "ts"}. Frames drive an incremental phase detector (turning point,
+    dry end, first crack, drop) whose marks are written to the Roast Batch in
+    rate-limited batches.
+
+    Headers:
+        X-Roast-Token: Authentication token.
+        X-Roast-Batch: The Roast Batch being roasted (if not passed as an argument).
+    """
+    from coffee_roaster.roaster.machines.live import ingest_frames
+
+    _authenticate(token)
+    roast_batch = roast_batch or frappe.request.headers.get("X-Roast-Batch")
+    if not roast_batch:
+        frappe.throw("Header 'X-Roast-Batch' is required", frappe.ValidationError)
+    if not frappe.db.exists("Roast Batch", roast_batch):
+        frappe.throw(f"Roast Batch {roast_batch} not found", frappe.DoesNotExistError)
+
+    return ingest_frames(roast_batch, frappe.request.get_data() or b"")
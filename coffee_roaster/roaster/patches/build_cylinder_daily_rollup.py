@@ -0,0 +1,8 @@
+import frappe
+
+
+def execute():
+	frappe.reload_doc("roaster", "doctype", "roast_cylinder_daily")
+	from coffee_roaster.roaster.cylinder_rollup import reconcile
+
+	reconcile()
@@ -0,0 +1,8 @@
+import frappe
+
+
+def execute():
+	frappe.reload_doc("roaster", "doctype", "latest_assessment_index")
+	from coffee_roaster.roaster.assessment_index import rebuild
+
+	rebuild()
@@ -0,0 +1,8 @@
+import frappe
+
+
+def execute():
+	frappe.reload_doc("roaster", "doctype", "sku_monthly_ledger")
+	from coffee_roaster.roaster.sku_pnl import reconcile
+
+	reconcile()
@@ -0,0 +1,138 @@
+"""Roast Batch Profitability Fact: one precomputed profitability row per Roast Batch.
+
+Rows are computed by the report's set-based engine (`compute_rows`) and kept current by
+doc events on Roast Batch, Batch Cost and Item Price; `reconcile` rebuilds the whole
+table nightly to catch anything the events missed (direct SQL edits, failed jobs).
+"""
+
+import logging
+
+import frappe
+from frappe.utils import now_datetime
+
+from coffee_roaster.roaster.report.roast_batch_profitability.roast_batch_profitability import (
+	FACT,
+	FACT_POPULATED,
+	ITEM_FIELDS,
+	compute_rows,
+)
+from coffee_roaster.roaster.report_cache import invalidate_doctype
+
+FACT_FIELDS = [
+	"roast_batch",
+	"company",
+	"roast_date",
+	"rb_docstatus",
+	"has_submitted_batch_cost",
+	"input_qty",
+	"output_qty",
+	"yield_pct",
+	"unit_cost",
+	"total_cost",
+	"selling_rate",
+	"revenue",
+	"profit",
+	"profit_margin",
+]
+CHUNK_SIZE = 500
+# Item Price changes touching more batches than this are refreshed in a background job
+INLINE_LIMIT = 50
+
+log = logging.getLogger(__name__)
+
+
+def refresh_batches(names: list):
+	"""Recompute and replace the fact rows of `names` (draft/submitted batches only)."""
+	names = sorted({n for n in names if n})
+	for i in range(0, len(names), CHUNK_SIZE):
+		chunk = names[i : i + CHUNK_SIZE]
+		rows = compute_rows("rb.name IN %(names)s AND rb.docstatus < 2", {"names": tuple(chunk)})
+		frappe.db.delete(FACT, {"name": ["in", chunk]})
+		_insert(rows)
+
+
+def _insert(rows: list):
+	if not rows:
+		return
+	user = frappe.session.user
+	now = now_datetime()
+	frappe.db.bulk_insert(
+		FACT,
+		["name", "owner", "modified_by", "creation", "modified", "docstatus", "idx", *FACT_FIELDS],
+		[(r["roast_batch"], user, user, now, now, 0, 0, *tuple(r.get(f) for f in FACT_FIELDS)) for r in rows],
+		chunk_size=CHUNK_SIZE,
+	)
+
+
+def _safe_refresh(names: list):
+	"""Doc events must never block the user's save; the nightly reconcile repairs misses."""
+	try:
+		refresh_batches(names)
+	except Exception:
+		log.error(f"Profitability fact refresh failed for {names}", exc_info=True)
+
+
+def _enqueue_refresh(names: list):
+	"""Refresh in a job that starts once the current transaction has committed; used on
+	trash, where `on_trash` runs while the deleted row is still visible to `compute_rows`."""
+	names = [n for n in names if n]
+	if names:
+		frappe.enqueue(
+			"coffee_roaster.roaster.profitability.refresh_batches",
+			queue="long",
+			enqueue_after_commit=True,
+			names=names,
+		)
+
+
+# ---- doc events ----
+def on_roast_batch_change(doc, method=None):
+	_safe_refresh([doc.name])
+
+
+def on_roast_batch_trash(doc, method=None):
+	frappe.db.delete(FACT, {"name": doc.name})
+
+
+def on_batch_cost_change(doc, method=None):
+	names = [doc.get("batch_no")]
+	before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+	if before and before.get("batch_no") != doc.get("batch_no"):
+		names.append(before.get("batch_no"))
+	if method == "on_trash":
+		_enqueue_refresh(names)
+	else:
+		_safe_refresh(names)
+
+
+def on_item_price_change(doc, method=None):
+	"""A selling price only matters to batches of that item (they may fall back to it)."""
+	if not doc.get("selling") or not doc.get("item_code"):
+		return
+	cols = set(frappe.db.get_table_columns("Roast Batch"))
+	fields = [f for f in ITEM_FIELDS if f in cols]
+	if not fields:
+		return
+	names = frappe.get_all(
+		"Roast Batch",
+		or_filters={f: doc.item_code for f in fields},
+		filters={"docstatus": ["<", 2]},
+		pluck="name",
+	)
+	if len(names) <= INLINE_LIMIT and method != "on_trash":
+		_safe_refresh(names)
+	else:
+		_enqueue_refresh(names)
+
+
+# ---- nightly reconcile ----
+def reconcile():
+	"""Rebuild every fact row from source documents and drop rows of cancelled/deleted batches."""
+	rows = compute_rows("rb.docstatus < 2", {})
+	frappe.db.delete(FACT)
+	for i in range(0, len(rows), CHUNK_SIZE):
+		_insert(rows[i : i + CHUNK_SIZE])
+	frappe.db.set_global(FACT_POPULATED, 1)
+	frappe.db.commit()
+	invalidate_doctype(FACT)
+	log.info(f"Profitability facts reconciled: {len(rows)} batches")
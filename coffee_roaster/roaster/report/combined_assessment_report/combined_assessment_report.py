@@ -1,7 +1,10 @@
 # Combined Assessment Report — Script Report
 # Matches your current SELECT columns and makes filters work.
 import frappe
+from coffee_roaster.roaster.report_cache import cached_report
 
+@cached_report("Combined Assessment Report", ["Descriptive Assessment", "Extrinsic Assessment", "Physical Assessment", "Affective Assessment",
+                                             "Latest Assessment Index"])
 def execute(filters=None):
     f = frappe._dict(filters or {})
     # defaults so empty filters show ALL rows
@@ -10,60 +13,17 @@ def execute(filters=None):
     f.setdefault("to_date", "")
 
     vals = {}
-    where_da = ["da1.docstatus < 2"]
+    where = ["1=1"]
     if f.roast_batch:
-        where_da.append("da1.roast_batch = %(roast_batch)s")
+        where.append("li.roast_batch = %(roast_batch)s")
         vals["roast_batch"] = f.roast_batch
     if f.from_date:
-        where_da.append("da1.roast_date >= %(from_date)s")
+        where.append("li.roast_date >= %(from_date)s")
         vals["from_date"] = f.from_date
     if f.to_date:
-        where_da.append("da1.roast_date <= %(to_date)s")
+        where.append("li.roast_date <= %(to_date)s")
         vals["to_date"] = f.to_date
 
-    # Use "latest per roast_batch" for each assessment (stable vs GROUP BY *)
-    da_sub = f"""
-        SELECT da1.*
-        FROM `tabDescriptive Assessment` da1
-        JOIN (
-            SELECT roast_batch, MAX(modified) AS m
-            FROM `tabDescriptive Assessment`
-            WHERE docstatus < 2
-            GROUP BY roast_batch
-        ) x ON x.roast_batch = da1.roast_batch AND x.m = da1.modified
-        WHERE {" AND ".join(where_da)}
-    """
-    ea_sub = """
-        SELECT ea1.*
-        FROM `tabExtrinsic Assessment` ea1
-        JOIN (
-            SELECT roast_batch, MAX(modified) AS m
-            FROM `tabExtrinsic Assessment`
-            WHERE docstatus < 2
-            GROUP BY roast_batch
-        ) x ON x.roast_batch = ea1.roast_batch AND x.m = ea1.modified
-    """
-    pa_sub = """
-        SELECT pa1.*
-        FROM `tabPhysical Assessment` pa1
-        JOIN (
-            SELECT roast_batch, MAX(modified) AS m
-            FROM `tabPhysical Assessment`
-            WHERE docstatus < 2
-            GROUP BY roast_batch
-        ) x ON x.roast_batch = pa1.roast_batch AND x.m = pa1.modified
-    """
-    aa_sub = """
-        SELECT aa1.*
-        FROM `tabAffective Assessment` aa1
-        JOIN (
-            SELECT roast_batch, MAX(modified) AS m
-            FROM `tabAffective Assessment`
-            WHERE docstatus < 2
-            GROUP BY roast_batch
-        ) x ON x.roast_batch = aa1.roast_batch AND x.m = aa1.modified
-    """
-
     sql = f"""
         SELECT
             da.roast_batch,
@@ -117,11 +77,14 @@ def execute(filters=None):
             aa.total_score AS affective_total_score,
             aa.grade       AS affective_grade
 
-        FROM ({da_sub}) da
-        LEFT JOIN ({ea_sub}) ea ON ea.roast_batch = da.roast_batch
-        LEFT JOIN ({pa_sub}) pa ON pa.roast_batch = da.roast_batch
-        LEFT JOIN ({aa_sub}) aa ON aa.roast_batch = da.roast_batch
-        ORDER BY da.roast_batch DESC
+        -- "latest per roast_batch" is kept by assessment_index, one pointer row per batch
+        FROM `tabLatest Assessment Index` li
+        JOIN `tabDescriptive Assessment` da ON da.name = li.descriptive_assessment
+        LEFT JOIN `tabExtrinsic Assessment` ea ON ea.name = li.extrinsic_assessment
+        LEFT JOIN `tabPhysical Assessment` pa ON pa.name = li.physical_assessment
+        LEFT JOIN `tabAffective Assessment` aa ON aa.name = li.affective_assessment
+        WHERE {" AND ".join(where)}
+        ORDER BY li.roast_batch DESC
         LIMIT 100
     """
     data = frappe.db.sql(sql, vals, as_dict=True)
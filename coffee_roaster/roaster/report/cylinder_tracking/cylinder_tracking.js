@@ -4,6 +4,7 @@ frappe.query_reports["Cylinder Tracking"] = {
     { fieldname: "from_date",        label: __("From Date"),fieldtype: "Date",                              default: "" },
     { fieldname: "to_date",          label: __("To Date"),  fieldtype: "Date",                              default: "" },
     { fieldname: "roasting_machine", label: __("Machine"),  fieldtype: "Link", options: "Roasting Machine", default: "" },
-    { fieldname: "operator",         label: __("Operator"), fieldtype: "Link", options: "User",             default: "" }
+    { fieldname: "operator",         label: __("Operator"), fieldtype: "Link", options: "User",             default: "" },
+    { fieldname: "period",           label: __("Period"),   fieldtype: "Select", options: "Batch\nDay\nWeek\nMonth", default: "Day" }
   ]
 };
@@ -2,6 +2,7 @@ from __future__ import annotations
 import re, datetime
 from math import radians, sin, cos, asin, sqrt
 import frappe
+from coffee_roaster.roaster.report_cache import cached_report
 
 # Fixed outlet columns
 BUCKETS = ["GOV","NGO","EMB","CORP","EDU","SMKT","EXPO","RETAIL","DIST","CAF","HOTEL","REST"]
@@ -90,6 +91,7 @@ def _bucket_from_text(v: str | None) -> str:
     return "RETAIL"
 
 # ---------- main ----------
+@cached_report("Master Route Plan by Sub City", ["Route Plan", "Customer"])
 def execute(filters=None):
     f = frappe._dict(filters or {})
 
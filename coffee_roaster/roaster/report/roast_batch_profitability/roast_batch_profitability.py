@@ -3,6 +3,8 @@
 # - Shows Draft/Submitted Roast Batches (configurable)
 # - Optionally restricts to batches that HAVE a submitted Batch Cost
 # - Fixes the 6 financial fields using Batch Cost (with robust fallbacks)
+# - Set-based: a constant number of queries however many batches match (see compute_rows)
+# - Reads the precomputed Roast Batch Profitability Fact table when it is populated
 #
 # Fields used:
 #   Roast Batch: qty_to_roast/input_qty, output_qty/output_weight, selling_rate* (optional), roasted_item (Link Item)
@@ -11,6 +13,10 @@
 import frappe
 from frappe.utils import getdate
 
+FACT = "Roast Batch Profitability Fact"
+# global default set by `profitability.reconcile` once the fact table holds every batch
+FACT_POPULATED = "roast_batch_profitability_fact_populated"
+
 # ---------------- Public API ----------------
 def execute(filters=None):
     filters = filters or {}
@@ -24,7 +30,12 @@ def execute(filters=None):
     only_submitted_bc = 1 if str(filters.get("only_submitted_batch_cost")).lower() in ("1", "true", "yes", "on") else 0
 
     columns = _get_columns()
-    rows = _build_rows(fd, td, roast_batch, rb_docstatus, only_submitted_bc)
+    # the precomputed fact table answers with one range scan; until the first reconcile
+    # has filled it, compute live from source documents
+    if frappe.db.get_global(FACT_POPULATED):
+        rows = _fact_rows(fd, td, roast_batch, rb_docstatus, only_submitted_bc)
+    else:
+        rows = _build_rows(fd, td, roast_batch, rb_docstatus, only_submitted_bc)
     summary = _build_summary(rows)
     return columns, rows, None, None, summary
 
@@ -51,6 +62,28 @@ def _get_columns():
 
 
 # ---------------- Data ----------------
+def _fact_rows(fd, td, roast_batch, rb_docstatus="Both", only_submitted_bc=0):
+    """Same rows as `_build_rows`, read from the Roast Batch Profitability Fact table."""
+    filters = {"rb_docstatus": {"Draft": 0, "Submitted": 1}.get(rb_docstatus, ["in", [0, 1]])}
+    if fd and td:
+        filters["roast_date"] = ["between", [fd, td]]
+    elif fd:
+        filters["roast_date"] = [">=", fd]
+    elif td:
+        filters["roast_date"] = ["<=", td]
+    if roast_batch:
+        filters["roast_batch"] = roast_batch
+    if only_submitted_bc:
+        filters["has_submitted_batch_cost"] = 1
+    return frappe.get_all(
+        FACT,
+        filters=filters,
+        fields=["roast_batch", "company", "roast_date", "input_qty", "output_qty", "yield_pct", "unit_cost",
+                "total_cost", "selling_rate", "revenue", "profit", "profit_margin"],
+        order_by="roast_date desc, roast_batch desc",
+    )
+
+
 def _build_rows(fd, td, roast_batch, rb_docstatus="Both", only_submitted_bc=0):
     # Roast Batch docstatus condition
     if rb_docstatus == "Draft":
@@ -82,48 +115,90 @@ def _build_rows(fd, td, roast_batch, rb_docstatus="Both", only_submitted_bc=0):
         """)
 
     where_sql = " AND ".join(conds) if conds else "1=1"
+    return compute_rows(where_sql, params)
+
+
+# ---------------- Set-based engine ----------------
+# Candidate Roast Batch columns, in fallback order (only those present in the table are read)
+INPUT_QTY_FIELDS = ["qty_to_roast", "input_qty", "input_weight"]
+OUTPUT_QTY_FIELDS = ["output_qty", "output_weight", "finished_weight"]
+RATE_FIELDS = ["selling_rate", "selling_price", "price_per_kg", "rate", "price"]
+ITEM_FIELDS = ["roasted_item", "item_code", "product"]
+PRICE_LIST_FIELDS = ["selling_price_list", "price_list"]
+BC_FIELDS = ["total_batch_cost", "cost_per_kg", "selling_rate", "revenue", "profit", "profit_margin"]
+
+
+def compute_rows(where_sql: str = "1=1", params: dict | None = None) -> list:
+    """Profitability rows for every Roast Batch matching `where_sql` (alias `rb`).
+
+    Column availability is resolved once, then Roast Batch, Batch Cost and Item Price
+    are each read in one query; all fallbacks run in memory, so the number of queries
+    does not grow with the number of batches.
+    """
+    cols = set(frappe.db.get_table_columns("Roast Batch"))
+    present = lambda fields: [f for f in fields if f in cols]  # noqa: E731
+    extra = sorted({f for group in (INPUT_QTY_FIELDS, OUTPUT_QTY_FIELDS, RATE_FIELDS, ITEM_FIELDS, PRICE_LIST_FIELDS)
+                    for f in present(group)} - {"name", "company", "roast_date"})
+    select_extra = "".join(f", rb.`{f}`" for f in extra)
 
     base = frappe.db.sql(
         f"""
-        SELECT rb.name AS roast_batch, rb.company, rb.roast_date
+        SELECT rb.name AS roast_batch, rb.company, rb.roast_date, rb.docstatus AS rb_docstatus{select_extra}
         FROM `tabRoast Batch` rb
         WHERE {where_sql}
         ORDER BY rb.roast_date DESC, rb.name DESC
         """,
-        params,
+        params or {},
         as_dict=True,
     ) or []
+    if not base:
+        return []
+
+    names = [rb["roast_batch"] for rb in base]
+    costs = _batch_costs(names)
+
+    def first(rb, fields, default=None, truthy=False):
+        for f in present(fields):
+            v = rb.get(f)
+            if (v if truthy else v not in (None, "")):
+                return v
+        return default
+
+    # Item Price is only needed for batches without a Batch Cost / RB selling rate
+    need_price = {}
+    for rb in base:
+        bc = costs.get(rb["roast_batch"], {})
+        if not bc.get("selling_rate") and not first(rb, RATE_FIELDS, truthy=True):
+            item = first(rb, ITEM_FIELDS, truthy=True)
+            if item:
+                need_price[rb["roast_batch"]] = (item, first(rb, PRICE_LIST_FIELDS, truthy=True))
+    prices = _item_prices({item for item, _pl in need_price.values()})
 
     rows = []
     for rb in base:
         rb_name = rb["roast_batch"]
 
         # Quantities from RB (support common alternates)
-        input_qty  = _pick_rb(rb_name, ["qty_to_roast","input_qty","input_weight"], 0.0)
-        output_qty = _pick_rb(rb_name, ["output_qty","output_weight","finished_weight"], 0.0)
-        yield_pct  = (float(output_qty) / float(input_qty) * 100.0) if input_qty else None
+        input_qty = first(rb, INPUT_QTY_FIELDS, 0.0)
+        output_qty = first(rb, OUTPUT_QTY_FIELDS, 0.0)
+        yield_pct = (float(output_qty) / float(input_qty) * 100.0) if input_qty else None
 
         # Prefer submitted Batch Cost; else latest any-status for graceful backfill
-        bc = (frappe.db.get_value(
-            "Batch Cost", {"batch_no": rb_name, "docstatus": 1},
-            ["total_batch_cost","cost_per_kg","selling_rate","revenue","profit","profit_margin"],
-            as_dict=True
-        ) or frappe.db.get_value(
-            "Batch Cost", {"batch_no": rb_name},
-            ["total_batch_cost","cost_per_kg","selling_rate","revenue","profit","profit_margin"],
-            as_dict=True
-        ) or {})
-
-        total_cost   = float(bc.get("total_batch_cost") or 0)
-        unit_cost    = float(bc.get("cost_per_kg") or (total_cost / float(output_qty) if output_qty else 0))
+        bc = costs.get(rb_name, {})
+        total_cost = float(bc.get("total_batch_cost") or 0)
+        unit_cost = float(bc.get("cost_per_kg") or (total_cost / float(output_qty) if output_qty else 0))
 
         # Selling rate: BC → RB field → Item Price for roasted_item
-        selling_rate = float(bc.get("selling_rate") or _selling_rate_from_rb_or_item(rb_name))
+        selling_rate = bc.get("selling_rate") or first(rb, RATE_FIELDS, truthy=True)
+        if not selling_rate and rb_name in need_price:
+            item, price_list = need_price[rb_name]
+            selling_rate = prices.get((item, price_list)) if price_list else prices.get((item, None))
+        selling_rate = float(selling_rate or 0)
 
         # Revenue/Profit/Margin: BC values if present; else compute
         revenue = float(bc.get("revenue") or (selling_rate * float(output_qty)))
-        profit  = float(bc.get("profit")  or (revenue - total_cost))
-        margin  = float(bc.get("profit_margin") or ((profit / revenue * 100.0) if revenue else 0))
+        profit = float(bc.get("profit") or (revenue - total_cost))
+        margin = float(bc.get("profit_margin") or ((profit / revenue * 100.0) if revenue else 0))
 
         rows.append({
             "roast_batch": rb_name,
@@ -138,51 +213,48 @@ def _build_rows(fd, td, roast_batch, rb_docstatus="Both", only_submitted_bc=0):
             "revenue": revenue,
             "profit": profit,
             "profit_margin": margin,
+            "rb_docstatus": rb["rb_docstatus"],
+            "has_submitted_batch_cost": 1 if bc.get("docstatus") == 1 else 0,
         })
 
     return rows
 
 
-# ---------------- Helpers ----------------
-def _pick_rb(rb_name, fields, default=None):
-    """Return first non-empty RB field value among a list of candidates."""
-    for f in fields:
-        if frappe.db.has_column("Roast Batch", f):
-            v = frappe.db.get_value("Roast Batch", rb_name, f)
-            if v not in (None, ""):
-                return v
-    return default
-
-
-def _selling_rate_from_rb_or_item(rb_name: str) -> float:
-    # 1) direct selling fields on RB (if you have them)
-    for f in ["selling_rate", "selling_price", "price_per_kg", "rate", "price"]:
-        if frappe.db.has_column("Roast Batch", f):
-            v = frappe.db.get_value("Roast Batch", rb_name, f)
-            if v:
-                return float(v)
-
-    # 2) use roasted_item (finished good) for Item Price fallback
-    item = None
-    for f in ["roasted_item", "item_code", "product"]:
-        if frappe.db.has_column("Roast Batch", f):
-            item = frappe.db.get_value("Roast Batch", rb_name, f)
-            if item:
-                break
-
-    # 3) Item Price (selling) — optional price list awareness
-    if item and frappe.db.table_exists("tabItem Price"):
-        where = {"item_code": item, "selling": 1}
-        for pf in ["selling_price_list", "price_list"]:
-            if frappe.db.has_column("Roast Batch", pf):
-                pl = frappe.db.get_value("Roast Batch", rb_name, pf)
-                if pl:
-                    where["price_list"] = pl
-                    break
-        rate = frappe.db.get_value("Item Price", where, "price_list_rate")
-        return float(rate or 0)
-
-    return 0.0
+def _batch_costs(names: list) -> dict:
+    """batch_no -> Batch Cost values, submitted first, then the latest of any status."""
+    out = {}
+    for bc in frappe.db.sql(
+        f"""
+        SELECT batch_no, docstatus, {", ".join(BC_FIELDS)}
+        FROM `tabBatch Cost`
+        WHERE batch_no IN %(names)s
+        ORDER BY (docstatus = 1) DESC, modified DESC
+        """,
+        {"names": tuple(names)},
+        as_dict=True,
+    ):
+        out.setdefault(bc.batch_no, bc)
+    return out
+
+
+def _item_prices(items: set) -> dict:
+    """(item_code, price_list) and (item_code, None) -> latest selling price_list_rate."""
+    out = {}
+    if not items or not frappe.db.table_exists("Item Price"):
+        return out
+    for ip in frappe.db.sql(
+        """
+        SELECT item_code, price_list, price_list_rate
+        FROM `tabItem Price`
+        WHERE selling = 1 AND item_code IN %(items)s
+        ORDER BY modified DESC
+        """,
+        {"items": tuple(items)},
+        as_dict=True,
+    ):
+        out.setdefault((ip.item_code, ip.price_list), ip.price_list_rate)
+        out.setdefault((ip.item_code, None), ip.price_list_rate)
+    return out
 
 
 def _safe_date_range(val):
@@ -0,0 +1,12 @@
+frappe.query_reports["Roast Curve"] = {
+  filters: [
+    {
+      fieldname: "roast_batches",
+      label: __("Roast Batches"),
+      fieldtype: "MultiSelectList",
+      reqd: 1,
+      get_data: (txt) => frappe.db.get_link_options("Roast Batch", txt)
+    },
+    { fieldname: "points", label: __("Points per Batch"), fieldtype: "Int", default: 600 }
+  ]
+};
@@ -1,4 +1,134 @@
+import frappe
+from frappe.utils import cint, get_datetime
+
+from coffee_roaster.roaster.machines.curve import RoastCurve, lttb_indices
+
+DEFAULT_POINTS = 600     # per-series pixel budget
+MAX_BATCHES = 20
+CACHE_TTL = 6 * 3600
+
+
 def execute(filters=None):
-    columns = []
-    data = []
-    return columns, data
+    f = frappe._dict(filters or {})
+    batches = _batches(f)
+    if not batches:
+        frappe.throw("Please pick at least one Roast Batch in the report filter.")
+    budget = max(50, min(cint(f.points) or DEFAULT_POINTS, 5000))
+
+    columns = [
+        {"label": "Roast Batch", "fieldname": "roast_batch", "fieldtype": "Link", "options": "Roast Batch", "width": 160},
+        {"label": "Time (s)", "fieldname": "t", "fieldtype": "Int", "width": 90},
+        {"label": "Bean Temp", "fieldname": "bean_temp", "fieldtype": "Float", "width": 100},
+        {"label": "Env Temp", "fieldname": "environment_temp", "fieldtype": "Float", "width": 100},
+        {"label": "RoR", "fieldname": "ror", "fieldtype": "Float", "width": 80},
+    ]
+
+    data, series = [], {}
+    for rb in batches:
+        pts = get_series(rb, budget)
+        series[rb] = pts
+        data.extend({"roast_batch": rb, "t": t, "bean_temp": bt, "environment_temp": et, "ror": ror}
+                    for t, bt, et, ror in pts)
+
+    return columns, data, None, _chart(series, budget)
+
+
+def _batches(f) -> list:
+    picked = f.roast_batches or f.roast_batch or []
+    if isinstance(picked, str):
+        picked = frappe.parse_json(picked) if picked.startswith("[") else [picked]
+    return list(dict.fromkeys(picked))[:MAX_BATCHES]
+
+
+def get_series(roast_batch: str, budget: int) -> list:
+    """LTTB-downsampled [(t, bt, et, ror)] for one batch, cached per (batch, budget)."""
+    key = f"roast_curve:{roast_batch}:{budget}"
+    pts = frappe.cache().get_value(key)
+    if pts is None:
+        pts = _downsample(_load_curve(roast_batch), budget)
+        frappe.cache().set_value(key, pts, expires_in_sec=CACHE_TTL)
+    return pts
+
+
+def clear_cache(roast_batch: str):
+    frappe.cache().delete_keys(f"roast_curve:{roast_batch}:")
+
+
+def _load_curve(roast_batch: str) -> RoastCurve:
+    """One round's curve per batch: the latest Coffee Roasting Log's telemetry, else its archive.
+
+    A multi-round batch has one log per round, so rows are read for that log only and the
+    rounds are never joined into one series. Rows stored without a log are used only when
+    the batch has no log at all.
+    """
+    log_name = frappe.db.get_value("Coffee Roasting Log", {"roast_batch": roast_batch}, "name",
+                                   order_by="creation desc")
+    rows = frappe.get_all(
+        "Roast Machine Telemetry",
+        filters={"roast_batch": roast_batch, "coffee_roasting_log": log_name or ["is", "not set"]},
+        fields=["reading_time", "bean_temp", "environment_temp", "ror"],
+        order_by="reading_time asc",
+        as_list=True,
+    )
+    if rows:
+        t0 = get_datetime(rows[0][0])
+        curve = RoastCurve()
+        for ts, bt, et, ror in rows:
+            curve.append({"t": int((get_datetime(ts) - t0).total_seconds()), "bt": bt, "et": et, "ror": ror})
+        return curve
+
+    from coffee_roaster.roaster.machines.archive import open_for_log
+    arc = open_for_log(log_name) if log_name else None
+    if not arc:
+        return RoastCurve()
+    with arc:
+        return arc.read()
+
+
+def _downsample(curve: RoastCurve, budget: int) -> list:
+    idx = lttb_indices(curve.t, curve.bt, budget)
+    return [(p["t"], p["bt"], p["et"], p["ror"]) for p in map(curve.point, idx)]
+
+
+def _grid(series: dict, budget: int) -> list:
+    """`budget` evenly spaced seconds covering every series, shared by all of them."""
+    end = max((pts[-1][0] for pts in series.values() if pts), default=0)
+    step = max(1, -(-end // (budget - 1)))
+    return list(range(0, end + step, step))
+
+
+def _resample(pts: list, grid: list) -> list:
+    """BT of `pts` at each grid time, linearly interpolated; None outside the series."""
+    out, j = [], 0
+    for t in grid:
+        while j < len(pts) and pts[j][0] < t:
+            j += 1
+        if j == len(pts) or (j == 0 and pts[0][0] > t):
+            out.append(None)
+            continue
+        t1, bt1 = pts[j][0], pts[j][1]
+        if t1 == t or j == 0:
+            out.append(bt1)
+            continue
+        t0, bt0 = pts[j - 1][0], pts[j - 1][1]
+        if bt0 is None or bt1 is None:
+            out.append(bt0 if bt1 is None else bt1)
+        else:
+            out.append(round(bt0 + (bt1 - bt0) * (t - t0) / (t1 - t0), 1))
+    return out
+
+
+def _chart(series: dict, budget: int = DEFAULT_POINTS) -> dict:
+    """Line chart of BT per batch, every series resampled onto one grid of at most `budget` times.
+
+    A chart dataset needs a value per label, so the labels are a shared grid sized to the
+    budget rather than the union of every series' sample times (which grows with each batch).
+    """
+    series = {rb: [p for p in pts if p[0] is not None] for rb, pts in series.items()}
+    labels = _grid(series, budget)
+    datasets = [{"name": rb, "values": _resample(pts, labels)} for rb, pts in series.items()]
+    return {
+        "data": {"labels": [f"{t // 60:02d}:{t % 60:02d}" for t in labels], "datasets": datasets},
+        "type": "line",
+        "lineOptions": {"hideDots": 1},
+    }
@@ -0,0 +1,34 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import unittest
+
+from coffee_roaster.roaster.report.roast_curve.roast_curve import _chart, _grid, _resample
+
+
+class TestRoastCurveChart(unittest.TestCase):
+	def test_shared_grid_is_sized_to_the_budget(self):
+		# 20 batches sampled at different times would have ~20x as many union labels
+		series = {
+			f"RB-{i}": [(t, 150 + t / 10, None, None) for t in range(i, 900 + 7 * i, 3)] for i in range(20)
+		}
+		chart = _chart(series, 100)
+		labels = chart["data"]["labels"]
+		self.assertLessEqual(len(labels), 100)
+		self.assertEqual(len(chart["data"]["datasets"]), 20)
+		for ds in chart["data"]["datasets"]:
+			self.assertEqual(len(ds["values"]), len(labels))
+
+	def test_grid_covers_the_longest_series(self):
+		grid = _grid({"a": [(0, 1, None, None), (100, 2, None, None)], "b": [(0, 1, None, None)]}, 11)
+		self.assertEqual(grid, list(range(0, 110, 10)))
+		self.assertEqual(_grid({"a": []}, 11), [0])
+
+	def test_resample_interpolates_and_leaves_gaps_outside(self):
+		pts = [(10, 100.0, None, None), (20, 120.0, None, None), (30, None, None, None)]
+		self.assertEqual(_resample(pts, [0, 10, 15, 20, 25, 40]), [None, 100.0, 110.0, 120.0, 120.0, None])
+
+	def test_untimed_points_are_skipped(self):
+		chart = _chart({"a": [(None, 99.0, None, None), (0, 100.0, None, None), (60, 160.0, None, None)]}, 3)
+		self.assertEqual(chart["data"]["labels"], ["00:00", "00:30", "01:00"])
+		self.assertEqual(chart["data"]["datasets"][0]["values"], [100.0, 130.0, 160.0])
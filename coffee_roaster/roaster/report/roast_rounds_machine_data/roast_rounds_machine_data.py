@@ -1,6 +1,5 @@
-import json
 import frappe
-from frappe.utils import get_datetime, format_datetime
+from frappe.utils import format_datetime
 
 def execute(filters=None):
     filters = filters or {}
@@ -14,21 +13,24 @@ def execute(filters=None):
         {"label": "Logs", "fieldname": "logs", "fieldtype": "Int", "width": 80},
         {"label": "Start", "fieldname": "start", "fieldtype": "Datetime", "width": 180},
         {"label": "End", "fieldname": "end", "fieldtype": "Datetime", "width": 180},
-        {"label": "Duration (s)", "fieldname": "duration_s", "fieldtype": "Int", "width": 110}
+        {"label": "Duration (s)", "fieldname": "duration_s", "fieldtype": "Int", "width": 110},
+        {"label": "DTR (%)", "fieldname": "dtr_pct", "fieldtype": "Percent", "width": 90},
+        {"label": "Max RoR (°C/min)", "fieldname": "max_ror", "fieldtype": "Float", "width": 120},
+        {"label": "Drop Temp (°C)", "fieldname": "drop_temp", "fieldtype": "Float", "width": 120}
     ]
 
-    # Data via API (keeps logic in one place)
+    # Data via API (keeps logic in one place); summaries only, no data_json
     data = []
-    out = frappe.get_attr("coffee_roaster.coffee_roaster.api.get_round_machine_data")(rb_name)
-    for rn, logs in sorted(out.items(), key=lambda x: x[0]):
-        start = get_datetime(logs[0]["timestamp"]) if logs else None
-        end   = get_datetime(logs[-1]["timestamp"]) if logs else None
-        dur_s = int((end - start).total_seconds()) if (start and end) else 0
+    out = frappe.get_attr("coffee_roaster.roaster.api.get_round_summaries")(rb_name)
+    for rn, r in sorted(out.items(), key=lambda x: x[0]):
         data.append({
             "round_no": rn,
-            "logs": len(logs),
-            "start": format_datetime(start) if start else None,
-            "end": format_datetime(end) if end else None,
-            "duration_s": dur_s
+            "logs": r["logs"],
+            "start": format_datetime(r["start"]) if r["start"] else None,
+            "end": format_datetime(r["end"]) if r["end"] else None,
+            "duration_s": r["duration_s"],
+            "dtr_pct": r["metrics"]["dtr_pct"],
+            "max_ror": r["metrics"]["max_ror"],
+            "drop_temp": r["metrics"]["drop_temp"],
         })
     return columns, data
@@ -1,5 +1,7 @@
 import frappe
+from coffee_roaster.roaster.report_cache import cached_report
 
+@cached_report("SKU PnL Profit", ["Sales Invoice", "Roast Batch", "Batch Cost"])
 def execute(filters=None):
     f = frappe._dict(filters or {})
 
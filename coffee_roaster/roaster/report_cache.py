@@ -0,0 +1,239 @@
+"""Shared result cache for the app's Script Reports.
+
+`@cached_report(name, doctypes)` wraps a report's `execute`. Results are stored in
+Redis under report name + normalized filters + a fingerprint of the user's roles and
+user permissions, tagged with the doctypes the report reads. `doc_events` hooks on
+those doctypes (`_report_cache_doctypes` in hooks.py) drop all entries tagged with the
+doctype that changed.
+
+Entries share a byte budget (MEMORY_BUDGET); when it is exceeded the least recently
+read entries are evicted. Bookkeeping of entries Redis expired on its own (TTL) is swept
+on the next store. Hits, misses and evictions are counted for `stats()`.
+
+Invalidation from doc events waits for the transaction to commit; dropping entries
+earlier would let a report run in between cache the old rows again for the full TTL.
+Writers that bypass doc events (raw SQL, `bulk_insert`) call `invalidate_doctype` or
+`invalidate_after_commit` themselves.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import pickle
+import time
+
+import frappe
+
+TTL = 6 * 3600
+MEMORY_BUDGET = 64 * 1024 * 1024  # bytes of pickled results across all reports
+
+_PREFIX = "report_cache:"
+_TAG = "report_cache_tag:"  # doctype -> set of entry keys
+_LRU = "report_cache_lru"  # sorted set: entry key -> last read time
+_EXPIRY = "report_cache_expiry"  # sorted set: entry key -> time its TTL runs out
+_SIZES = "report_cache_sizes"  # hash: entry key -> pickled size
+_TAGS_OF = "report_cache_tags_of"  # hash: entry key -> doctypes it is tagged with
+_STATS = "report_cache_stats"  # hash: hits, misses, evictions, bytes
+
+log = logging.getLogger(__name__)
+
+
+def _normalize(filters) -> str:
+	"""Filters with empty values dropped and keys sorted, so equivalent filter sets share a key."""
+	if isinstance(filters, str):
+		filters = json.loads(filters or "{}")
+	clean = {}
+	for k, v in (filters or {}).items():
+		if isinstance(v, str):
+			v = v.strip()
+		if v in (None, "", [], {}):
+			continue
+		clean[k] = v
+	return json.dumps(clean, sort_keys=True, default=str)
+
+
+def _permission_fingerprint(user: str | None = None) -> str:
+	"""Users with the same roles and user permissions see the same report rows."""
+	user = user or frappe.session.user
+	from frappe.permissions import get_user_permissions
+
+	payload = json.dumps(
+		[sorted(frappe.get_roles(user)), get_user_permissions(user)], sort_keys=True, default=str
+	)
+	return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def make_key(report: str, filters) -> str:
+	digest = hashlib.sha1(_normalize(filters).encode()).hexdigest()[:20]
+	return f"{_PREFIX}{frappe.scrub(report)}:{digest}:{_permission_fingerprint()}"
+
+
+def _count(field: str, by: int = 1):
+	cache = frappe.cache()
+	cache.hincrby(cache.make_key(_STATS), field, by)
+
+
+def get(key: str):
+	cache = frappe.cache()
+	result = cache.get_value(key)
+	if result is None:
+		_count("misses")
+		return None
+	cache.zadd(cache.make_key(_LRU), {key: time.time()})
+	_count("hits")
+	return result
+
+
+def put(key: str, result, doctypes):
+	cache = frappe.cache()
+	size = len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+	if size > MEMORY_BUDGET:
+		return
+	_sweep()
+	_drop(key)
+	cache.set_value(key, result, expires_in_sec=TTL)
+	now = time.time()
+	cache.zadd(cache.make_key(_LRU), {key: now})
+	cache.zadd(cache.make_key(_EXPIRY), {key: now + TTL})
+	cache.hset(_SIZES, key, size)
+	cache.hset(_TAGS_OF, key, list(doctypes))
+	_count("bytes", size)
+	for dt in doctypes:
+		cache.sadd(f"{_TAG}{dt}", key)
+	_evict()
+
+
+def _drop(key: str) -> bool:
+	"""Remove one entry and its bookkeeping; True if it was tracked."""
+	cache = frappe.cache()
+	size = cache.hget(_SIZES, key)
+	tags = cache.hget(_TAGS_OF, key) or []
+	cache.delete_value(key)
+	cache.zrem(cache.make_key(_LRU), key)
+	cache.zrem(cache.make_key(_EXPIRY), key)
+	for dt in tags:
+		cache.srem(f"{_TAG}{dt}", key)
+	cache.hdel(_TAGS_OF, key)
+	if size is None:
+		return False
+	cache.hdel(_SIZES, key)
+	_count("bytes", -int(size))
+	return True
+
+
+def _sweep():
+	"""Drop the bookkeeping (size, LRU, tags) of entries whose TTL already ran out."""
+	cache = frappe.cache()
+	for key in cache.zrangebyscore(cache.make_key(_EXPIRY), 0, time.time()) or []:
+		_drop(frappe.safe_decode(key))
+
+
+def _used() -> int:
+	cache = frappe.cache()
+	return int(cache.hmget(cache.make_key(_STATS), ["bytes"])[0] or 0)
+
+
+def _evict():
+	"""Drop least recently read entries until the byte budget holds."""
+	cache = frappe.cache()
+	while _used() > MEMORY_BUDGET:
+		oldest = cache.zrange(cache.make_key(_LRU), 0, 15)
+		if not oldest:
+			# only TTL-expired entries were left behind; restart the byte count
+			_count("bytes", -_used())
+			return
+		for key in oldest:
+			_drop(frappe.safe_decode(key))
+			_count("evictions")
+
+
+def cached_report(report: str, doctypes):
+	"""Decorator for a Script Report's `execute(filters)`; `doctypes` are what it reads."""
+
+	def wrap(execute):
+		@functools.wraps(execute)
+		def inner(filters=None):
+			try:
+				key = make_key(report, filters)
+				hit = get(key)
+			except Exception:
+				log.error(f"Report cache lookup failed for {report}", exc_info=True)
+				return execute(filters)
+			if hit is not None:
+				return hit
+			result = execute(filters)
+			try:
+				put(key, result, doctypes)
+			except Exception:
+				log.error(f"Report cache store failed for {report}", exc_info=True)
+			return result
+
+		return inner
+
+	return wrap
+
+
+def invalidate_doctype(doctype: str):
+	cache = frappe.cache()
+	tag = f"{_TAG}{doctype}"
+	keys = cache.smembers(tag) or []
+	for key in keys:
+		_drop(frappe.safe_decode(key))
+	if keys:
+		cache.delete_value(tag)
+
+
+def invalidate_after_commit(doctype: str):
+	"""Drop the doctype's entries once the current transaction commits (once per doctype)."""
+	pending = getattr(frappe.local, "report_cache_pending", None)
+	if pending is None:
+		pending = frappe.local.report_cache_pending = set()
+	if doctype in pending:
+		return
+	pending.add(doctype)
+
+	def run():
+		pending.discard(doctype)
+		try:
+			invalidate_doctype(doctype)
+		except Exception:
+			log.error(f"Report cache invalidation failed for {doctype}", exc_info=True)
+
+	frappe.db.after_commit.add(run)
+	# a rolled back transaction changed nothing; forget it so the next one registers again
+	frappe.db.after_rollback.add(lambda: pending.discard(doctype))
+
+
+def on_doc_change(doc, method=None):
+	"""doc_events hook on hooks.py's `_report_cache_doctypes`: child rows are saved with
+	their parent, so the parent's doctype is the tag that covers both."""
+	invalidate_after_commit(doc.doctype)
+
+
+@frappe.whitelist()
+def stats() -> dict:
+	"""Hit/miss/eviction counters, bytes in use and hit rate, for monitoring."""
+	_sweep()
+	cache = frappe.cache()
+	hits, misses, evictions, used = (
+		int(v or 0) for v in cache.hmget(cache.make_key(_STATS), ["hits", "misses", "evictions", "bytes"])
+	)
+	total = hits + misses
+	return {
+		"hits": hits,
+		"misses": misses,
+		"evictions": evictions,
+		"hit_rate": round(hits / total, 4) if total else 0.0,
+		"entries": cache.zcard(cache.make_key(_LRU)),
+		"bytes": used,
+		"budget": MEMORY_BUDGET,
+	}
+
+
+@frappe.whitelist()
+def clear():
+	frappe.only_for("System Manager")
+	cache = frappe.cache()
+	for key in cache.zrange(cache.make_key(_LRU), 0, -1) or []:
+		_drop(frappe.safe_decode(key))
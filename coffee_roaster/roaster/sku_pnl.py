@@ -0,0 +1,358 @@
+"""SKU P&L engine: cost, sales, profit and margin per roasted-coffee item (and month).
+
+Two grouped queries do all the work, costs by item/company/month from submitted Batch
+Costs (via their Roast Batch's roasted item and roast date) and sales by
+item/company/month from submitted Sales Invoices, and are merged in memory.
+
+SKU Monthly Ledger keeps the same monthly groups pre-aggregated: Sales Invoice and Batch
+Cost submit/cancel add or remove their share, and `reconcile` rebuilds it nightly from
+the two queries. `compute` reads the ledger instead of the source tables when the date
+range covers whole months and the ledger is known to be complete for them (reconciled,
+and no incremental update for those months has failed since), so year-over-year views
+don't rescan Sales Invoice Item.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+import frappe
+from frappe.utils import cint, get_last_day, getdate, now_datetime
+
+from coffee_roaster.roaster.report_cache import invalidate_doctype
+
+LEDGER = "SKU Monthly Ledger"
+ITEM_GROUP = "Roasted Coffee"
+KEY_FIELDS = ("item_code", "company", "period_start")
+SUM_FIELDS = ("sold_qty", "sales_amount", "produced_qty", "batch_cost")
+# global defaults: date of the last full reconcile, and months whose incremental update
+# failed since then (JSON list of "YYYY-MM-01")
+LEDGER_RECONCILED = "sku_monthly_ledger_reconciled"
+LEDGER_STALE = "sku_monthly_ledger_stale_months"
+
+log = logging.getLogger(__name__)
+
+
+def _month(col: str) -> str:
+	"""SQL for the first day of the month of a date column."""
+	return f"DATE_SUB({col}, INTERVAL DAYOFMONTH({col}) - 1 DAY)"
+
+
+def _costs(f, vals: dict) -> list:
+	where = ["bc.docstatus = 1", "i.item_group = %(item_group)s"]
+	if f.from_date:
+		where.append("rb.roast_date >= %(from_date)s")
+	if f.to_date:
+		where.append("rb.roast_date <= %(to_date)s")
+	if f.company:
+		where.append("rb.company = %(company)s")
+	if f.item_code:
+		where.append("rb.roasted_item = %(item_code)s")
+	return frappe.db.sql(
+		f"""
+        SELECT
+            rb.roasted_item AS item_code,
+            rb.company,
+            {_month("rb.roast_date")} AS period_start,
+            SUM(COALESCE(bc.total_batch_cost, 0)) AS batch_cost,
+            SUM(COALESCE(bc.output_weight, 0)) AS produced_qty
+        FROM `tabBatch Cost` bc
+        JOIN `tabRoast Batch` rb ON rb.name = bc.batch_no
+        JOIN `tabItem` i ON i.name = rb.roasted_item
+        WHERE {" AND ".join(where)}
+        GROUP BY rb.roasted_item, rb.company, period_start
+    """,
+		vals,
+		as_dict=True,
+	)
+
+
+def _sales(f, vals: dict) -> list:
+	where = ["si.docstatus = 1", "i.item_group = %(item_group)s"]
+	if f.from_date:
+		where.append("si.posting_date >= %(from_date)s")
+	if f.to_date:
+		where.append("si.posting_date <= %(to_date)s")
+	if f.company:
+		where.append("si.company = %(company)s")
+	if f.item_code:
+		where.append("sii.item_code = %(item_code)s")
+	return frappe.db.sql(
+		f"""
+        SELECT
+            sii.item_code,
+            si.company,
+            {_month("si.posting_date")} AS period_start,
+            SUM(COALESCE(sii.qty, 0)) AS sold_qty,
+            SUM(COALESCE(sii.amount, 0)) AS sales_amount
+        FROM `tabSales Invoice` si
+        JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
+        JOIN `tabItem` i ON i.name = sii.item_code
+        WHERE {" AND ".join(where)}
+        GROUP BY sii.item_code, si.company, period_start
+    """,
+		vals,
+		as_dict=True,
+	)
+
+
+def _ledger(f, vals: dict) -> list:
+	where = ["1=1"]
+	if f.from_date:
+		where.append("l.period_start >= %(from_date)s")
+	if f.to_date:
+		where.append("l.period_start <= %(to_date)s")
+	if f.company:
+		where.append("l.company = %(company)s")
+	if f.item_code:
+		where.append("l.item_code = %(item_code)s")
+	return frappe.db.sql(
+		f"""
+        SELECT l.item_code, l.company, l.period_start, {", ".join(f"l.{c}" for c in SUM_FIELDS)}
+        FROM `tab{LEDGER}` l
+        WHERE {" AND ".join(where)}
+    """,
+		vals,
+		as_dict=True,
+	)
+
+
+def _whole_months(f) -> bool:
+	"""The ledger only answers ranges that start and end on month boundaries."""
+	if f.from_date and getdate(f.from_date).day != 1:
+		return False
+	if f.to_date and getdate(f.to_date) != get_last_day(f.to_date):
+		return False
+	return True
+
+
+def _stale_months() -> list:
+	return json.loads(frappe.db.get_global(LEDGER_STALE) or "[]")
+
+
+def _ledger_ready(f) -> bool:
+	"""True once a reconcile has filled the ledger and no month in the range went stale since."""
+	if not frappe.db.get_global(LEDGER_RECONCILED):
+		return False
+	lo = str(getdate(f.from_date)) if f.from_date else None
+	hi = str(getdate(f.to_date)) if f.to_date else None
+	return not any((lo is None or m >= lo) and (hi is None or m <= hi) for m in _stale_months())
+
+
+def _merge(rows, by_month: bool, acc: dict):
+	for r in rows:
+		key = (r.item_code, r.period_start) if by_month else (r.item_code, None)
+		out = acc.setdefault(key, dict.fromkeys(SUM_FIELDS, 0.0))
+		for k in SUM_FIELDS:
+			out[k] += float(r.get(k) or 0)
+
+
+def compute(filters=None, by_month: bool = False) -> list:
+	"""P&L rows per item (per item and month with `by_month`), sorted by item then month."""
+	f = frappe._dict(filters or {})
+	vals = {
+		"item_group": ITEM_GROUP,
+		**{k: f.get(k) for k in ("from_date", "to_date", "company", "item_code")},
+	}
+	acc = {}
+	if cint(f.get("use_ledger", 1)) and _whole_months(f) and _ledger_ready(f):
+		_merge(_ledger(f, vals), by_month, acc)
+	else:
+		_merge(_costs(f, vals), by_month, acc)
+		_merge(_sales(f, vals), by_month, acc)
+	if not by_month:
+		# every roasted item gets a row, sold or not
+		item_filters = {"item_group": ITEM_GROUP}
+		if f.item_code:
+			item_filters["name"] = f.item_code
+		for item in frappe.get_all("Item", filters=item_filters, pluck="name"):
+			acc.setdefault((item, None), dict.fromkeys(SUM_FIELDS, 0.0))
+
+	rows = []
+	for (item, month), v in sorted(acc.items(), key=lambda kv: (kv[0][0], str(kv[0][1] or ""))):
+		profit = v["sales_amount"] - v["batch_cost"]
+		rows.append(
+			{
+				"item": item,
+				"month": month,
+				"sold_qty": v["sold_qty"],
+				"produced_qty": v["produced_qty"],
+				"total_cost": v["batch_cost"],
+				"total_sales": v["sales_amount"],
+				"profit": profit,
+				"margin_pct": (profit / v["sales_amount"] * 100) if v["sales_amount"] else 0,
+			}
+		)
+	return rows
+
+
+@frappe.whitelist()
+def get_sku_monthly(item_code=None, company=None, from_date=None, to_date=None) -> list:
+	"""Monthly P&L per item, for year-over-year charts."""
+	frappe.has_permission("Sales Invoice", throw=True)
+	return compute(
+		{"item_code": item_code, "company": company, "from_date": from_date, "to_date": to_date},
+		by_month=True,
+	)
+
+
+# ---- ledger maintenance ----
+def _apply(entries: dict, sign: int):
+	"""Add sign * sums to the ledger rows of `entries` ({(item, company, month): {field: value}})."""
+	user, now = frappe.session.user, now_datetime()
+	cols = (
+		"name",
+		"owner",
+		"modified_by",
+		"creation",
+		"modified",
+		"docstatus",
+		"idx",
+		"ledger_key",
+		*KEY_FIELDS,
+		*SUM_FIELDS,
+	)
+	sql = f"""
+        INSERT INTO `tab{LEDGER}` ({", ".join(f"`{c}`" for c in cols)})
+        VALUES ({", ".join(["%s"] * len(cols))})
+        ON DUPLICATE KEY UPDATE {", ".join(f"`{f}` = `{f}` + VALUES(`{f}`)" for f in SUM_FIELDS)},
+            `modified` = VALUES(`modified`)
+    """
+	for key, sums in entries.items():
+		name = _name(key)
+		frappe.db.sql(
+			sql,
+			(
+				name,
+				user,
+				user,
+				now,
+				now,
+				0,
+				0,
+				name,
+				*key,
+				*tuple(sign * float(sums.get(f) or 0) for f in SUM_FIELDS),
+			),
+		)
+
+
+def _name(key: tuple) -> str:
+	"""Deterministic ledger_key (and row name), so increments of one month meet on one row."""
+	return hashlib.sha1("|".join(str(k or "") for k in key).encode()).hexdigest()[:20]
+
+
+def _first_of_month(d) -> str:
+	d = getdate(d)
+	return str(d - timedelta(days=d.day - 1))
+
+
+def _invoice_entries(doc) -> dict:
+	codes = {r.item_code for r in doc.get("items") or [] if r.item_code}
+	roasted = (
+		set(
+			frappe.get_all(
+				"Item", filters={"name": ["in", list(codes)], "item_group": ITEM_GROUP}, pluck="name"
+			)
+		)
+		if codes
+		else set()
+	)
+	month = _first_of_month(doc.posting_date)
+	out = {}
+	for r in doc.get("items") or []:
+		if r.item_code in roasted:
+			e = out.setdefault((r.item_code, doc.company, month), {})
+			e["sold_qty"] = e.get("sold_qty", 0) + float(r.qty or 0)
+			e["sales_amount"] = e.get("sales_amount", 0) + float(r.amount or 0)
+	return out
+
+
+def _batch_cost_entries(doc) -> dict:
+	rb = (
+		frappe.db.get_value(
+			"Roast Batch", doc.get("batch_no"), ["roasted_item", "company", "roast_date"], as_dict=True
+		)
+		if doc.get("batch_no")
+		else None
+	)
+	if not rb or not rb.roasted_item or not rb.roast_date:
+		return {}
+	if frappe.db.get_value("Item", rb.roasted_item, "item_group") != ITEM_GROUP:
+		return {}
+	return {
+		(rb.roasted_item, rb.company, _first_of_month(rb.roast_date)): {
+			"batch_cost": doc.get("total_batch_cost"),
+			"produced_qty": doc.get("output_weight"),
+		}
+	}
+
+
+def _safe_apply(entries_fn, doc, sign: int):
+	"""Ledger upkeep must never block a submit/cancel; the months it failed for are marked
+	stale (so `compute` reads the source tables for them) until the nightly reconcile."""
+	entries = None
+	try:
+		entries = entries_fn(doc)
+		_apply(entries, sign)
+	except Exception:
+		log.error(f"SKU ledger update failed for {doc.doctype} {doc.name}", exc_info=True)
+		if entries is None:
+			# months unknown: distrust the whole ledger
+			frappe.db.set_global(LEDGER_RECONCILED, "")
+		else:
+			months = set(_stale_months()) | {key[2] for key in entries}
+			frappe.db.set_global(LEDGER_STALE, json.dumps(sorted(months)))
+
+
+def on_sales_invoice_submit(doc, method=None):
+	_safe_apply(_invoice_entries, doc, 1)
+
+
+def on_sales_invoice_cancel(doc, method=None):
+	_safe_apply(_invoice_entries, doc, -1)
+
+
+def on_batch_cost_submit(doc, method=None):
+	_safe_apply(_batch_cost_entries, doc, 1)
+
+
+def on_batch_cost_cancel(doc, method=None):
+	_safe_apply(_batch_cost_entries, doc, -1)
+
+
+def reconcile():
+	"""Rebuild the whole ledger from the two source queries."""
+	vals = {"item_group": ITEM_GROUP}
+	acc = {}
+	for r in _costs(frappe._dict(), vals) + _sales(frappe._dict(), vals):
+		e = acc.setdefault((r.item_code, r.company, str(r.period_start)), dict.fromkeys(SUM_FIELDS, 0.0))
+		for k in SUM_FIELDS:
+			e[k] += float(r.get(k) or 0)
+
+	frappe.db.delete(LEDGER)
+	user, now = frappe.session.user, now_datetime()
+	frappe.db.bulk_insert(
+		LEDGER,
+		[
+			"name",
+			"owner",
+			"modified_by",
+			"creation",
+			"modified",
+			"docstatus",
+			"idx",
+			"ledger_key",
+			*list(KEY_FIELDS + SUM_FIELDS),
+		],
+		[
+			(_name(key), user, user, now, now, 0, 0, _name(key), *key, *tuple(v[f] for f in SUM_FIELDS))
+			for key, v in acc.items()
+		],
+	)
+	frappe.db.set_global(LEDGER_STALE, "[]")
+	frappe.db.set_global(LEDGER_RECONCILED, str(now.date()))
+	frappe.db.commit()
+	invalidate_doctype(LEDGER)
+	log.info(f"SKU monthly ledger reconciled: {len(acc)} rows")
@@ -0,0 +1,48 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import unittest
+from datetime import datetime, timedelta
+
+from coffee_roaster.roaster.api import _assign_rounds
+
+T0 = datetime(2025, 3, 1, 9, 0)
+
+
+def _row(name, log_name=None, minute=None):
+	return (name, log_name, None if minute is None else T0 + timedelta(minutes=minute))
+
+
+def _names(rounds):
+	return {rn: [row[0] for row in rows] for rn, rows in rounds.items()}
+
+
+class TestAssignRounds(unittest.TestCase):
+	def test_no_rounds(self):
+		self.assertEqual(_assign_rounds({}, 0, [_row("a", minute=1)]), {})
+
+	def test_tagged_logs_group_by_suffix(self):
+		logs = [
+			_row("a", "Kenya-R01", 0),
+			_row("b", "Kenya-R2", 1),
+			_row("c", "Kenya-R09", 2),
+			_row("d", "Kenya", 3),
+			_row("e", "Kenya-R01 ", 4),
+		]
+		self.assertEqual(_names(_assign_rounds({}, 2, logs)), {1: ["a", "e"], 2: ["b"]})
+
+	def test_untagged_logs_split_into_equal_windows(self):
+		rb = {"charge_start": T0, "development_end": T0 + timedelta(minutes=20)}
+		logs = [_row("a", minute=1), _row("b", minute=5), _row("c", minute=9), _row("d", minute=10)]
+		logs += [_row("e", minute=19), _row("f", minute=25)]
+		self.assertEqual(_names(_assign_rounds(rb, 2, logs)), {1: ["a", "b", "c"], 2: ["d", "e", "f"]})
+
+	def test_untimed_logs_land_in_the_first_round(self):
+		rb = {"charge_start": T0, "development_end": T0 + timedelta(minutes=20)}
+		logs = [_row("x"), _row("a", minute=1), _row("b", minute=15)]
+		self.assertEqual(_names(_assign_rounds(rb, 2, logs)), {1: ["x", "a"], 2: ["b"]})
+
+	def test_without_a_window_rounds_stay_empty(self):
+		rb = {"charge_start": T0, "development_end": T0}
+		self.assertEqual(_names(_assign_rounds(rb, 2, [_row("a", minute=1)])), {1: [], 2: []})
+		self.assertEqual(_names(_assign_rounds({}, 1, [_row("a", minute=1)])), {1: []})
@@ -0,0 +1,72 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from coffee_roaster.roaster import cylinder_rollup
+from coffee_roaster.roaster.cylinder_rollup import contributions
+
+
+def _batch(rounds=(), **values):
+	doc = frappe._dict(
+		roast_date="2025-03-01", roast_cylinder="CYL-A", roasting_machine="M1", operator="op@example.com"
+	)
+	doc.update(values)
+	doc.rounds = [frappe._dict(r) for r in rounds]
+	return doc
+
+
+class TestContributions(unittest.TestCase):
+	def test_rounds_split_by_grade_and_cylinder(self):
+		doc = _batch(
+			[
+				{"bean_group": "G1", "input_qty": 10, "output_qty": 8.5, "quacker": 0.5},
+				{"bean_group": "G2", "input_qty": 12, "output_qty": 10, "quacker": 0},
+				{
+					"bean_group": "G1",
+					"input_qty": 5,
+					"output_qty": 4,
+					"quacker": 1,
+					"roast_cylinder": "CYL-B",
+				},
+			]
+		)
+		out = contributions(doc)
+		a = out[("CYL-A", "2025-03-01", "M1", "op@example.com")]
+		b = out[("CYL-B", "2025-03-01", "M1", "op@example.com")]
+		self.assertEqual((a["batches"], a["rounds"], b["batches"], b["rounds"]), (1, 2, 1, 1))
+		self.assertEqual((a["g1_green"], a["g2_green"], a["g3_green"]), (10, 12, 0))
+		self.assertAlmostEqual(a["g1_moisture_loss"], 1.5)
+		self.assertAlmostEqual(a["g1_net_coffee"], 8.0)
+		self.assertEqual((a["total_input"], a["total_output"]), (22, 18.5))
+		self.assertAlmostEqual(a["total_net_coffee"], 18.0)
+		self.assertEqual((b["g1_quacker_loss"], b["total_net_coffee"]), (1, 3))
+
+	def test_unknown_grade_only_counts_in_totals(self):
+		out = contributions(_batch([{"bean_group": "", "input_qty": 7, "output_qty": 6}]))
+		(row,) = out.values()
+		self.assertEqual((row["total_input"], row["g1_green"] + row["g2_green"] + row["g3_green"]), (7, 0))
+
+	def test_batch_without_rounds_counts_once(self):
+		(row,) = contributions(_batch()).values()
+		self.assertEqual((row["batches"], row["rounds"], row["total_input"]), (1, 0, 0))
+
+
+class TestUpdateAfterSubmit(unittest.TestCase):
+	def run_update(self, before, after):
+		after.get_doc_before_save = lambda: before
+		with patch.object(cylinder_rollup, "_apply") as apply:
+			cylinder_rollup.on_roast_batch_update_after_submit(after)
+		return [(doc, sign) for (doc, sign), _ in apply.call_args_list]
+
+	def test_edited_rounds_move_the_contributions(self):
+		before = _batch([{"bean_group": "G1", "input_qty": 10, "output_qty": 8}])
+		after = _batch([{"bean_group": "G1", "input_qty": 10, "output_qty": 9}], roast_cylinder="CYL-B")
+		self.assertEqual(self.run_update(before, after), [(before, -1), (after, 1)])
+
+	def test_unrelated_edit_writes_nothing(self):
+		rounds = [{"bean_group": "G2", "input_qty": 10, "output_qty": 8}]
+		self.assertEqual(self.run_update(_batch(rounds), _batch(rounds, remarks="checked")), [])
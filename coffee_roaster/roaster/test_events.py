@@ -0,0 +1,42 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import unittest
+from datetime import datetime
+
+from coffee_roaster.roaster.events import _merge
+
+
+def _ev(round_no, state, ts):
+	return {"round_no": round_no, "state": state, "ts": ts}
+
+
+class TestMerge(unittest.TestCase):
+	def test_first_start_and_last_finish_per_round(self):
+		rounds = _merge(
+			[
+				_ev(1, "start", "2025-03-01 09:00:05"),
+				_ev(1, "start", "2025-03-01 09:00:01"),
+				_ev(1, "finish", "2025-03-01 09:10:00"),
+				_ev(1, "finish", "2025-03-01 09:12:00"),
+				_ev(2, "finish", "2025-03-01 09:25:00"),
+			]
+		)
+		self.assertEqual(
+			rounds,
+			{
+				1: {"start": datetime(2025, 3, 1, 9, 0, 1), "finish": datetime(2025, 3, 1, 9, 12)},
+				2: {"start": None, "finish": datetime(2025, 3, 1, 9, 25)},
+			},
+		)
+
+	def test_order_of_arrival_does_not_matter(self):
+		events = [
+			_ev(3, "finish", "2025-03-01 10:00:00"),
+			_ev(3, "start", "2025-03-01 09:40:00"),
+			_ev(3, "finish", "2025-03-01 09:59:00"),
+		]
+		self.assertEqual(_merge(events), _merge(list(reversed(events))))
+
+	def test_empty_burst(self):
+		self.assertEqual(_merge([]), {})
@@ -0,0 +1,70 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from coffee_roaster.roaster import report_cache
+
+
+class TestNormalize(FrappeTestCase):
+	def test_empty_values_and_key_order_do_not_matter(self):
+		a = report_cache._normalize({"to_date": "2025-03-31", "company": " Sime ", "item": "", "tags": []})
+		b = report_cache._normalize('{"company": "Sime", "to_date": "2025-03-31", "warehouse": null}')
+		self.assertEqual(a, b)
+		self.assertEqual(report_cache._normalize(None), report_cache._normalize(""))
+
+	def test_make_key_splits_reports_filters_and_permissions(self):
+		with patch.object(report_cache, "_permission_fingerprint", return_value="roles-a"):
+			key = report_cache.make_key("Cylinder Tracking", {"period": "Month", "roaster": ""})
+			self.assertEqual(key, report_cache.make_key("Cylinder Tracking", '{"period": "Month"}'))
+			self.assertNotEqual(key, report_cache.make_key("Cylinder Tracking", {"period": "Week"}))
+			self.assertNotEqual(key, report_cache.make_key("SKU PnL Profit", {"period": "Month"}))
+		with patch.object(report_cache, "_permission_fingerprint", return_value="roles-b"):
+			self.assertNotEqual(key, report_cache.make_key("Cylinder Tracking", {"period": "Month"}))
+
+
+class TestInvalidation(FrappeTestCase):
+	def setUp(self):
+		frappe.set_user("Administrator")
+		report_cache.clear()
+		self.cache = frappe.cache()
+
+	def tearDown(self):
+		report_cache.clear()
+
+	def put(self, name, doctypes):
+		key = f"{report_cache._PREFIX}test:{name}"
+		report_cache.put(key, [{"row": name}], doctypes)
+		return key
+
+	def tagged(self, doctype):
+		return {frappe.safe_decode(k) for k in self.cache.smembers(f"{report_cache._TAG}{doctype}") or []}
+
+	def test_only_entries_tagged_with_the_doctype_are_dropped(self):
+		batch = self.put("batch", ["Roast Batch", "Batch Cost"])
+		customer = self.put("customer", ["Customer"])
+		report_cache.invalidate_doctype("Roast Batch")
+		self.assertIsNone(report_cache.get(batch))
+		self.assertEqual(report_cache.get(customer), [{"row": "customer"}])
+		self.assertEqual(self.tagged("Batch Cost"), set())
+		self.assertEqual(report_cache.stats()["entries"], 1)
+
+	def test_expired_entries_leave_no_bookkeeping_behind(self):
+		stale = self.put("stale", ["Customer"])
+		# what Redis does once the TTL runs out: the value is gone, the bookkeeping is not
+		self.cache.delete_value(stale)
+		self.cache.zadd(self.cache.make_key(report_cache._EXPIRY), {stale: 0})
+		fresh = self.put("fresh", ["Customer"])
+		self.assertIsNone(self.cache.hget(report_cache._SIZES, stale))
+		self.assertEqual(self.tagged("Customer"), {fresh})
+		self.assertEqual(report_cache.stats()["bytes"], self.cache.hget(report_cache._SIZES, fresh))
+
+	def test_on_doc_change_waits_for_commit(self):
+		key = self.put("batch", ["Roast Batch"])
+		report_cache.on_doc_change(frappe._dict(doctype="Roast Batch"))
+		self.assertIsNotNone(report_cache.get(key))
+		frappe.db.commit()
+		self.assertIsNone(report_cache.get(key))
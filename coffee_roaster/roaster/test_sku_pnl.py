@@ -0,0 +1,43 @@
+# Copyright (c) 2025, sime and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from coffee_roaster.roaster import sku_pnl
+
+
+class TestLedgerReady(FrappeTestCase):
+	def ready(self, reconciled, stale, **filters):
+		values = {sku_pnl.LEDGER_RECONCILED: reconciled, sku_pnl.LEDGER_STALE: json.dumps(stale)}
+		with patch.object(frappe.db, "get_global", side_effect=values.get):
+			return sku_pnl._ledger_ready(frappe._dict(filters))
+
+	def test_never_reconciled(self):
+		self.assertFalse(self.ready("", []))
+		self.assertFalse(self.ready(None, [], from_date="2025-01-01", to_date="2025-01-31"))
+
+	def test_reconciled_and_nothing_stale(self):
+		self.assertTrue(self.ready("2025-04-02", [], from_date="2025-01-01", to_date="2025-03-31"))
+
+	def test_stale_month_inside_the_range(self):
+		stale = ["2025-02-01"]
+		self.assertFalse(self.ready("2025-04-02", stale, from_date="2025-01-01", to_date="2025-03-31"))
+		self.assertFalse(self.ready("2025-04-02", stale, from_date="2025-02-01"))
+		self.assertFalse(self.ready("2025-04-02", stale))
+
+	def test_stale_month_outside_the_range(self):
+		stale = ["2024-12-01", "2025-04-01"]
+		self.assertTrue(self.ready("2025-04-02", stale, from_date="2025-01-01", to_date="2025-03-31"))
+		self.assertTrue(self.ready("2025-04-02", stale, to_date="2024-11-30"))
+
+
+class TestWholeMonths(FrappeTestCase):
+	def test_bounds(self):
+		self.assertTrue(sku_pnl._whole_months(frappe._dict()))
+		self.assertTrue(sku_pnl._whole_months(frappe._dict(from_date="2025-02-01", to_date="2025-02-28")))
+		self.assertFalse(sku_pnl._whole_months(frappe._dict(from_date="2025-02-02")))
+		self.assertFalse(sku_pnl._whole_months(frappe._dict(to_date="2025-02-27")))